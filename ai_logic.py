@@ -1,57 +1,262 @@
 # ai_logic.py (深度优化版)
-from collections import Counter, defaultdict
-import random
-from game_logic import HandType, CARD_VALUES
+from collections import Counter, OrderedDict, defaultdict
+import threading
+import time
+from game_logic import CLASSIFIER_RULE_KEYS, MIN_BOMB_SIZE, HandType, CARD_VALUES, compare_plays
+from cards import CARD_RANK, CARD_VALUE, NUM_RANKS, SMALL_JOKER, BIG_JOKER, Hand, rank_counts, rank_to_value, value_to_rank
+from hand_solver import SearchTimeout, get_solver
+
+# 进程内共享缓存的容量（条目数）
+DECISION_CACHE_SIZE = 1 << 15
+ANALYSIS_CACHE_SIZE = 1 << 12
+INITIATIVE_CACHE_SIZE = 1 << 14
+# 领出时“未见大牌”只看 A 及以上的点数（_select_safest_play 的惩罚范围）
+BIG_RANKS = range(value_to_rank(CARD_VALUES['A']), NUM_RANKS)
+# 跟牌时上家剩余张数只影响 _should_use_bomb 的阈值判断，超过该值的都视为同一情形
+LAST_PLAYER_COUNT_CAP = 4
+# 决策键里阶段与组合类型按下标编码
+GAME_PHASES = ('opening', 'midgame', 'endgame')
+COMBO_TYPES = ('rocket', 'bombs', 'airplanes', 'consecutive_pairs', 'straights', 'threes', 'pairs', 'singles')
+# 跟牌打分中，打出后“出完剩余手牌还需的手数”每多一手折合的点数
+FOLLOW_HANDS_WEIGHT = 2
+
+
+class SharedLRUCache:
+    """进程内所有AI共用的 LRU 缓存：容量有上限、线程安全，并统计命中与未命中次数。值不能为 None。"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize):
+        """修改容量；设为 0 即停用缓存。"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'maxsize': self.maxsize}
+
+
+# 决策：规则、阶段、局面要点、手牌签名、上家出牌签名、分解布局打包成的字节串 -> 出牌在规范牌序中的位置
+# 分解：手牌签名 -> 各组合的点数布局；牌权评估：剩余手牌签名 -> 能否保持牌权
+BOT_CACHES = {
+    'decision': SharedLRUCache(DECISION_CACHE_SIZE),
+    'analysis': SharedLRUCache(ANALYSIS_CACHE_SIZE),
+    'initiative': SharedLRUCache(INITIATIVE_CACHE_SIZE),
+}
+
+
+def bot_cache_info():
+    return {name: cache.info() for name, cache in BOT_CACHES.items()}
+
+
+def _analysis_layout(analysis):
+    """把分解结果换成只含点数的布局（各组合类型下每个组合的点数序列），与花色无关。"""
+    return tuple((combo_type, tuple(tuple(CARD_RANK[c] for c in combo) for combo in combos))
+                 for combo_type, combos in analysis.items())
+
 
 class BotPlayer:
-    """一个基于全局牌张记忆、动态决策权重和高级启发式策略的AI玩家"""
+    """
+    一个基于全局牌张记忆、动态决策权重和高级启发式策略的AI玩家。
+    实例与座位绑定、跨回合存活：每回合通过 observe() 同步局面，手牌分解随自己出牌增量更新，缓存保持有效。
+    """
 
     def __init__(self, hand, game_state, game_logic_instance):
         self.hand_backup = list(hand) # 原始手牌备份
+        self.hand_counts = rank_counts(self.hand_backup)
         self.game_state = game_state
         self.game = game_logic_instance
         self.my_sid = game_state['my_sid']
         self.player_states = {p['sid']: p for p in game_state['players']}
         
-        # 1. 全局牌张记忆 (Card Counting)
-        self.unseen_cards = self._initialize_unseen_cards()
+        # 1. 全局牌张记忆 (Card Counting)：按点数统计，直接读取对局事件日志维护的计数
+        self.unseen_ranks = self.game.get_unseen_rank_counts(self.my_sid)
         self.analyzed_hand = self._analyze_hand(list(self.hand_backup))
+        # 分解结果是否经过增量删改：没有时它完全由手牌点数签名决定，决策键里不必再带分解布局
+        self._analysis_edited = False
         self._play_info_cache = {}
+        # 最少手数拆牌求解器，按规则预设在所有AI之间共享记忆表
+        self.solver = get_solver(self.game.room_settings)
         
         # 2. 游戏阶段判断
         self.game_phase = self._determine_game_phase()
+        # 本次决策的截止时间（time.perf_counter() 时刻），None 表示不限时
+        self.deadline = None
+        self._bounded_hands = {}
+        # 本次决策是否完整算完（没有因截止时间退回粗略结果），只有完整的决策才写入共享缓存
+        self._complete = True
+        self._rules_key = tuple(bool(self.game.room_settings.get(k, True)) for k in CLASSIFIER_RULE_KEYS)
+
+    def observe(self, hand, game_state):
+        """新回合开始时同步手牌与局面；只有自己打出的牌会离开手牌，据此增量更新分解结果。"""
+        hand = list(hand)
+        old_counts, new_counts = Counter(self.hand_backup), Counter(hand)
+        if new_counts - old_counts:
+            # 手牌里出现了新牌，说明已经是新的一局，整体重建
+            self.__init__(hand, game_state, self.game)
+            return
+        self.game_state = game_state
+        self.player_states = {p['sid']: p for p in game_state['players']}
+        played = list((old_counts - new_counts).elements())
+        if played:
+            self.hand_backup = hand
+            self.hand_counts = rank_counts(hand)
+            self._analysis_edited = self._remove_played_combos(played)
+            if not self._analysis_edited:
+                self.analyzed_hand = self._analyze_hand(list(hand))
+        self.game_phase = self._determine_game_phase()
 
-    def decide_move(self):
-        """AI决策主入口"""
-        # 每次决策前都更新未见牌信息
+    def _remove_played_combos(self, played):
+        """若打出的牌恰好由若干个完整组合构成，则直接删掉这些组合，返回是否成功。"""
+        remaining = Counter(played)
+        removals = []
+        for combo_type, combos in self.analyzed_hand.items():
+            for combo in combos:
+                combo_counts = Counter(combo)
+                if not combo_counts - remaining:
+                    remaining -= combo_counts
+                    removals.append((combo_type, combo))
+                    if not remaining:
+                        break
+            if not remaining:
+                break
+        if remaining:
+            return False
+        for combo_type, combo in removals:
+            self.analyzed_hand[combo_type].remove(combo)
+        return True
+
+    def decide_move(self, deadline=None):
+        """
+        AI决策主入口。
+        deadline 为 time.perf_counter() 时刻：跟牌打分分阶段细化，到点时返回最近一个完整阶段选出的出牌。
+        决策只取决于点数层面的局面，先按规范键查进程内共享缓存，命中时把缓存的出牌映射回自己手里的具体牌。
+        """
+        self.deadline = deadline
+        self._bounded_hands = {}
+        self._complete = True
+        # 每次决策前都刷新未见牌信息（O(点数种类)，与已出牌数量无关）
+        self.unseen_ranks = self.game.get_unseen_rank_counts(self.my_sid)
         last_played = self.game_state['last_played_cards']
-        if last_played:
-            self._consume_unseen_cards(last_played)
 
         is_my_lead = not last_played or self.game_state['current_turn_sid'] == self.game_state['last_player_sid']
 
+        cache = BOT_CACHES['decision']
+        key = self._decision_key(is_my_lead)
+        slots = cache.get(key)
+        if slots is not None:
+            slots_order = self._canonical_cards()
+            return [slots_order[i] for i in slots] if slots else list(PASS_MOVE)
+
+        move = self._decide_lead() if is_my_lead else self._decide_follow(last_played)
+        if self._complete:
+            cache.put(key, () if move == PASS_MOVE else self._cards_to_slots(move, self._canonical_cards()))
+        return move
+
+    def _decision_key(self, is_my_lead):
+        """
+        决策用到的全部局面信息，只保留点数与影响分支的要点，不含花色和座位。
+        核心是手牌点数签名加上要跟的那手牌的点数签名，对任意张数的手牌都适用；
+        打包成字节串（几十字节），比嵌套元组省一个数量级的内存。
+        """
+        key = bytearray(self._rules_key)
+        key.append(GAME_PHASES.index(self.game_phase))
         if is_my_lead:
-            return self._decide_lead()
+            sizes = [p['card_count'] for p in self.player_states.values()]
+            key.append(self.player_states[self.my_sid]['card_count'] <= min(sizes))
+            key.extend(self.unseen_ranks[r] > 0 for r in BIG_RANKS)
         else:
-            return self._decide_follow(last_played)
+            last_player_cards = self.player_states[self.game_state['last_player_sid']]['card_count']
+            key.append(2 + min(last_player_cards, LAST_PLAYER_COUNT_CAP))
+            key.extend(rank_counts(self.game_state['last_played_cards']))
+        key.extend(self.hand_counts)
+        key.append(self._analysis_edited)
+        if not self._analysis_edited:
+            return bytes(key)
+        # 增量删改过的分解布局放在最后：每类组合为 类型下标、组合数，每个组合为 张数、各张点数
+        for combo_type, combos in self.analyzed_hand.items():
+            key += bytes((COMBO_TYPES.index(combo_type), len(combos)))
+            for combo in combos:
+                key.append(len(combo))
+                key.extend(CARD_RANK[c] for c in combo)
+        return bytes(key)
+
+    def _canonical_cards(self):
+        """规范牌序：按分解结果逐个组合展开，再接上未进入分解的牌。键相同的两手牌在同一位置上点数相同。"""
+        cards = [c for combos in self.analyzed_hand.values() for combo in combos for c in combo]
+        rest = Counter(self.hand_backup) - Counter(cards)
+        return cards + sorted(rest.elements())
+
+    @staticmethod
+    def _cards_to_slots(move, slots_order):
+        free = defaultdict(list)
+        for i, c in reversed(list(enumerate(slots_order))):
+            free[c].append(i)
+        return tuple(free[c].pop() for c in move)
 
     def _analyze_hand(self, hand_to_analyze):
+        """分解结构只取决于各点数张数：按点数签名查共享缓存，命中时把点数布局映射回这手牌的具体牌。"""
+        cache = BOT_CACHES['analysis']
+        key = tuple(rank_counts(hand_to_analyze))
+        layout = cache.get(key)
+        if layout is None:
+            analysis = self._analyze_hand_uncached(hand_to_analyze)
+            cache.put(key, _analysis_layout(analysis))
+            return analysis
+        hand = Hand(hand_to_analyze)
+        analysis = defaultdict(list)
+        for combo_type, combos in layout:
+            analysis[combo_type] = [[c for rank in combo for c in hand.take_rank(rank, 1)] for combo in combos]
+        return analysis
+
+    def _analyze_hand_uncached(self, hand_to_analyze):
         """
         核心函数：使用贪心算法将手牌分解为最优组合。
         新增飞机带翼的智能组合。
         """
-        hand = list(hand_to_analyze)
+        hand = Hand(hand_to_analyze)
         analysis = defaultdict(list)
         
-        # 1. 提取火箭
-        if '小王' in hand and '大王' in hand:
-            analysis['rocket'].append(['小王', '大王']); hand.remove('小王'); hand.remove('大王')
+        # 1. 提取火箭（多副牌时可能有多对大小王）
+        while SMALL_JOKER in hand and BIG_JOKER in hand:
+            analysis['rocket'].append([SMALL_JOKER, BIG_JOKER]); hand.remove(SMALL_JOKER); hand.remove(BIG_JOKER)
         
-        counts = Counter(self._get_card_value(c) for c in hand)
+        counts = Counter({rank_to_value(rank): n for rank, n in enumerate(hand.rank_counts) if n})
 
-        # 2. 提取炸弹
+        # 2. 提取炸弹：同一点数的全部张数作为一个炸弹（多副牌时张数越多越大）
         for v, n in list(counts.items()):
-            if n == 4: analysis['bombs'].append(self._get_cards_by_values(hand, [v]*4)); counts.pop(v)
+            if n >= MIN_BOMB_SIZE: analysis['bombs'].append(self._get_cards_by_values(hand, [v]*n)); counts.pop(v)
 
         # 3. 提取飞机、连对、顺子 (从长到短)
         for length in range(12, 2, -1): self._find_consecutive(hand, counts, length, 3, analysis, 'airplanes')
@@ -72,6 +277,9 @@ class BotPlayer:
     def _decide_lead(self):
         """更智能的主动出牌策略"""
         combos = {k: v for k, v in self.analyzed_hand.items() if v} # 获取所有非空组合
+        if not combos:
+            # 分解结果与手牌不同步时的保底：打出最小的一张
+            return [min(self.hand_backup, key=self._get_card_value)]
 
         # 如果只剩一手牌，直接打出
         if len(list(c for v in combos.values() for c in v)) == 1:
@@ -92,8 +300,8 @@ class BotPlayer:
                 # 评估出哪张牌最安全
                 return self._select_safest_play(combos[hand_type])
         
-        # 如果只剩炸弹或王炸了
-        return list(combos.values())[0][0]
+        # 如果只剩炸弹或王炸了：先出最小的一个
+        return min((c for k in ('bombs', 'rocket') for c in combos.get(k, [])), key=self._bomb_strength)
 
     def _decide_follow(self, last_played):
         """更智能的跟牌策略，包含完整的代价评估"""
@@ -108,10 +316,12 @@ class BotPlayer:
             seen = set()
             for play in valid_plays:
                 key = tuple(sorted(play))
-                if key not in seen:
+                # 去重的同时剔除按规则压不过上家的组合（如长度不同的顺子）
+                if key not in seen and compare_plays(self._get_play_info_cached(play), last_play_info)[0]:
                     seen.add(key)
                     dedup.append(play)
-            return self._select_best_follow(dedup, last_value)
+            if dedup:
+                return self._select_best_follow(dedup, last_value)
 
         # 2. 如果没有现成组合，进行模拟拆牌并评估代价
         potential_breaks = self._find_breaking_plays(last_type, last_value)
@@ -128,12 +338,17 @@ class BotPlayer:
         # 3. 决定是否使用炸弹/火箭
         if self._should_use_bomb(last_played):
             all_bombs = self.analyzed_hand.get('bombs', []) + self.analyzed_hand.get('rocket', [])
-            winning_bombs = [b for b in all_bombs if self._get_play_info_cached(b)[1] > last_value]
+            winning_bombs = [b for b in all_bombs if compare_plays(self._get_play_info_cached(b), last_play_info)[0]]
             if winning_bombs:
-                return min(winning_bombs, key=lambda b: self._get_play_info_cached(b)[1])
+                return min(winning_bombs, key=self._bomb_strength)
         
         return ["pass"]
 
+    def _bomb_strength(self, play):
+        """炸弹/火箭的大小顺序键：火箭最大，炸弹先比张数再比点数。"""
+        info = self._get_play_info_cached(play)
+        return (info.hand_type == HandType.ROCKET, info.length, info.value)
+
     def _find_plays_from_analysis(self, target_type, target_value):
         """从已分析组合中找可直接跟出的牌，尽量避免拆牌。"""
         candidates = []
@@ -193,33 +408,141 @@ class BotPlayer:
         """从多个可出牌组中，选择一个最安全的打出"""
         # 安全性评估：值越小，包含未见过的大牌越少，则越安全
         def assess_safety(play):
-            value = self._get_play_info_cached(play)[1]
-            unseen_big_cards = sum(1 for c in play if self._get_card_value(c) > 13 and self.unseen_cards.get(c, 0) > 0)
+            value = self._get_play_info_cached(play).value
+            unseen_big_cards = sum(1 for c in play if self._get_card_value(c) > 13 and self.unseen_ranks[CARD_RANK[c]] > 0)
             return value - unseen_big_cards * 2 # 惩罚出未见过的大牌
         
         return min(plays, key=assess_safety)
 
     def _select_best_follow(self, plays, last_value):
-        """从多个可跟牌组中，选择最优的一个"""
-        # 策略：选择刚刚好能大过的最小的牌，避免浪费
+        """
+        从多个可跟牌组中，选择最优的一个。
+        策略：选择刚刚好能大过的最小的牌，避免浪费。打分分三个阶段逐步细化：
+        只看点数与张数 -> 加上牌权评估和不拆连牌的剩余手数 -> 换成最优拆分的剩余手数。
+        """
+        # 末期鼓励主动争夺牌权；前中期倾向省牌
+        phase_bias = -1 if self.game_phase == 'endgame' else 1
+
+        def base_score(play):
+            return self._get_play_info_cached(play).value * phase_bias + len(play) * 0.1
+
+        def control_bonus(play):
+            return -3 if self._can_keep_initiative_after_play(play) else 0
+
+        def estimated_score(play):
+            return base_score(play) + control_bonus(play) + self._hands_after_play(play, exact=False) * FOLLOW_HANDS_WEIGHT
+
         def follow_score(play):
-            value = self._get_play_info_cached(play)[1]
-            # 末期鼓励主动争夺牌权；前中期倾向省牌
-            phase_bias = -1 if self.game_phase == 'endgame' else 1
-            control_bonus = -3 if self._can_keep_initiative_after_play(play) else 0
-            return value * phase_bias + len(play) * 0.1 + control_bonus
-        plays.sort(key=follow_score)
-        return plays[0]
+            return base_score(play) + control_bonus(play) + self._hands_after_play(play) * FOLLOW_HANDS_WEIGHT
+
+        return self._staged_best(plays, (base_score, estimated_score, follow_score))
+
+    def _staged_best(self, plays, scorers):
+        """
+        依次用越来越准（也越来越慢）的打分函数选最优（同分取靠前的）。
+        某个阶段没能在截止时间前给全部候选打完分时，沿用上一个阶段的结果；第一个阶段总会完成。
+        """
+        if self.deadline is None:
+            scorers = scorers[-1:]
+        best = None
+        for stage, scorer in enumerate(scorers):
+            scores = []
+            try:
+                for play in plays:
+                    if stage and self._out_of_time():
+                        self._complete = False
+                        return best
+                    scores.append(scorer(play))
+            except SearchTimeout:
+                self._complete = False
+                return best
+            best = plays[min(range(len(plays)), key=lambda i: (scores[i], i))]
+        return best
+
+    def _out_of_time(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def _hands_after_play(self, play, exact=True):
+        """
+        打出 play 之后，剩余手牌按最优拆分还需要几手才能出完。
+        exact 为 False 时只算不拆连牌的手数（上界）；精确求解超过截止时间时抛出 SearchTimeout。
+        """
+        remaining = self._counts_after_play(play)
+        if not exact:
+            return self.solver.estimate_hands(remaining)
+        return self.solver.min_hands(remaining, self.deadline)
+
+    def _hands_after_play_bounded(self, play):
+        """同 _hands_after_play，但到截止时间后退回估算值，不抛异常。"""
+        return self._min_hands_bounded(self._counts_after_play(play))
+
+    def _min_hands_bounded(self, counts):
+        # 本次决策内按点数签名记住结果：拆牌评估中同点数的多张牌只算一次
+        key = tuple(counts)
+        hands = self._bounded_hands.get(key)
+        if hands is None:
+            if not self._out_of_time():
+                try:
+                    hands = self.solver.min_hands(counts, self.deadline)
+                except SearchTimeout:
+                    pass
+            if hands is None:
+                hands = self.solver.estimate_hands(counts)
+                self._complete = False
+            self._bounded_hands[key] = hands
+        return hands
+
+    def _counts_after_play(self, play):
+        remaining = list(self.hand_counts)
+        for c in play:
+            remaining[CARD_RANK[c]] -= 1
+        return remaining
 
     def _can_keep_initiative_after_play(self, play):
         """评估打出后是否仍保留较强出牌连续性。"""
-        remaining = list(self.hand_backup)
-        for c in play:
-            if c in remaining:
-                remaining.remove(c)
-        next_analysis = self._analyze_hand(remaining)
-        strong_groups = len(next_analysis.get('straights', [])) + len(next_analysis.get('airplanes', []))
-        return strong_groups > 0
+        remaining = self._counts_after_play(play)
+        # 分解结构只取决于各点数张数，因此以点数签名为键，在所有AI之间共享
+        cache = BOT_CACHES['initiative']
+        key = tuple(remaining)
+        cached = cache.get(key)
+        if cached is None:
+            cached = self._count_strong_groups(remaining) > 0
+            cache.put(key, cached)
+        return cached
+
+    def _count_strong_groups(self, hand_rank_counts):
+        """只用点数张数重放 _analyze_hand 的前三步，统计能分出的飞机和顺子个数，不构造具体的牌。"""
+        counts = list(hand_rank_counts)
+        small, big = value_to_rank(CARD_VALUES['小王']), value_to_rank(CARD_VALUES['大王'])
+        rockets = min(counts[small], counts[big])
+        counts[small] -= rockets; counts[big] -= rockets
+        counts = [0 if n >= MIN_BOMB_SIZE else n for n in counts]
+        strong = self._count_runs(counts, 3, 3)
+        self._count_runs(counts, 2, 3)
+        strong += self._count_runs(counts, 1, 5)
+        return strong
+
+    def _count_runs(self, counts, num_of_kind, min_length):
+        """
+        _find_consecutive 按长度从长到短、同长取最高的提取顺序，等价于反复取出当前最长（同长取最高）的连续区间。
+        这里直接在点数张数上执行该过程，返回取出的组数。
+        """
+        chain_limit = value_to_rank(CARD_VALUES['2'])
+        found = 0
+        while True:
+            best_length, best_start, run_start = 0, None, None
+            for rank in range(chain_limit):
+                if counts[rank] >= num_of_kind:
+                    run_start = rank if run_start is None else run_start
+                    if rank - run_start + 1 >= best_length:
+                        best_length, best_start = rank - run_start + 1, run_start
+                else:
+                    run_start = None
+            if best_length < min_length:
+                return found
+            for rank in range(best_start, best_start + best_length):
+                counts[rank] -= num_of_kind
+            found += 1
 
     def _should_use_bomb(self, last_played):
         """更精细的炸弹使用决策"""
@@ -241,49 +564,17 @@ class BotPlayer:
         return False
 
     def _generate_response_plays(self, target_type, target_value, target_len):
-        """直接从手牌生成可跟牌，弥补分析组合覆盖不足。"""
-        counts = Counter(self._get_card_value(c) for c in self.hand_backup)
-        value_to_cards = {}
-        for c in self.hand_backup:
-            value_to_cards.setdefault(self._get_card_value(c), []).append(c)
-
-        candidates = []
-        if target_type == HandType.SINGLE:
-            for v in sorted(counts):
-                if v > target_value:
-                    candidates.append([value_to_cards[v][0]])
-        elif target_type == HandType.PAIR:
-            for v in sorted(counts):
-                if counts[v] >= 2 and v > target_value:
-                    candidates.append(value_to_cards[v][:2])
-        elif target_type == HandType.THREE_OF_A_KIND:
-            for v in sorted(counts):
-                if counts[v] >= 3 and v > target_value:
-                    candidates.append(value_to_cards[v][:3])
-        elif target_type == HandType.THREE_WITH_ONE:
-            triples = [v for v in sorted(counts) if counts[v] >= 3 and v > target_value]
-            singles = [v for v in sorted(counts) if counts[v] >= 1]
-            for tv in triples:
-                for sv in singles:
-                    if sv != tv:
-                        candidates.append(value_to_cards[tv][:3] + [value_to_cards[sv][0]])
-                        break
-        elif target_type == HandType.THREE_WITH_TWO:
-            triples = [v for v in sorted(counts) if counts[v] >= 3 and v > target_value]
-            pairs = [v for v in sorted(counts) if counts[v] >= 2]
-            for tv in triples:
-                for pv in pairs:
-                    if pv != tv:
-                        candidates.append(value_to_cards[tv][:3] + value_to_cards[pv][:2])
-                        break
-
-        # 二次校验，确保类型与长度严格匹配
-        verified = []
-        for play in candidates:
-            play_info = self._get_play_info_cached(play)
-            if play_info.hand_type == target_type and play_info.value > target_value and len(play) == target_len:
-                verified.append(play)
-        return verified
+        """直接从手牌枚举可跟牌（覆盖顺子、连对、飞机带翼、四带二等全部同型牌），弥补分析组合覆盖不足。"""
+        last_play = self._get_play_info_cached(self.game_state['last_played_cards'])
+        best_by_value = {}
+        for play, info in self.game.find_legal_plays(Hand(self.hand_backup), last_play):
+            # 炸弹/王炸交给 _should_use_bomb 决定；同一点数只保留副牌最小的一种
+            if info.hand_type != target_type or len(play) != target_len:
+                continue
+            cost = sum(self._get_card_value(c) for c in play)
+            if info.value not in best_by_value or cost < best_by_value[info.value][0]:
+                best_by_value[info.value] = (cost, play)
+        return [play for _, play in sorted(best_by_value.values(), key=lambda x: x[0])]
 
     def _get_play_info_cached(self, play):
         key = tuple(sorted(play))
@@ -299,13 +590,7 @@ class BotPlayer:
         for combo_type, combos in original_analysis.items():
             if combo_type in ['singles', 'bombs', 'rocket']: continue # 不拆这些
             for combo in combos:
-                remaining_hand = list(self.hand_backup)
-                for card in combo: remaining_hand.remove(card)
-                
-                # 在被拆的组合中寻找能打的牌
-                temp_counts = Counter(self._get_card_value(c) for c in combo)
-                # ... 此处需要复杂的逻辑来从temp_counts中提取符合target_type的牌 ...
-                # 这是一个非常复杂的部分，为简化，我们仅实现拆三条和对子
+                # 在被拆的组合中寻找能打的牌：目前只拆出单张去跟单张
                 if target_type == HandType.SINGLE and len(combo) > 1:
                     for card in combo:
                         play = [card]
@@ -318,40 +603,16 @@ class BotPlayer:
     
     def _calculate_break_cost(self, analysis, original_combo, broken_play):
         """计算拆牌的代价"""
-        # 代价 = 损失的组合强度 + 新产生的废牌数量
+        # 代价 = 损失的组合强度 + 拆牌后整手牌按最优拆分多出来的手数
         cost = len(original_combo) # 基础代价
-        remaining_cards = list(original_combo)
-        for card in broken_play: remaining_cards.remove(card)
-        
-        # 重新分析剩余牌，看产生了多少废牌
-        new_analysis = self._analyze_hand(remaining_cards)
-        cost += len(new_analysis.get('singles', [])) + len(new_analysis.get('pairs', [])) * 0.5
+        cost += self._hands_after_play_bounded(broken_play) + 1 - self._hands_after_play_bounded([])
         return cost
 
     # --- 初始化与数据管理 ---
 
-    def _initialize_unseen_cards(self):
-        num_decks = max(1, int(self.game_state.get('room_settings', {}).get('num_decks', 1) or 1))
-        include_jokers = bool(self.game_state.get('room_settings', {}).get('include_jokers', True))
-        full_deck = [f"{s}{r}" for s in ['♠','♥','♣','♦'] for r in ['3','4','5','6','7','8','9','10','J','Q','K','A','2']] * num_decks
-        if include_jokers:
-            full_deck.extend(['小王', '大王'] * num_decks)
-        unseen = Counter(full_deck)
-        self._consume_unseen_cards(self.hand_backup, unseen)
-        # 假设游戏状态中包含所有历史出牌
-        for p in self.game_state['players']:
-            # 此处需要app.py将所有历史出牌信息传过来，暂时简化
-            pass
-        return unseen
-
-    def _consume_unseen_cards(self, cards, unseen_counter=None):
-        target = unseen_counter if unseen_counter is not None else self.unseen_cards
-        for card in cards:
-            if target.get(card, 0) > 0:
-                target[card] -= 1
-        
     def _determine_game_phase(self):
-        total_cards = len(self.player_states) * (54 // len(self.player_states))
+        # 按本局实际发出的总张数（多副牌、不带王时都不是 54）
+        total_cards = max(1, sum(self.game.total_rank_counts))
         cards_left = sum(p['card_count'] for p in self.player_states.values())
         if cards_left / total_cards < 0.3: return 'endgame'
         if cards_left / total_cards < 0.7: return 'midgame'
@@ -360,16 +621,13 @@ class BotPlayer:
     # --- 组合查找辅助函数 ---
     
     def _get_card_value(self, card):
-        return CARD_VALUES.get(card, CARD_VALUES.get(card[1:]))
+        return CARD_VALUE[card]
 
     def _get_cards_by_values(self, hand, values):
-        """从一个手牌列表(hand)中，根据值(values)精确提取牌"""
-        cards, temp_hand = [], list(hand)
-        for v in values:
-            for c in temp_hand:
-                if self._get_card_value(c) == v:
-                    cards.append(c); temp_hand.remove(c); break
-        for card in cards: hand.remove(card)
+        """从手牌(Hand)中，根据值(values)精确提取牌"""
+        cards = []
+        for v, n in Counter(values).items():
+            cards.extend(hand.take_rank(value_to_rank(v), n))
         return cards
 
     def _find_consecutive(self, hand, counts, length, num_of_kind, analysis, analysis_key):
@@ -387,24 +645,81 @@ class BotPlayer:
 
     def _attach_wings_to_airplanes(self, analysis):
         """为分析好的飞机寻找最优的翼"""
+        # 翼不能带 2 和王，否则整手牌不合法
+        wingable = lambda combo: self._get_card_value(combo[0]) < CARD_VALUES['2']
         singles = sorted(analysis.get('singles', []), key=lambda c: self._get_card_value(c[0]))
         pairs = sorted(analysis.get('pairs', []), key=lambda p: self._get_card_value(p[0]))
+        wing_singles = [s for s in singles if wingable(s)]
+        wing_pairs = [p for p in pairs if wingable(p)]
         
         winged_airplanes = []
         for plane in analysis.get('airplanes', []):
             num_trips = len(plane) // 3
             # 优先带对子
-            if len(pairs) >= num_trips:
-                wings = pairs[:num_trips]
-                winged_airplanes.append(plane + [card for p in wings for card in p])
-                pairs = pairs[num_trips:]
+            if len(wing_pairs) >= num_trips:
+                wings, wing_pairs = wing_pairs[:num_trips], wing_pairs[num_trips:]
+                pairs = [p for p in pairs if p not in wings]
             # 其次带单张
-            elif len(singles) >= num_trips:
-                wings = singles[:num_trips]
-                winged_airplanes.append(plane + [card for s in wings for card in s])
-                singles = singles[num_trips:]
+            elif len(wing_singles) >= num_trips:
+                wings, wing_singles = wing_singles[:num_trips], wing_singles[num_trips:]
+                singles = [s for s in singles if s not in wings]
+            else:
+                wings = []
+            winged_airplanes.append(plane + [card for w in wings for card in w])
         
         if winged_airplanes:
             analysis['airplanes'] = winged_airplanes
             analysis['singles'] = singles
             analysis['pairs'] = pairs
+
+
+# --- 机器人回合的决策与执行（服务端与无界面模拟器共用） ---
+
+PASS_MOVE = ["pass"]
+
+# 可用的机器人版本；其他模块中的实现在导入时自行注册（如 mcts_bot 注册 'mcts'）
+BOT_TYPES = {'heuristic': BotPlayer}
+
+
+def decide_bot_move(game, bot_sid, bot_class=BotPlayer, bots=None, deadline=None):
+    """
+    以机器人视角让AI决策，返回牌 ID 列表或 PASS_MOVE。
+    传入 bots（sid -> AI 实例）时复用该座位上已有的AI，使其分析结果和缓存跨回合保留；
+    deadline（time.perf_counter() 时刻）给定时AI到点返回目前找到的最好出牌。
+    """
+    # 为AI创建一个手牌的副本，防止AI分析时意外修改原始数据
+    bot_hand = list(game.players[bot_sid]['hand'])
+    # 获取机器人视角的游戏状态（保留内部牌 ID，不做字符串转换）
+    game_state = game.get_game_state(bot_sid, encode_cards=False)
+    bot = bots.get(bot_sid) if bots is not None else None
+    if bot is None:
+        bot = bot_class(bot_hand, game_state, game)
+        if bots is not None:
+            bots[bot_sid] = bot
+    else:
+        # 复用的AI可能是在另一份局面副本上建的，改为读取这次传入的 game
+        bot.game = game
+        bot.observe(bot_hand, game_state)
+    return bot.decide_move(deadline)
+
+
+def apply_bot_move(game, bot_sid, move):
+    """
+    在 game 上执行机器人的决策，返回 (状态, 实际打出的牌, 错误信息)。
+    状态为 'PASS' / 'OK' / 'WIN' / 'FALLBACK'；FALLBACK 表示AI决策不合法，已改为保底动作。
+    """
+    if move == PASS_MOVE:
+        success, msg = game.pass_turn(bot_sid)
+        if success:
+            return 'PASS', [], None
+    else:
+        status, msg = game.play_turn(bot_sid, move)
+        if status is not None:
+            return status, move, None
+
+    # AI出错了（作为保险措施）：能 pass 就 pass，新一轮必须出牌时打出最小的一张
+    if game.pass_turn(bot_sid)[0]:
+        return 'FALLBACK', [], msg
+    lowest = [next(iter(game.players[bot_sid]['hand']))]
+    status, _ = game.play_turn(bot_sid, lowest)
+    return ('WIN' if status == 'WIN' else 'FALLBACK'), lowest, msg
@@ -1,51 +1,147 @@
 # app.py
-from flask import Flask, render_template, request
+from flask import Flask, Response, abort, render_template, request
 from flask_socketio import SocketIO, emit, join_room
+from werkzeug.middleware.proxy_fix import ProxyFix
 import uuid
-import random
+import os
 import socket
+import threading
+import time
 
 # 引入游戏逻辑和我们最新版的AI逻辑
-from game_logic import Game
-from ai_logic import BotPlayer
+from room_manager import SEAT_TOKEN_TTL, RoomManager, normalize_room_id
+import broker
+from ai_logic import BOT_CACHES, BOT_TYPES, PASS_MOVE, BotPlayer, apply_bot_move, decide_bot_move
+import mcts_bot  # 导入即注册 'mcts' 机器人
+from bot_scheduler import DEFAULT_DECISION_BUDGET, BotTurnScheduler, parse_think_time
+from cards import card_names, parse_cards
+from game_logic import DEFAULT_RULE_PRESET, RULE_PRESETS, export_rules_table
+import metrics
+from metrics import instrument_handler
+from replay import Replay, append_archive
+import snapshot
+import wire
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'a_very_secret_key_for_lan_party!'
-socketio = SocketIO(app)
+# 编码事件包时顺带统计发出的字节数（见 metrics.MeasuredJSON）。
+# 异步模式由 server.py 通过 NETPDK_ASYNC_MODE 指定（eventlet/gevent）；直接运行本文件时使用 threading 开发服务器
+# 多 worker 部署时（见 cluster.py）经消息队列同步跨进程事件：netpdk:// 为本地中转，其余地址交给 Flask-SocketIO
+_message_queue = os.environ.get('NETPDK_MESSAGE_QUEUE')
+_queue_options = {}
+if _message_queue and _message_queue.startswith(f'{broker.SCHEME}://'):
+    _queue_options['client_manager'] = broker.BrokerManager(_message_queue)
+elif _message_queue:
+    _queue_options['message_queue'] = _message_queue
+# always_connect：先回 CONNECT 确认包再执行 connect 处理器，处理器里发给新连接的快照/广播排在确认之后
+# （否则客户端在握手完成前就收到事件包；连接处理器从不拒绝连接，不受影响）
+socketio = SocketIO(app, json=metrics.MeasuredJSON, async_mode=os.environ.get('NETPDK_ASYNC_MODE') or 'threading',
+                    always_connect=True, **_queue_options)
+if os.environ.get('NETPDK_BEHIND_PROXY') == '1':
+    # 路由进程转发时带上 X-Forwarded-For，remote_addr 才是真实客户端（/metrics 的本机限制依赖它）
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
 
 # --- 全局状态变量 ---
-game = Game()
-host_sid = None
-bot_count = 0
+# 掉线玩家凭座位令牌收回座位的期限（秒），过期后房间照常回收
+rooms = RoomManager(seat_token_ttl=float(os.environ.get('NETPDK_SEAT_TOKEN_TTL', SEAT_TOKEN_TTL)))
+ROOM_GC_INTERVAL = 30
+# 定期写状态快照的间隔（秒），只在 server.py 指定快照文件时启用
+SNAPSHOT_INTERVAL = float(os.environ.get('NETPDK_SNAPSHOT_INTERVAL', 10))
+HINT_LIMIT = 50
+# 机器人版本：heuristic（默认）或 mcts（限时蒙特卡洛）
+BOT_CLASS = BOT_TYPES.get(os.environ.get('NETPDK_BOT_MODE', 'heuristic'), BotPlayer)
+_last_room_gc = 0.0
+# 回放归档文件，只在 server.py 指定时启用（见 start_replay_archive）
+_replay_archive = None
 
 
-def _assign_host_if_needed(preferred_sid=None):
-    """确保房主始终是一个在线的人类玩家。"""
-    global host_sid
+def _current_room():
+    """返回当前连接所在的房间。"""
+    return rooms.room_of(request.sid)
 
-    # 仅在当前没有有效房主时，才使用本次事件关联的人类玩家作为候选
-    if host_sid is None and preferred_sid and preferred_sid in game.players and not game.players[preferred_sid].get('is_bot', False):
-        host_sid = preferred_sid
-        return
 
-    # 如果当前房主仍是在线人类，则保持不变
-    if host_sid in game.players and not game.players[host_sid].get('is_bot', False):
+def _maybe_collect_rooms():
+    """在连接事件中顺带回收空闲房间，最多每 ROOM_GC_INTERVAL 秒一次。"""
+    global _last_room_gc
+    now = time.monotonic()
+    if now - _last_room_gc < ROOM_GC_INTERVAL:
         return
+    _last_room_gc = now
+    for room in rooms.collect_garbage(now):
+        bot_scheduler.forget(room)
+        print(f'房间已回收: {room.room_id}')
 
-    # 否则按入场顺序寻找第一个人类玩家作为房主
-    for sid in game.player_order:
-        player = game.players.get(sid)
-        if player and not player.get('is_bot', False):
-            host_sid = sid
-            return
 
-    # 没有人类玩家时，房主置空
-    host_sid = None
+def _assign_host_if_needed(room, preferred_sid=None):
+    """确保房主始终是一个在线的人类玩家。"""
+    room.assign_host_if_needed(preferred_sid)
+
+
+# 客户端出牌预检用的规则表，随页面下发一次
+RULES_TABLE = export_rules_table()
+
 
 @app.route('/')
 def index():
     """提供主游戏页面"""
-    return render_template('index.html', lan_ip=_get_lan_ip())
+    return render_template('index.html', lan_ip=_get_lan_ip(), rules_table=RULES_TABLE)
+
+
+# 抓取指标时不拿房间锁（不与出牌抢锁）：len() 与 list() 复制都是原子操作，只遍历复制出来的列表，
+# 其他线程同时加入/离开房间也不会让遍历出错，读到的只是略早一点的数字
+def _player_count(kind):
+    return sum(1 for room in rooms.rooms() for p in list(room.game.players.values()) if p['is_bot'] == (kind == 'bot'))
+
+
+metrics.ACTIVE_ROOMS.set_function(lambda: len(rooms))
+metrics.ACTIVE_CONNECTIONS.set_function(lambda: sum(len(room.connections) for room in rooms.rooms()))
+metrics.ACTIVE_GAMES.set_function(lambda: sum(1 for room in rooms.rooms() if room.game.game_started))
+for _kind in ('human', 'bot'):
+    metrics.ACTIVE_PLAYERS.labels(_kind).set_function(lambda kind=_kind: _player_count(kind))
+for _name, _cache in BOT_CACHES.items():
+    metrics.BOT_CACHE_LOOKUPS.labels(_name, 'hit').set_function(lambda cache=_cache: cache.hits)
+    metrics.BOT_CACHE_LOOKUPS.labels(_name, 'miss').set_function(lambda cache=_cache: cache.misses)
+    metrics.BOT_CACHE_ENTRIES.labels(_name).set_function(lambda cache=_cache: len(cache))
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的指标；默认只允许本机抓取，设置 NETPDK_METRICS_PUBLIC=1 后对局域网开放。"""
+    if request.remote_addr not in ('127.0.0.1', '::1') and os.environ.get('NETPDK_METRICS_PUBLIC') != '1':
+        abort(403)
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def _replay_room():
+    room = rooms.get(normalize_room_id(request.args.get('room')))
+    if room is None:
+        abort(404)
+    return room
+
+
+@app.route('/replay')
+def replay_page():
+    """回放页面：?room=<房间号>&game=<局号>，各步状态由 /replays 接口提供。"""
+    return render_template('replay.html')
+
+
+@app.route('/replays')
+def replay_list():
+    """房间内最近结束的几局（?room=）。"""
+    room = _replay_room()
+    return {'room_id': room.room_id, 'games': [dict(record.summary(), game=n) for n, record in room.recent_replays()]}
+
+
+@app.route('/replays/<int:number>')
+def replay_view(number):
+    """第 number 局在 ?move= 步时的状态（默认终局），从最近的关键帧恢复，不从头重放。"""
+    record = _replay_room().find_replay(number)
+    if record is None:
+        abort(404)
+    move = request.args.get('move', default=len(record.moves), type=int)
+    if not 0 <= move <= len(record.moves):
+        abort(400)
+    return record.view(move)
 
 
 def _get_lan_ip():
@@ -57,172 +153,459 @@ def _get_lan_ip():
     except OSError:
         return None
 
-def broadcast_game_state(message=""):
+def _public_channel(room_id, binary):
+    """房间内按事件编码分组的 Socket.IO 频道；房间号经过规整不含 '#'，不会与其他房间冲突。"""
+    return f'{room_id}#{wire.WIRE_BINARY if binary else wire.WIRE_JSON}'
+
+def _emit(event, payload, to, binary, recipients=1):
+    if binary:
+        # 二进制附件不经过 MeasuredJSON，按 "<事件名>.bin" 单独统计字节数（每个收到的连接记一次）
+        size_histogram = metrics.EMITTED_BYTES.labels(f'{event}.bin')
+        for _ in range(recipients):
+            size_histogram.observe(len(payload))
+    socketio.emit(event, payload, to=to)
+
+def _public_state(room, message, binary):
+    if binary:
+        return wire.encode_public_state(room.game, room.host_sid, room.room_id, message)
+    state = room.game.get_public_state()
+    state['host_sid'] = room.host_sid
+    state['room_id'] = room.room_id
+    state['message'] = message
+    return metrics.PreEncoded(state)
+
+def _public_delta(room, delta, message, binary):
+    if binary:
+        return wire.encode_delta(room.game, message)
+    return metrics.PreEncoded({**delta, 'message': message})
+
+def _emit_public(room, event, build, to=None):
     """
-    广播最新的游戏状态给所有人类玩家。
-    这是游戏循环的核心：在广播后，它会检查是否轮到机器人出牌。
+    发出所有人相同的公开事件，build(binary) 构造载荷。
+    to 为空时发到房间的 JSON/二进制两个频道（包括旁观者），每种编码只构造、序列化一次。
     """
-    # 仅向人类玩家发送更新
-    for sid, player_data in game.players.items():
-        if not player_data.get('is_bot', False):
-            state = game.get_game_state(sid)
-            state['host_sid'] = host_sid
-            state['message'] = message
-            emit('game_update', state, room=sid)
-    
-    # 检查当前回合是否属于机器人
+    if to is not None:
+        binary = to in room.binary_connections
+        _emit(event, build(binary), to, binary)
+        return
+    binary_count = len(room.binary_connections)
+    for binary, count in ((False, len(room.connections) - binary_count), (True, binary_count)):
+        if count:
+            _emit(event, build(binary), _public_channel(room.room_id, binary), binary, count)
+
+def _send_private(room, sid):
+    """只发给 sid 本人的手牌；先于同版本的公开状态发出，客户端收到公开状态时即可合并。"""
+    binary = sid in room.binary_connections
+    payload = wire.encode_private_state(room.game, sid) if binary else metrics.PreEncoded(room.game.get_private_state(sid))
+    _emit('private_state', payload, sid, binary)
+
+def _send_snapshot(room, sid, message=""):
+    """向单个连接（玩家或旁观者）发送完整的游戏状态：私有状态 + 公开状态，按连接协商的格式编码。"""
+    _send_private(room, sid)
+    _emit_public(room, 'game_update', lambda binary: _public_state(room, message, binary), to=sid)
+
+def broadcast_game_state(room, message=""):
+    """
+    广播最新的游戏状态给房间内的所有连接（入座的人类玩家和旁观者）。
+    公开部分（增量，或无法用增量描述时的完整公开状态）每种编码只序列化一次、发到房间频道；
+    发完整状态时，另给每个在线的人类玩家单独发他自己的手牌。
+    新连接在连接时先收到一份快照，漏收增量的客户端会请求重发（request_resync）。
+    这是游戏循环的核心：在广播后，如果轮到机器人出牌，就把它交给机器人调度器。
+    返回是否发送了完整状态。
+    """
+    game = room.game
+    delta = game.get_state_delta()
+    if delta is not None:
+        _emit_public(room, 'game_delta', lambda binary: _public_delta(room, delta, message, binary))
+    else:
+        for sid, player_data in game.players.items():
+            if not player_data.get('is_bot', False) and sid in room.connections:
+                _send_private(room, sid)
+        _emit_public(room, 'game_update', lambda binary: _public_state(room, message, binary))
+
+    # 检查当前回合是否属于机器人，是则排队一个后台机器人任务
+    bot_scheduler.schedule(room)
+    return delta is None
+
+def _current_bot_sid(room):
+    """如果房间当前轮到机器人（或由AI托管的掉线玩家）出牌，返回其sid，否则返回None。"""
+    game = room.game
     current_sid = game.current_turn_sid
-    if game.game_started and current_sid and game.players.get(current_sid, {}).get('is_bot', False):
-        # 仅在即将触发机器人回合时短暂等待，减少不必要的阻塞
-        socketio.sleep(0.25)
-        handle_bot_turn(current_sid)
-
-def handle_bot_turn(bot_sid):
-    """处理并执行一个机器人回合的所有逻辑"""
-    # 模拟机器人的“思考”时间，增加随机性使其更逼真
-    socketio.sleep(random.uniform(0.8, 1.5))
-    
-    # 为AI创建一个手牌的副本，防止AI分析时意外修改原始数据
-    bot_hand = list(game.players[bot_sid]['hand'])
-    # 获取机器人视角的游戏状态
-    game_state = game.get_game_state(bot_sid)
-    
-    # 创建AI实例并让它做出决策
-    ai = BotPlayer(bot_hand, game_state, game)
-    move = ai.decide_move()
-    
+    if game.game_started and current_sid and game.is_ai_controlled(current_sid):
+        return current_sid
+    return None
+
+def _release_offline_seats(room):
+    """一局结束后，仍未重连的掉线玩家让出座位。"""
+    game = room.game
+    offline = [sid for sid, p in game.players.items() if p['offline']]
+    for sid in offline:
+        game.remove_player(sid)
+        room.forget_seat(sid)
+    if offline:
+        _assign_host_if_needed(room)
+        broadcast_game_state(room)
+
+def capture_bot_view(room, bot_sid):
+    """
+    复制房间当前的对局，并把该座位的AI实例从房间取出交给本次任务独占，供机器人在锁外决策
+    （由机器人调度器在房间锁内调用）。返回 (局面副本, 只含该座位的 sid -> AI 实例)。
+    """
+    bots = {bot_sid: room.bots.pop(bot_sid)} if bot_sid in room.bots else {}
+    return room.game.copy(), bots
+
+def decide_bot_turn(room, view, bot_sid, deadline):
+    """让机器人就局面副本在 deadline 之前做出决策（由机器人调度器在房间锁外调用）"""
+    game, bots = view
+    with metrics.BOT_THINK_SECONDS.labels(BOT_CLASS.__name__).time():
+        return decide_bot_move(game, bot_sid, BOT_CLASS, bots=bots, deadline=deadline)
+
+def restore_bot_view(room, view):
+    """决策被采用时把AI实例放回房间，供下一回合复用（由机器人调度器在房间锁内调用）"""
+    room.bots.update(view[1])
+
+def handle_bot_turn(room, bot_sid, move):
+    """执行机器人已决定的出牌并广播（由机器人调度器在房间锁内调用）"""
+    room.touch()
+    game = room.game
+    status, played, error = apply_bot_move(game, bot_sid, move)
+
     bot_name = game.players[bot_sid]['name']
-    
-    if move == ["pass"]:
-        success, msg = game.pass_turn(bot_sid)
-        if success:
-            broadcast_game_state(f"{bot_name} 选择 pass")
+    played_text = ' '.join(card_names(played))
+
+    if status == 'PASS':
+        broadcast_game_state(room, f"{bot_name} 选择 pass")
+    elif status == 'WIN':
+        # 机器人获胜
+        replay_number = _record_replay(room)
+        broadcast_game_state(room, f"{bot_name} 打出了 {played_text}")
+        socketio.emit('game_over', {'winner_name': bot_name, 'replay': replay_number}, to=room.room_id)
+        _release_offline_seats(room)
+    elif status == 'OK':
+        # 正常出牌，继续广播状态，调度器会接着处理下一位机器人
+        broadcast_game_state(room, f"{bot_name} 打出了 {played_text}")
     else:
-        status, msg = game.play_turn(bot_sid, move)
-        if status == 'WIN':
-            # 机器人获胜
-            broadcast_game_state(f"{bot_name} 打出了 {' '.join(move)}")
-            socketio.emit('game_over', {'winner_name': bot_name})
-        elif status == 'OK':
-            # 正常出牌，继续广播状态，触发下一轮
-            broadcast_game_state(f"{bot_name} 打出了 {' '.join(move)}")
+        # AI出错了，已由保底动作代替
+        move_text = '' if move == PASS_MOVE else ' '.join(card_names(move))
+        print(f"机器人 {bot_name} 出牌错误: {error}. AI决策: {move_text}")
+        if played:
+            broadcast_game_state(room, f"{bot_name} 思考后打出了 {played_text}")
         else:
-            # AI出错了（作为保险措施），让它pass
-            print(f"机器人 {bot_name} 出牌错误: {msg}. AI决策: {move}")
-            game.pass_turn(bot_sid)
-            broadcast_game_state(f"{bot_name} 思考后选择 pass")
+            broadcast_game_state(room, f"{bot_name} 思考后选择 pass")
+
+
+def _bot_sleep(seconds):
+    """机器人出牌前的人为等待（思考时间扣除实际计算耗时后的剩余部分），单独计入指标。"""
+    with metrics.BOT_SLEEP_SECONDS.time():
+        socketio.sleep(seconds)
+
+
+# 协作式 worker 下蒙特卡洛AI的长时间搜索需要定期让出，避免阻塞同进程的其他房间
+mcts_bot.MonteCarloBot.pause = socketio.sleep
+
+
+# 机器人思考时间可通过环境变量配置：'0' 为零延迟，'0.8,1.5' 为随机区间（秒）；
+# 思考时间短于 NETPDK_BOT_DECISION_BUDGET（秒）时，AI仍有这么多计算时间
+bot_scheduler = BotTurnScheduler(
+    start_task=socketio.start_background_task,
+    sleep=_bot_sleep,
+    current_bot=_current_bot_sid,
+    capture=capture_bot_view,
+    decide=decide_bot_turn,
+    restore=restore_bot_view,
+    run_turn=handle_bot_turn,
+    think_time=parse_think_time(os.environ.get('NETPDK_BOT_THINK_TIME')),
+    decision_budget=float(os.environ.get('NETPDK_BOT_DECISION_BUDGET', DEFAULT_DECISION_BUDGET)),
+)
+
+
+# --- 状态快照（崩溃恢复） ---
+
+def save_snapshot(path):
+    """把全部房间写入快照文件。每个房间只在编码时短暂持有其锁，文件写入在锁外进行。"""
+    with metrics.SNAPSHOT_SECONDS.time():
+        blobs = []
+        for room in rooms.rooms():
+            with room.lock:
+                blobs.append(snapshot.encode_room(room))
+        size = snapshot.write_snapshot(path, blobs)
+    metrics.SNAPSHOT_BYTES.set(size)
+    return len(blobs)
+
+
+def restore_snapshot(path):
+    """
+    启动时从快照恢复房间；进行中牌局的人类玩家全部视为掉线，凭座位令牌重连后收回座位。
+    未开局的房间与平时一样让掉线者离座，只保留房主的座位等其回来。返回恢复的房间数。
+    """
+    restored = snapshot.read_snapshot(path)
+    for room in restored:
+        game = room.game
+        for sid in [sid for sid, player in game.players.items() if not player['is_bot']]:
+            if game.game_started or sid == room.host_sid:
+                game.set_offline(sid, True)
+            else:
+                game.remove_player(sid)
+                room.forget_seat(sid)
+    rooms.restore(restored)
+    return len(restored)
+
+
+# 置位后后台快照任务退出（否则它会让进程在服务器停止后仍无法结束）
+_snapshot_stop = threading.Event()
+
+
+def _snapshot_loop(path, interval):
+    while not _snapshot_stop.wait(interval):
+        try:
+            save_snapshot(path)
+        except OSError as exc:
+            print(f'写入状态快照失败: {exc}')
+
+
+def start_snapshots(path, interval=SNAPSHOT_INTERVAL):
+    """恢复上次的快照，并在后台定期写入新快照（不占用事件处理路径）。"""
+    count = restore_snapshot(path)
+    socketio.start_background_task(_snapshot_loop, path, interval)
+    return count
+
+
+def stop_snapshots():
+    """停止后台定期写快照；退出前的最后一次快照由调用方写。"""
+    _snapshot_stop.set()
+
+
+# --- 对局回放 ---
+
+def _record_replay(room):
+    """一局刚结束时把事件日志存为回放，返回局号；指定了归档文件时在后台追加写入。调用方需持有 room.lock。"""
+    record = Replay.from_game(room.game)
+    number = room.add_replay(record)
+    if _replay_archive:
+        socketio.start_background_task(_archive_replay, _replay_archive, record)
+    return number
+
+
+def _archive_replay(path, record):
+    # 关键帧在这里（锁外）生成并编码
+    try:
+        append_archive(path, [record])
+    except OSError as exc:
+        print(f'写入回放归档失败: {exc}')
+
+
+def start_replay_archive(path):
+    """此后每局结束都追加写入回放归档文件。"""
+    global _replay_archive
+    _replay_archive = path
 
 
 # --- SocketIO 事件处理器 ---
 
 @socketio.on('connect')
-def handle_connect():
+@instrument_handler('connect')
+def handle_connect(auth=None):
     sid = request.sid
-    print(f'客户端已连接: {sid}')
-    # 新用户连接时，如果游戏未开始，也广播一下大厅状态
-    if not game.game_started:
-        broadcast_game_state()
+    room = rooms.bind(sid, request.args.get('room'))
+    _maybe_collect_rooms()
+    print(f'客户端已连接: {sid} -> 房间 {room.room_id}')
+    auth = auth if isinstance(auth, dict) else {}
+    token = auth.get('seat_token')
+    # 客户端在连接时选择事件编码，未声明的一律用 JSON；公开事件按编码发到对应的房间频道
+    binary = auth.get('wire') == wire.WIRE_BINARY
+    if binary:
+        room.binary_connections.add(sid)
+    join_room(room.room_id)
+    join_room(_public_channel(room.room_id, binary))
+    with room.lock:
+        name = room.reclaim_seat(token, sid) if token else None
+        sent_full = False
+        if name is not None:
+            # 收回座位：作废可能正在为其托管出牌的AI回合，广播后按新局面重新调度
+            bot_scheduler.cancel(room)
+            sent_full = broadcast_game_state(room, f"{name} 回到了牌桌")
+        if not sent_full:
+            # 新连接（包括对局中进来的旁观者）先拿一份完整状态，之后跟随房间的公开增量
+            _send_snapshot(room, sid)
 
 @socketio.on('disconnect')
+@instrument_handler('disconnect')
 def handle_disconnect():
     sid = request.sid
-    player_name = game.players.get(sid, {}).get('name', '一名玩家')
+    room = rooms.unbind(sid)
     print(f'客户端已断开: {sid}')
-    game.remove_player(sid)
-    _assign_host_if_needed()
-    broadcast_game_state(f"{player_name} 已离开")
+    _maybe_collect_rooms()
+    if room is None:
+        return
+    with room.lock:
+        game = room.game
+        player_name = game.players.get(sid, {}).get('name', '一名玩家')
+        if game.game_started and sid in game.players:
+            # 对局中掉线：保留座位与手牌，由AI托管，凭座位令牌重连后收回
+            game.set_offline(sid, True)
+            broadcast_game_state(room, f"{player_name} 掉线了，暂由AI托管")
+            return
+        if sid in game.players:
+            # 有玩家离开时作废排队中的机器人回合，广播后会按新的局面重新调度
+            bot_scheduler.cancel(room)
+        game.remove_player(sid)
+        room.forget_seat(sid)
+        _assign_host_if_needed(room)
+        broadcast_game_state(room, f"{player_name} 已离开")
+
+@socketio.on('request_resync')
+@instrument_handler('request_resync')
+def handle_request_resync():
+    """客户端（玩家或旁观者）发现版本号不连续时，请求一份完整快照"""
+    sid = request.sid
+    room = _current_room()
+    if room is None:
+        return
+    with room.lock:
+        _send_snapshot(room, sid)
+
+@socketio.on('request_hint')
+@instrument_handler('request_hint')
+def handle_request_hint():
+    """为当前出牌的人类玩家列出所有合法出牌（按点数签名去重，最多 HINT_LIMIT 个）"""
+    sid = request.sid
+    room = _current_room()
+    if room is None:
+        return
+    with room.lock:
+        plays = room.game.get_legal_moves(sid)
+    emit('hint', {'plays': [card_names(cards) for cards, _ in plays[:HINT_LIMIT]]}, room=sid)
 
 @socketio.on('join_game')
+@instrument_handler('join_game')
 def handle_join_game(data):
     """处理人类玩家加入游戏的请求"""
-    global host_sid
     name = data.get('name', '匿名玩家')
     sid = request.sid
-    
-    if game.add_player(sid, name, is_bot=False):
-        _assign_host_if_needed(preferred_sid=sid)
-        join_room(sid)
-        broadcast_game_state(f"{name} 加入了游戏！")
-    else:
-        emit('error', {'message': '无法加入游戏，可能游戏已开始或您已在游戏中。'}, room=sid)
+    room = _current_room()
+    if room is None:
+        return
+
+    with room.lock:
+        room.touch()
+        if room.game.add_player(sid, name, is_bot=False):
+            _assign_host_if_needed(room, preferred_sid=sid)
+            join_room(sid)
+            emit('seat_token', {'token': room.issue_seat_token(sid)}, room=sid)
+            broadcast_game_state(room, f"{name} 加入了游戏！")
+        else:
+            emit('error', {'message': '无法加入游戏，可能游戏已开始或您已在游戏中。'}, room=sid)
 
 @socketio.on('add_bot')
+@instrument_handler('add_bot')
 def handle_add_bot():
     """处理添加机器人的请求"""
-    global bot_count
-    if not game.game_started:
-        bot_count += 1
-        # 为机器人生成一个唯一的ID和名字
-        bot_sid = f"bot_{uuid.uuid4().hex[:8]}"
-        bot_name = f"专家AI🤖️ {bot_count}号"
-        game.add_player(bot_sid, bot_name, is_bot=True)
-        _assign_host_if_needed()
-        broadcast_game_state(f"{bot_name} 加入了对局！")
+    room = _current_room()
+    if room is None:
+        return
+    with room.lock:
+        room.touch()
+        if not room.game.game_started:
+            room.bot_count += 1
+            # 为机器人生成一个唯一的ID和名字
+            bot_sid = f"bot_{uuid.uuid4().hex[:8]}"
+            bot_name = f"专家AI🤖️ {room.bot_count}号"
+            room.game.add_player(bot_sid, bot_name, is_bot=True)
+            _assign_host_if_needed(room)
+            broadcast_game_state(room, f"{bot_name} 加入了对局！")
 
 
 
 @socketio.on('update_room_settings')
+@instrument_handler('update_room_settings')
 def handle_update_room_settings(data):
-    _assign_host_if_needed(preferred_sid=request.sid)
-    if request.sid != host_sid:
-        emit('error', {'message': '只有房主才能修改房间设置。'}, room=request.sid)
+    room = _current_room()
+    if room is None:
         return
-    if game.game_started:
-        emit('error', {'message': '游戏进行中，不能修改房间设置。'}, room=request.sid)
-        return
-
-    num_decks = int((data or {}).get('num_decks', 1) or 1)
-    num_decks = max(1, min(6, num_decks))
-    preset = (data or {}).get('preset', 'full')
+    with room.lock:
+        room.touch()
+        _assign_host_if_needed(room, preferred_sid=request.sid)
+        if request.sid != room.host_sid:
+            emit('error', {'message': '只有房主才能修改房间设置。'}, room=request.sid)
+            return
+        if room.game.game_started:
+            emit('error', {'message': '游戏进行中，不能修改房间设置。'}, room=request.sid)
+            return
 
-    preset_map = {
-        'classic': {'include_jokers': False, 'allow_rocket': False, 'allow_airplane_wings': True, 'allow_four_with_two': False},
-        'full': {'include_jokers': True, 'allow_rocket': True, 'allow_airplane_wings': True, 'allow_four_with_two': True},
-        'strict': {'include_jokers': False, 'allow_rocket': False, 'allow_airplane_wings': False, 'allow_four_with_two': True},
-    }
-    game.update_room_settings({'num_decks': num_decks, **preset_map.get(preset, preset_map['full'])})
-    broadcast_game_state(f"房间规则已更新：{num_decks}副牌，模式 {preset}")
+        num_decks = int((data or {}).get('num_decks', 1) or 1)
+        num_decks = max(1, min(6, num_decks))
+        preset = (data or {}).get('preset', DEFAULT_RULE_PRESET)
+        if preset not in RULE_PRESETS:
+            preset = DEFAULT_RULE_PRESET
+        room.game.update_room_settings({'num_decks': num_decks, **RULE_PRESETS[preset]})
+        broadcast_game_state(room, f"房间规则已更新：{num_decks}副牌，模式 {preset}")
 
 @socketio.on('start_game')
+@instrument_handler('start_game')
 def handle_start_game():
     """处理房主开始游戏的请求"""
-    _assign_host_if_needed(preferred_sid=request.sid)
-    if request.sid != host_sid:
-        emit('error', {'message': '只有房主才能开始游戏。'}, room=request.sid)
+    room = _current_room()
+    if room is None:
         return
-        
-    if game.start_game(num_decks=game.room_settings.get('num_decks', 1)):
-        # 游戏开始后，立即广播状态，这会触发第一个玩家（可能是机器人）的回合
-        broadcast_game_state("游戏开始！")
-    else:
-        emit('error', {'message': '玩家不足2人或游戏已开始，无法启动。'}, room=request.sid)
+    with room.lock:
+        room.touch()
+        _assign_host_if_needed(room, preferred_sid=request.sid)
+        if request.sid != room.host_sid:
+            emit('error', {'message': '只有房主才能开始游戏。'}, room=request.sid)
+            return
+
+        if room.game.start_game(num_decks=room.game.room_settings.get('num_decks', 1)):
+            room.bots.clear()
+            # 游戏开始后，立即广播状态，这会触发第一个玩家（可能是机器人）的回合
+            broadcast_game_state(room, "游戏开始！")
+        else:
+            emit('error', {'message': '玩家不足2人或游戏已开始，无法启动。'}, room=request.sid)
 
 @socketio.on('play_cards')
+@instrument_handler('play_cards')
 def handle_play_cards(data):
     """处理人类玩家出牌的动作"""
-    cards = data.get('cards', [])
     sid = request.sid
-    
-    status, message = game.play_turn(sid, cards)
-    
-    if status is None:
-        emit('error', {'message': message}, room=sid)
-    elif status == 'WIN':
-        broadcast_game_state(f"{game.players[sid]['name']} 打出了 {' '.join(cards)}")
-        socketio.emit('game_over', {'winner_name': game.players[sid]['name']})
-    else:
-        broadcast_game_state(f"{game.players[sid]['name']} 打出了 {' '.join(cards)}")
+    room = _current_room()
+    if room is None:
+        return
+    # 牌面字符串只在这里转换为内部牌 ID
+    cards = parse_cards(data.get('cards', []))
+    if cards is None:
+        emit('error', {'message': '试图打出不存在的牌。'}, room=sid)
+        return
+
+    with room.lock:
+        room.touch()
+        game = room.game
+        status, message = game.play_turn(sid, cards)
+
+        if status is None:
+            emit('error', {'message': message}, room=sid)
+        elif status == 'WIN':
+            replay_number = _record_replay(room)
+            broadcast_game_state(room, f"{game.players[sid]['name']} 打出了 {' '.join(card_names(sorted(cards)))}")
+            socketio.emit('game_over', {'winner_name': game.players[sid]['name'], 'replay': replay_number}, to=room.room_id)
+            _release_offline_seats(room)
+        else:
+            broadcast_game_state(room, f"{game.players[sid]['name']} 打出了 {' '.join(card_names(sorted(cards)))}")
 
 @socketio.on('pass_turn')
+@instrument_handler('pass_turn')
 def handle_pass_turn():
     """处理人类玩家选择“要不起”的动作"""
     sid = request.sid
-    success, message = game.pass_turn(sid)
-    if success:
-        broadcast_game_state(f"{game.players[sid]['name']} 选择 pass")
-    else:
-        emit('error', {'message': message}, room=sid)
+    room = _current_room()
+    if room is None:
+        return
+    with room.lock:
+        room.touch()
+        success, message = room.game.pass_turn(sid)
+        if success:
+            broadcast_game_state(room, f"{room.game.players[sid]['name']} 选择 pass")
+        else:
+            emit('error', {'message': message}, room=sid)
 
 if __name__ == '__main__':
-    # 监听在 0.0.0.0 上，使得局域网内其他设备可以访问
+    # 开发模式：监听在 0.0.0.0 上，使得局域网内其他设备可以访问；生产部署请使用 server.py
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,272 @@
+# batch_env.py
+"""
+向量化的批量对局环境：把 B 局同规模的对局放进 NumPy 数组（结构数组），一步同时校验并执行 B 个出牌。
+
+状态：
+    hands        (B, P, 15)  每名玩家在 15 个点数上的张数
+    turn         (B,)        当前出牌的座位
+    last_player  (B,)        上一手出牌的座位
+    last_sig     (B, 15)     桌面上一手的点数签名，全零表示桌面为空
+    last_type / last_value / last_length / last_seq  (B,)  上一手的 PlayInfo 各字段
+    rules        (B, 3)      各局的规则开关，列顺序同 CLASSIFIER_RULE_KEYS
+    done / winner / turns    (B,)
+
+出牌以点数签名 (B, 15) 给出，全零表示过牌。牌型识别、压牌比较与出牌/过牌的推进
+与 HandClassifier、compare_plays、Game.play_turn / pass_turn 一致（只看点数，不区分花色）；
+tools/check_batch_env.py 与标量 Game 逐步比对。
+
+需要 NumPy（可选依赖，pip install -r requirements-batch.txt）。
+"""
+import numpy as np
+
+from cards import CARD_RANK, JOKERS, MIN_VALUE, NUM_RANKS, STANDARD_DECK, rank_counts
+from game_logic import (
+    CHAIN_RANK_LIMIT, CLASSIFIER_RULE_KEYS, MIN_BOMB_SIZE, MIN_CHAIN_LENGTH, ROCKET_RANKS, ROCKET_VALUE, HandType,
+)
+
+RANK_INDEX = np.arange(NUM_RANKS)
+SMALL_JOKER_RANK, BIG_JOKER_RANK = ROCKET_RANKS
+
+
+def _lowest(mask):
+    """每行中 mask 为真的最小点数序号（整行为假时为 0，调用方需另行排除）。"""
+    return mask.argmax(axis=1)
+
+
+def _highest(mask):
+    return NUM_RANKS - 1 - mask[:, ::-1].argmax(axis=1)
+
+
+def classify_batch(sigs, rules):
+    """
+    批量识别牌型：sigs 为 (B, 15) 点数签名，rules 为 (B, 3) 规则开关。
+    返回 (hand_type, value, length, sequence_length) 四个 (B,) 数组，逐行与 HandClassifier.classify_signature 相同。
+    """
+    sigs = np.asarray(sigs, dtype=np.int16)
+    rules = np.asarray(rules, dtype=bool)
+    allow_rocket, allow_four_with_two, allow_wings = rules[:, 0], rules[:, 1], rules[:, 2]
+
+    present = sigs > 0
+    n = sigs.sum(axis=1)
+    k = np.count_nonzero(present, axis=1)
+    low, high = _lowest(present), _highest(present)
+    is_three = sigs == 3
+    num_threes = np.count_nonzero(is_three, axis=1)
+    low_three, high_three = _lowest(is_three), _highest(is_three)
+    is_four = sigs == 4
+    num_fours = np.count_nonzero(is_four, axis=1)
+    four = _lowest(is_four)
+    num_pairs = np.count_nonzero(sigs == 2, axis=1)
+
+    size = len(sigs)
+    hand_type = np.full(size, HandType.UNKNOWN, dtype=np.int8)
+    value = np.zeros(size, dtype=np.int16)
+    seq = np.zeros(size, dtype=np.int16)
+    # 逐条规则按标量实现的先后顺序判定，已判定的行不再被后面的规则覆盖
+    pending = n > 0
+
+    def settle(mask, t, v=None, s=None):
+        hit = pending & mask
+        hand_type[hit] = t
+        if v is not None:
+            value[hit] = v[hit] if isinstance(v, np.ndarray) else v
+        if s is not None:
+            seq[hit] = s[hit]
+        pending[hit] = False
+
+    settle(allow_rocket & (n == 2) & (sigs[:, SMALL_JOKER_RANK] == 1) & (sigs[:, BIG_JOKER_RANK] == 1),
+           HandType.ROCKET, ROCKET_VALUE)
+    one_rank = k == 1
+    for width, t in ((1, HandType.SINGLE), (2, HandType.PAIR), (3, HandType.THREE_OF_A_KIND)):
+        settle(one_rank & (n == width), t, low + MIN_VALUE)
+    settle(one_rank & (n >= MIN_BOMB_SIZE), HandType.BOMB, low + MIN_VALUE)
+    with_three = (k == 2) & (num_threes > 0)
+    settle(with_three & (n == 4), HandType.THREE_WITH_ONE, high_three + MIN_VALUE)
+    settle(with_three & (n == 5), HandType.THREE_WITH_TWO, high_three + MIN_VALUE)
+    # 四带二：恰好一个点数 4 张，其余为两张单牌、一对或两对
+    settle(allow_four_with_two & (num_fours == 1) & (((n == 6) & ((k == 2) | (k == 3))) | ((n == 8) & (k == 3) & (num_pairs == 2))),
+           HandType.FOUR_WITH_TWO, four + MIN_VALUE)
+    # 2 与大小王不能进顺子、连对、飞机
+    settle(present[:, CHAIN_RANK_LIMIT:].any(axis=1), HandType.UNKNOWN)
+
+    consecutive = high - low == k - 1
+    settle(consecutive & (k >= MIN_CHAIN_LENGTH[1]) & (k == n), HandType.STRAIGHT, high + MIN_VALUE, k)
+    settle(consecutive & (k >= MIN_CHAIN_LENGTH[2]) & (num_pairs == k), HandType.CONSECUTIVE_PAIRS, high + MIN_VALUE, k)
+    settle(consecutive & (k >= MIN_CHAIN_LENGTH[3]) & (num_threes == k), HandType.AIRPLANE, high + MIN_VALUE, k)
+
+    wings = allow_wings & (num_threes >= MIN_CHAIN_LENGTH[3]) & (high_three - low_three == num_threes - 1)
+    settle(wings & (n == num_threes * 4), HandType.AIRPLANE_WITH_SINGLES, high_three + MIN_VALUE, num_threes)
+    settle(wings & (n == num_threes * 5) & (num_pairs + num_threes == k),
+           HandType.AIRPLANE_WITH_PAIRS, high_three + MIN_VALUE, num_threes)
+    return hand_type, value, n.astype(np.int16), seq
+
+
+def beats_batch(current, last):
+    """批量版 compare_plays：current、last 为 classify_batch 返回的四元组，返回 (B,) 布尔数组。"""
+    cur_type, cur_value, cur_length, cur_seq = current
+    last_type, last_value, last_length, last_seq = last
+    same_shape = (cur_type == last_type) & (cur_length == last_length) & (cur_seq == last_seq)
+    # 炸弹之间张数多的更大
+    longer_bomb = (cur_type == HandType.BOMB) & (last_type == HandType.BOMB) & (cur_length > last_length)
+    return ((cur_type == HandType.ROCKET)
+            | ((last_type != HandType.ROCKET)
+               & (((cur_type == HandType.BOMB) & (last_type != HandType.BOMB)) | longer_bomb
+                  | (same_shape & (cur_value > last_value)))))
+
+
+def _rules_array(rules, batch_size):
+    rules = rules or {}
+    columns = [np.broadcast_to(np.asarray(rules.get(key, True), dtype=bool), (batch_size,)) for key in CLASSIFIER_RULE_KEYS]
+    return np.stack(columns, axis=1).copy()
+
+
+class BatchEnv:
+    """B 局同人数、同副牌数的对局；rules 的每个开关可以是单个布尔值或长度 B 的数组。"""
+
+    def __init__(self, batch_size, num_players, num_decks=1, include_jokers=True, rules=None, seed=None):
+        self.batch_size = batch_size
+        self.num_players = num_players
+        self._set_deck(num_decks, include_jokers)
+        self.rules = _rules_array(rules, batch_size)
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def _set_deck(self, num_decks, include_jokers):
+        deck = list(STANDARD_DECK) * num_decks
+        if include_jokers:
+            deck.extend(JOKERS * num_decks)
+        self.deck_ranks = np.array([CARD_RANK[c] for c in deck], dtype=np.int8)
+        self.cards_per_player = len(deck) // self.num_players
+
+    def reset(self):
+        """一次性为全部 B 局洗牌发牌，座位 0 先出。"""
+        size, players, per_player = self.batch_size, self.num_players, self.cards_per_player
+        decks = self.rng.permuted(np.broadcast_to(self.deck_ranks, (size, len(self.deck_ranks))), axis=1)
+        dealt = decks[:, :players * per_player].reshape(size * players, per_player).astype(np.int64)
+        # 每名玩家的牌偏移到各自的 15 格区间后一次计数
+        flat = dealt + (np.arange(size * players) * NUM_RANKS)[:, None]
+        self.hands = np.bincount(flat.ravel(), minlength=size * players * NUM_RANKS).reshape(
+            size, players, NUM_RANKS).astype(np.int16)
+        self.turn = np.zeros(size, dtype=np.int64)
+        self.last_player = np.zeros(size, dtype=np.int64)
+        self.last_sig = np.zeros((size, NUM_RANKS), dtype=np.int16)
+        self.last_type = np.full(size, HandType.UNKNOWN, dtype=np.int8)
+        self.last_value = np.zeros(size, dtype=np.int16)
+        self.last_length = np.zeros(size, dtype=np.int16)
+        self.last_seq = np.zeros(size, dtype=np.int16)
+        self.done = np.zeros(size, dtype=bool)
+        self.winner = np.full(size, -1, dtype=np.int64)
+        self.turns = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def from_games(cls, games):
+        """从一组人数相同的进行中 Game 构造批量环境（座位按 player_order；reset 时按第一局的副牌设置重新发牌）。"""
+        num_players = {len(g.player_order) for g in games}
+        if len(num_players) != 1:
+            raise ValueError('批量环境要求各局人数相同')
+        env = cls.__new__(cls)
+        env.batch_size, env.num_players = len(games), num_players.pop()
+        settings = games[0].room_settings
+        env._set_deck(int(settings.get('num_decks', 1)), settings.get('include_jokers', True))
+        env.rules = np.array([[bool(g.room_settings.get(key, True)) for key in CLASSIFIER_RULE_KEYS] for g in games])
+        env.rng = np.random.default_rng()
+        env.hands = np.array([[g.players[sid]['hand'].rank_counts for sid in g.player_order] for g in games], dtype=np.int16)
+        env.turn = np.array([g.player_order.index(g.current_turn_sid) for g in games], dtype=np.int64)
+        env.last_player = np.array([g.player_order.index(g.last_player_sid) for g in games], dtype=np.int64)
+        env.last_sig = np.array([rank_counts(g.last_played_cards) for g in games], dtype=np.int16)
+        info = [g.last_play_info for g in games]
+        env.last_type = np.array([i.hand_type for i in info], dtype=np.int8)
+        env.last_value = np.array([i.value for i in info], dtype=np.int16)
+        env.last_length = np.array([i.length for i in info], dtype=np.int16)
+        env.last_seq = np.array([i.sequence_length for i in info], dtype=np.int16)
+        env.done = np.array([not g.game_started for g in games])
+        env.winner = np.full(env.batch_size, -1, dtype=np.int64)
+        env.turns = np.zeros(env.batch_size, dtype=np.int64)
+        return env
+
+    def _clear_table(self, mask):
+        self.last_sig[mask] = 0
+        self.last_type[mask] = HandType.UNKNOWN
+        self.last_value[mask] = 0
+        self.last_length[mask] = 0
+        self.last_seq[mask] = 0
+
+    def is_lead(self):
+        """各局当前出牌者是否为新一轮领出（桌面为空或上一手是自己出的）。"""
+        return (self.last_length == 0) | (self.turn == self.last_player)
+
+    def current_hands(self):
+        return self.hands[np.arange(self.batch_size), self.turn]
+
+    def step(self, moves):
+        """
+        每局执行一个出牌（点数签名，全零为过牌）；已结束的局忽略。
+        返回 (ok, won)：ok 为出牌/过牌是否被接受（不合法时该局状态不变），won 为本步是否出完手牌。
+        """
+        moves = np.asarray(moves, dtype=np.int16)
+        active = ~self.done
+        is_pass = ~moves.any(axis=1)
+        lead = self.is_lead()
+        pass_ok = active & is_pass & ~lead
+
+        # 只对进行中且确实出牌的局做识别与比较，已结束的局越多，每步越省
+        tries = np.flatnonzero(active & ~is_pass)
+        seats = self.turn[tries]
+        tried = moves[tries]
+        current = classify_batch(tried, self.rules[tries])
+        last = (self.last_type[tries], self.last_value[tries], self.last_length[tries], self.last_seq[tries])
+        accepted = ((tried <= self.hands[tries, seats]).all(axis=1) & (current[0] != HandType.UNKNOWN)
+                    & (lead[tries] | beats_batch(current, last)))
+        played, seats, tried = tries[accepted], seats[accepted], tried[accepted]
+        play_ok = np.zeros(self.batch_size, dtype=bool)
+        play_ok[played] = True
+
+        self.hands[played, seats] -= tried
+        self.last_sig[played] = tried
+        self.last_type[played], self.last_value[played], self.last_length[played], self.last_seq[played] = (
+            field[accepted] for field in current)
+        self.last_player[played] = seats
+
+        won = np.zeros(self.batch_size, dtype=bool)
+        won[played] = ~self.hands[played, seats].any(axis=1)
+        self.done |= won
+        self.winner[won] = self.turn[won]
+
+        # 出完牌的一局停在原处；其余前进到下家（开局后各家手牌都不为空，无需跳过空手）
+        advance = (play_ok & ~won) | pass_ok
+        self.turn[advance] = (self.turn[advance] + 1) % self.num_players
+        self._clear_table(pass_ok & (self.turn == self.last_player))
+        ok = play_ok | pass_ok
+        self.turns += ok
+        return ok, won
+
+    def greedy_moves(self):
+        """
+        简单的向量化策略（用于吞吐基准）：领出时打出最小点数的全部同点牌（至多 4 张），
+        跟单张/对子/三张/炸弹时用最小的同型牌压上，其余情况过牌。
+        """
+        hand = self.current_hands()
+        rows = np.arange(self.batch_size)
+        moves = np.zeros_like(hand)
+
+        lead = self.is_lead()
+        low = np.argmax(hand > 0, axis=1)
+        moves[rows[lead], low[lead]] = np.minimum(hand[rows[lead], low[lead]], 4)
+
+        single_rank = np.isin(self.last_type, (HandType.SINGLE, HandType.PAIR, HandType.THREE_OF_A_KIND, HandType.BOMB))
+        width = self.last_length[:, None]
+        above = RANK_INDEX[None, :] > (self.last_value - MIN_VALUE)[:, None]
+        usable = (hand >= width) & above
+        follow = ~lead & single_rank & usable.any(axis=1)
+        pick = np.argmax(usable, axis=1)
+        moves[rows[follow], pick[follow]] = self.last_length[follow]
+        return moves
+
+    def run(self, policy=None, max_steps=10_000):
+        """用 policy(env) -> moves（默认 greedy_moves）把全部对局打完，返回步数。"""
+        policy = policy or BatchEnv.greedy_moves
+        steps = 0
+        while not self.done.all() and steps < max_steps:
+            self.step(policy(self))
+            steps += 1
+        return steps
@@ -0,0 +1,56 @@
+"""基准脚本共用的小工具：开局、两种推进对局的方式（每人出最小的一张 / 机器人决策）与空闲端口。
+
+基准脚本以 python benchmarks/bench_xxx.py 运行，本目录在 sys.path 上，直接 from _common import ... 即可。
+"""
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_logic import BotPlayer, apply_bot_move, decide_bot_move  # noqa: E402
+from game_logic import Game  # noqa: E402
+
+
+def new_game(num_players, settings=None, seed=None, bots=False, prefix='p'):
+    """num_players 人入座（sid 为 prefix + 座次）并按种子发好牌的对局。"""
+    game = Game()
+    game.update_room_settings(settings or {})
+    for i in range(num_players):
+        game.add_player(f'{prefix}{i}', f'玩家{i}', is_bot=bots)
+    game.start_game(seed=seed)
+    return game
+
+
+def play_lowest_or_pass(game):
+    """当前玩家领出时出手里最小的一张，跟牌时过；返回 play_turn 的状态（过牌为 'OK'）。"""
+    sid = game.current_turn_sid
+    is_lead = not game.last_played_cards or game.last_player_sid == sid
+    if is_lead:
+        return game.play_turn(sid, [next(iter(game.players[sid]['hand']))])[0]
+    game.pass_turn(sid)
+    return 'OK'
+
+
+def bot_turns(game, max_turns, budget=None):
+    """
+    让机器人把对局打下去，最多 max_turns 步；每步产出 (sid, 决策, 状态, 打出的牌, 消息, 决策耗时秒)。
+    budget 不为 None 时每次决策按服务端的方式带截止时间。有人出完（状态 'WIN'）后结束。
+    """
+    bots = {}
+    for _ in range(max_turns):
+        sid = game.current_turn_sid
+        started = time.perf_counter()
+        move = decide_bot_move(game, sid, BotPlayer, bots, deadline=None if budget is None else started + budget)
+        elapsed = time.perf_counter() - started
+        status, played, msg = apply_bot_move(game, sid, move)
+        yield sid, move, status, played, msg, elapsed
+        if status == 'WIN':
+            return
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -0,0 +1,85 @@
+"""批量环境吞吐基准：BatchEnv 一次推进 B 局与逐局推进标量 Game 的每秒局数对比。
+
+两边使用同一个简单策略（BatchEnv.greedy_moves 及其逐局等价实现），计时包含发牌，
+因此差别只来自状态表示与逐步校验/推进的方式。
+
+用法：
+    python benchmarks/bench_batch_env.py --batch 256,1024,4096 --players 3 --decks 1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_env import BatchEnv  # noqa: E402
+from cards import MIN_VALUE, NUM_RANKS  # noqa: E402
+from game_logic import Game, HandType  # noqa: E402
+from simulator import PRESETS  # noqa: E402
+
+SINGLE_RANK_TYPES = (HandType.SINGLE, HandType.PAIR, HandType.THREE_OF_A_KIND, HandType.BOMB)
+
+
+def _scalar_greedy(game, sid):
+    """BatchEnv.greedy_moves 的逐局版本，返回要打出的牌（空列表为过牌）。"""
+    hand = game.players[sid]['hand']
+    counts = hand.rank_counts
+    if not game.last_played_cards or game.last_player_sid == sid:
+        rank = next(r for r in range(NUM_RANKS) if counts[r])
+        return hand.peek_rank(rank, min(counts[rank], 4))
+    last = game.last_play_info
+    if last.hand_type in SINGLE_RANK_TYPES:
+        for rank in range(last.value - MIN_VALUE + 1, NUM_RANKS):
+            if counts[rank] >= last.length:
+                return hand.peek_rank(rank, last.length)
+    return []
+
+
+def run_scalar(num_games, players, decks, settings):
+    for seed in range(num_games):
+        game = Game()
+        game.update_room_settings({'num_decks': decks, **settings})
+        for p in range(players):
+            game.add_player(f'p{p}', f'p{p}', is_bot=True)
+        game.start_game(seed=seed)
+        while game.game_started:
+            sid = game.current_turn_sid
+            cards = _scalar_greedy(game, sid)
+            if cards:
+                game.play_turn(sid, cards)
+            else:
+                game.pass_turn(sid)
+
+
+def run_batch(batch_size, players, decks, settings, seed):
+    env = BatchEnv(batch_size, players, num_decks=decks, include_jokers=settings['include_jokers'],
+                   rules=settings, seed=seed)
+    return env.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch', default='256,1024,4096', help='逗号分隔的批大小')
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--decks', type=int, default=1)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='full')
+    parser.add_argument('--scalar-games', type=int, default=1000, help='标量对照组的局数')
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args()
+    settings = PRESETS[args.preset]
+
+    started = time.perf_counter()
+    run_scalar(args.scalar_games, args.players, args.decks, settings)
+    scalar_rate = args.scalar_games / (time.perf_counter() - started)
+    print(f"{'mode':>8} {'batch':>6} {'steps':>6} {'games/s':>10} {'speedup':>8}")
+    print(f"{'scalar':>8} {1:>6} {'-':>6} {scalar_rate:>10.0f} {1:>8.1f}")
+    for batch_size in [int(x) for x in args.batch.split(',')]:
+        started = time.perf_counter()
+        steps = run_batch(batch_size, args.players, args.decks, settings, args.seed)
+        rate = batch_size / (time.perf_counter() - started)
+        print(f"{'batch':>8} {batch_size:>6} {steps:>6} {rate:>10.0f} {rate / scalar_rate:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
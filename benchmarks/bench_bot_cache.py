@@ -0,0 +1,91 @@
+"""机器人共享缓存基准：同一批种子对局在开启/停用进程内决策缓存时的平均决策耗时、命中率与缓存占用。
+
+模拟繁忙服务端：一个进程里连续跑多桌机器人对局，缓存在各桌之间共享、不清空。
+开启与停用两轮的走法逐步比较，缓存只能改变耗时、不能改变任何一步的出牌（按点数比较）。
+
+用法：
+    python benchmarks/bench_bot_cache.py --games 200 --players 3 --decks 1 --preset full
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_logic  # noqa: E402
+from _common import bot_turns, new_game  # noqa: E402
+from cards import rank_counts  # noqa: E402
+import hand_solver  # noqa: E402
+from simulator import MAX_TURNS, PRESETS  # noqa: E402
+
+
+def play_games(num_games, players, decks, settings, seed):
+    """返回 (决策次数, 决策总耗时, 每局的点数走法序列)。"""
+    decisions, elapsed, traces = 0, 0.0, []
+    for g in range(num_games):
+        game = new_game(players, {'num_decks': decks, **settings}, seed=seed + g, bots=True)
+        trace = []
+        for sid, _, status, played, _, spent in bot_turns(game, MAX_TURNS):
+            elapsed += spent
+            decisions += 1
+            trace.append((sid, status, tuple(rank_counts(played)) if played else None))
+        traces.append(trace)
+    return decisions, elapsed, traces
+
+
+def _deep_size(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(_deep_size(item) for item in obj if not isinstance(item, (int, bool)))
+    return size
+
+
+def _cache_bytes():
+    """各缓存键值的近似内存（小整数与布尔值是共享对象，不计）；OrderedDict 每个条目另有约 100 字节开销。"""
+    return sum(_deep_size(k) + _deep_size(v) + 100
+               for cache in ai_logic.BOT_CACHES.values() for k, v in cache._data.items())
+
+
+def _reset_caches(maxsize=None):
+    # 拆牌求解器的记忆表同样在进程内共享：两轮都从空表开始，否则后一轮白捡前一轮的求解结果
+    for solver in hand_solver._solvers.values():
+        solver.clear_memo()
+    for name, cache in ai_logic.BOT_CACHES.items():
+        cache.clear()
+        cache.resize(maxsize if maxsize is not None else getattr(ai_logic, f'{name.upper()}_CACHE_SIZE'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--decks', type=int, default=1)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='full')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    settings = PRESETS[args.preset]
+
+    _reset_caches(0)
+    decisions, off_time, off_traces = play_games(args.games, args.players, args.decks, settings, args.seed)
+    _reset_caches()
+    _, on_time, on_traces = play_games(args.games, args.players, args.decks, settings, args.seed)
+    info = ai_logic.bot_cache_info()
+    cache_bytes = _cache_bytes()
+    _reset_caches()
+
+    print(f"{args.games} 局 {args.players} 人 {args.decks} 副 {args.preset}，{decisions} 次决策")
+    print(f"停用缓存: 平均 {off_time / decisions * 1000:.3f} ms/决策")
+    print(f"开启缓存: 平均 {on_time / decisions * 1000:.3f} ms/决策（{off_time / on_time:.2f}x），"
+          f"缓存约 {cache_bytes / 1024:.0f} KB")
+    for name, stats in info.items():
+        lookups = stats['hits'] + stats['misses']
+        print(f"  {name:>10}: 命中 {stats['hits']}/{lookups}（{stats['hits'] / max(1, lookups):.1%}），"
+              f"条目 {stats['size']}/{stats['maxsize']}")
+    if on_traces != off_traces:
+        print('错误：开启缓存后走法发生变化')
+        sys.exit(1)
+    print('走法一致：缓存没有改变任何一步出牌')
+
+
+if __name__ == '__main__':
+    main()
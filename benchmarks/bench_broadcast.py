@@ -0,0 +1,96 @@
+"""广播序列化基准：每个事件发给一桌的完整状态，逐个玩家构造、序列化 vs 公开状态序列化一次 + 每人一份手牌。
+
+模拟 python-socketio 的发送路径：向房间广播时对每个连接各编码一次事件包（socketio.packet.Packet，
+json 模块为 metrics.MeasuredJSON）。旧做法给每个人类玩家单独构造并编码完整状态（旁观者收不到）；
+新做法构造一份 metrics.PreEncoded 的公开状态发给全部连接（含旁观者），再给每个玩家发私有状态。
+表中为每轮（所有牌桌各广播一次）的耗时，以及其中序列化公开状态的次数。
+
+用法：
+    python benchmarks/bench_broadcast.py --tables 10,100 --players 2,4,8 --watchers 2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socketio import packet  # noqa: E402
+
+from _common import new_game, play_lowest_or_pass  # noqa: E402
+import metrics  # noqa: E402
+
+
+class _Packet(packet.Packet):
+    json = metrics.MeasuredJSON
+
+
+def _send(event, payload):
+    return _Packet(packet.EVENT, data=[event, payload]).encode()
+
+
+def make_tables(num_tables, num_players, num_decks):
+    return [new_game(num_players, {'num_decks': num_decks}, seed=t, prefix=f't{t}p') for t in range(num_tables)]
+
+
+def legacy_round(tables, watchers, message):
+    serialized = 0
+    for game in tables:
+        for sid in game.players:
+            state = game.get_game_state(sid)
+            state.update(host_sid=game.player_order[0], room_id='bench', message=message)
+            _send('game_update', state)
+            serialized += 1
+    return serialized
+
+
+def split_round(tables, watchers, message):
+    serialized = 0
+    for game in tables:
+        for sid in game.players:
+            _send('private_state', metrics.PreEncoded(game.get_private_state(sid)))
+        state = game.get_public_state()
+        state.update(host_sid=game.player_order[0], room_id='bench', message=message)
+        public = metrics.PreEncoded(state)
+        serialized += 1
+        for _ in range(len(game.players) + watchers):
+            _send('game_update', public)
+    return serialized
+
+
+def measure(num_tables, num_players, num_decks, watchers, rounds):
+    tables = make_tables(num_tables, num_players, num_decks)
+    elapsed = {'legacy': 0.0, 'split': 0.0}
+    serialized = {}
+    for r in range(rounds):
+        for game in tables:
+            if game.game_started:
+                play_lowest_or_pass(game)
+        for name, fn in (('legacy', legacy_round), ('split', split_round)):
+            started = time.perf_counter()
+            serialized[name] = fn(tables, watchers, f'第 {r} 步')
+            elapsed[name] += time.perf_counter() - started
+    return {name: value / rounds for name, value in elapsed.items()}, serialized
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', default='10,100', help='逗号分隔的牌桌数')
+    parser.add_argument('--players', default='2,4,8', help='逗号分隔的每桌玩家数')
+    parser.add_argument('--decks', type=int, default=2)
+    parser.add_argument('--watchers', type=int, default=2, help='每桌的旁观连接数（只有新做法会发给他们）')
+    parser.add_argument('--rounds', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'tables':>6} {'players':>7} {'legacy ms':>10} {'split ms':>9} {'speedup':>8} "
+          f"{'legacy ser':>10} {'split ser':>9} {'split us/table':>14}")
+    for num_tables in (int(x) for x in args.tables.split(',')):
+        for num_players in (int(x) for x in args.players.split(',')):
+            elapsed, serialized = measure(num_tables, num_players, args.decks, args.watchers, args.rounds)
+            print(f"{num_tables:>6} {num_players:>7} {elapsed['legacy'] * 1e3:>10.2f} {elapsed['split'] * 1e3:>9.2f} "
+                  f"{elapsed['legacy'] / elapsed['split']:>7.1f}x {serialized['legacy']:>10} {serialized['split']:>9} "
+                  f"{elapsed['split'] / num_tables * 1e6:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+// 前端渲染基准：在最小 DOM 模拟上运行 static/js/main.js，统计每次 game_update 创建/移动/删除的节点数与耗时。
+//
+// 不需要浏览器：用 node 的 vm 载入页面脚本，伪造 socket 推送整局的状态更新（对手出牌、自己点选后出牌），
+// 每次更新后执行一帧 requestAnimationFrame。节点数 = createElement 次数 + innerHTML 解析出的元素数。
+// 每步都核对手牌区的牌与状态中的手牌一致、打出的牌不再被选中、未打出的选择得以保留。
+// 传 --script 可以对比其他版本的 main.js（如 git show HEAD~1:static/js/main.js > /tmp/old.js）。
+// 页面中嵌入的规则表由 python 导出（game_logic.export_rules_table），static/js/rules.js、wire.js 与 main.js 在同一上下文中载入。
+//
+// 用法：
+//     node benchmarks/bench_client_render.js --hands 54,108,162 --updates 300
+'use strict';
+const { execFileSync } = require('child_process');
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const { parseArgs } = require('util');
+
+const ROOT = path.join(__dirname, '..');
+const RULES_TABLE = execFileSync(process.env.PYTHON || 'python', ['-c', 'import json, game_logic; print(json.dumps(game_logic.export_rules_table()))'], { cwd: ROOT, encoding: 'utf8' });
+
+const { values: args } = parseArgs({
+    options: {
+        script: { type: 'string', default: path.join(ROOT, 'static', 'js', 'main.js') },
+        hands: { type: 'string', default: '54,108,162' },
+        updates: { type: 'string', default: '300' },
+        seed: { type: 'string', default: '2024' },
+    },
+});
+
+// --- 最小 DOM 模拟：只实现 main.js 用到的部分，并计数 ---
+
+let counters;
+function resetCounters() { counters = { created: 0, parsed: 0, inserted: 0, removed: 0, textWrites: 0 }; }
+resetCounters();
+
+class ClassList {
+    constructor() { this.names = new Set(); }
+    add(name) { this.names.add(name); }
+    remove(name) { this.names.delete(name); }
+    contains(name) { return this.names.has(name); }
+    toggle(name, force) {
+        const on = force === undefined ? !this.names.has(name) : Boolean(force);
+        if (on) this.names.add(name); else this.names.delete(name);
+        return on;
+    }
+}
+
+class Element {
+    constructor(tagName) {
+        this.tagName = tagName.toUpperCase();
+        this.children = [];
+        this.parentNode = null;
+        this.dataset = {};
+        this.style = {};
+        this.classList = new ClassList();
+        this.id = '';
+        this.disabled = false;
+        this.value = '';
+        this.src = '';
+        this._text = '';
+        this._html = '';
+    }
+    get className() { return [...this.classList.names].join(' '); }
+    set className(value) { this.classList.names = new Set(value.split(/\s+/).filter(Boolean)); }
+    get firstChild() { return this.children[0] || null; }
+    get lastChild() { return this.children[this.children.length - 1] || null; }
+    get textContent() { return this._text + this.children.map(c => c.textContent).join(''); }
+    set textContent(value) { counters.textWrites++; this._detachAll(); this._text = String(value); }
+    get innerHTML() { return this._html; }
+    set innerHTML(value) {
+        this._detachAll();
+        this._html = String(value);
+        counters.parsed += (this._html.match(/<[a-z]/g) || []).length;
+    }
+    _detachAll() { this.children.forEach(c => { c.parentNode = null; }); counters.removed += this.children.length; this.children = []; }
+    appendChild(node) { return this.insertBefore(node, null); }
+    insertBefore(node, ref) {
+        if (node.parentNode) node.parentNode.children.splice(node.parentNode.children.indexOf(node), 1);
+        const index = ref ? this.children.indexOf(ref) : -1;
+        if (index < 0) this.children.push(node); else this.children.splice(index, 0, node);
+        node.parentNode = this;
+        counters.inserted++;
+        return node;
+    }
+    remove() {
+        if (!this.parentNode) return;
+        this.parentNode.children.splice(this.parentNode.children.indexOf(this), 1);
+        this.parentNode = null;
+        counters.removed++;
+    }
+    _matches(selector) { return selector.split('.').filter(Boolean).every(name => this.classList.contains(name)); }
+    closest(selector) { for (let el = this; el; el = el.parentNode) if (el._matches(selector)) return el; return null; }
+    querySelectorAll(selector) {
+        const found = [];
+        const walk = el => el.children.forEach(c => { if (c._matches(selector)) found.push(c); walk(c); });
+        walk(this);
+        return found;
+    }
+    addEventListener() {}
+}
+
+function makeEnvironment() {
+    const elements = new Map();
+    let ready = null;
+    const frames = [];
+    const document = {
+        body: Object.assign(new Element('body'), { dataset: { lanIp: '' } }),
+        getElementById(id) {
+            if (!elements.has(id)) elements.set(id, Object.assign(new Element('div'), { id }));
+            return elements.get(id);
+        },
+        querySelector(selector) { return selector.startsWith('#') ? this.getElementById(selector.slice(1)) : null; },
+        createElement(tagName) { counters.created++; return new Element(tagName); },
+        addEventListener(event, fn) { if (event === 'DOMContentLoaded') ready = fn; },
+    };
+    const handlers = {}, emitted = [];
+    const socket = { on(event, fn) { handlers[event] = fn; }, emit(event, data) { emitted.push([event, data]); } };
+    const storage = new Map();
+    const sandbox = {
+        document,
+        window: {
+            location: new URL('http://127.0.0.1:5000/?room=bench'),
+            matchMedia: () => ({ matches: true }),
+            addEventListener() {},
+        },
+        localStorage: { getItem: k => storage.get(k) ?? null, setItem: (k, v) => storage.set(k, v) },
+        io: () => socket,
+        alert() {},
+        requestAnimationFrame: fn => frames.push(fn),
+        URL, URLSearchParams, TextDecoder, ArrayBuffer, console,
+    };
+    document.getElementById('rules-table').textContent = RULES_TABLE;
+    const context = vm.createContext(sandbox);
+    for (const name of ['rules.js', 'wire.js']) {
+        const script = path.join(ROOT, 'static', 'js', name);
+        vm.runInContext(fs.readFileSync(script, 'utf8'), context, { filename: script });
+    }
+    vm.runInContext(fs.readFileSync(args.script, 'utf8'), context, { filename: args.script });
+    ready();
+    return {
+        document, handlers, emitted,
+        flushFrames() { while (frames.length) frames.shift()(performance.now()); },
+    };
+}
+
+// --- 对局脚本 ---
+
+const SUITS = ['♠', '♥', '♣', '♦'];
+const RANKS = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2'];
+
+function makeRng(seed) {
+    let state = seed >>> 0;
+    return () => { state = (Math.imul(state, 1664525) + 1013904223) >>> 0; return state / 2 ** 32; };
+}
+
+function deal(handSize, rng) {
+    const decks = Math.ceil(handSize / 54);
+    const deck = [];
+    for (let d = 0; d < decks; d++) {
+        SUITS.forEach(s => RANKS.forEach(r => deck.push(s + r)));
+        deck.push('小王', '大王');
+    }
+    for (let i = deck.length - 1; i > 0; i--) { const j = Math.floor(rng() * (i + 1)); [deck[i], deck[j]] = [deck[j], deck[i]]; }
+    return { decks, hand: deck.slice(0, handSize), pool: deck };
+}
+
+function multiset(cards) { const m = new Map(); cards.forEach(c => m.set(c, (m.get(c) || 0) + 1)); return m; }
+function sameMultiset(a, b) {
+    const x = multiset(a), y = multiset(b);
+    return x.size === y.size && [...x].every(([k, v]) => y.get(k) === v);
+}
+
+function run(handSize, updates, seed) {
+    const rng = makeRng(seed);
+    const { decks, hand, pool } = deal(handSize, rng);
+    const env = makeEnvironment();
+    const myHand = env.document.getElementById('my-hand');
+    const sids = ['me', 'p1', 'p2', 'p3'];
+    const state = {
+        my_sid: 'me', host_sid: 'me', game_started: true, state_version: 0, message: '',
+        room_settings: { num_decks: decks },
+        players: sids.map(sid => ({ sid, name: sid, is_bot: sid !== 'me', offline: false, card_count: handSize })),
+        player_order: sids, current_turn_sid: 'p1', last_player_sid: null, last_played_cards: [], recent_plays: [],
+        my_hand: hand.slice(),
+    };
+    // 与服务端一致：先单独发私有状态（sid 与手牌），再发所有人相同的公开状态
+    const push = () => {
+        state.state_version++;
+        const { my_sid, my_hand, ...shared } = JSON.parse(JSON.stringify(state));
+        env.handlers.private_state({ state_version: state.state_version, my_sid, my_hand });
+        env.handlers.game_update(shared);
+        env.flushFrames();
+    };
+    push();
+    resetCounters();
+
+    let checks = 0, turn = 1, elapsed = 0, pendingSelection = null;
+    for (let step = 0; step < updates && state.my_hand.length > 4; step++) {
+        const sid = sids[turn % sids.length];
+        let played = [];
+        if (sid === 'me') {
+            // 点选几张牌出掉，另外多选一张留在手里：出牌后它应仍处于选中状态（同一张牌有多张时不保证是同一个节点）
+            const nodes = myHand.children.slice();
+            const picks = new Set();
+            while (picks.size < 1 + Math.floor(rng() * 4)) picks.add(Math.floor(rng() * nodes.length));
+            picks.forEach(i => myHand.onclick({ target: nodes[i] }));
+            env.emitted.length = 0;
+            env.document.getElementById('play-btn').onclick();
+            played = env.emitted.find(([event]) => event === 'play_cards')[1].cards;
+            const rest = nodes.filter((_, i) => !picks.has(i));
+            const extra = rest[Math.floor(rng() * rest.length)];
+            myHand.onclick({ target: extra });
+            pendingSelection = extra.dataset.card;
+            played.forEach(c => state.my_hand.splice(state.my_hand.indexOf(c), 1));
+        } else {
+            const n = 1 + Math.floor(rng() * 5);
+            for (let i = 0; i < n; i++) played.push(pool[Math.floor(rng() * pool.length)]);
+        }
+        state.players.find(p => p.sid === sid).card_count -= played.length;
+        state.last_played_cards = played;
+        state.last_player_sid = sid;
+        state.recent_plays = state.recent_plays.concat([{ sid, cards: played }]).slice(-5);
+        state.current_turn_sid = sids[++turn % sids.length];
+
+        const started = performance.now();
+        push();
+        elapsed += performance.now() - started;
+
+        const shown = myHand.children.map(d => d.dataset.card);
+        if (!sameMultiset(shown, state.my_hand)) throw new Error(`第 ${step} 步手牌区与状态不一致`);
+        if (sid === 'me') {
+            const selected = myHand.children.filter(d => d.classList.contains('selected')).map(d => d.dataset.card);
+            if (selected.length && !(selected.length === 1 && selected[0] === pendingSelection)) {
+                throw new Error(`第 ${step} 步出牌后的选择不对: ${selected.join(' ')}`);
+            }
+            checks += selected.length;
+            env.document.getElementById('clear-btn').onclick();
+        }
+    }
+    const count = state.state_version - 1;
+    return {
+        handSize, updates: count, keptSelections: checks,
+        created: (counters.created + counters.parsed) / count,
+        inserted: counters.inserted / count,
+        removed: counters.removed / count,
+        textWrites: counters.textWrites / count,
+        ms: elapsed / count,
+    };
+}
+
+console.log(`脚本: ${path.relative(process.cwd(), args.script)}`);
+console.log(`${'hand'.padStart(5)} ${'updates'.padStart(8)} ${'nodes/upd'.padStart(10)} ${'inserts/upd'.padStart(12)} ` +
+            `${'removes/upd'.padStart(12)} ${'texts/upd'.padStart(10)} ${'ms/upd'.padStart(8)} ${'kept sel'.padStart(9)}`);
+for (const handSize of args.hands.split(',').map(Number)) {
+    const r = run(handSize, Number(args.updates), Number(args.seed) + handSize);
+    console.log(`${String(r.handSize).padStart(5)} ${String(r.updates).padStart(8)} ${r.created.toFixed(1).padStart(10)} ` +
+                `${r.inserted.toFixed(1).padStart(12)} ${r.removed.toFixed(1).padStart(12)} ${r.textWrites.toFixed(1).padStart(10)} ` +
+                `${r.ms.toFixed(3).padStart(8)} ${String(r.keptSelections).padStart(9)}`);
+}
@@ -0,0 +1,87 @@
+"""拆牌基准：比较 BotPlayer 的贪心分解与 HandSolver 最少手数拆分的手数和耗时（按种子发牌，1~6 副牌）。
+
+贪心分解在多副牌下不处理 5 张以上的同点数牌，这些牌不会出现在任何组合里，单独列为“未覆盖”。
+
+用法：
+    python benchmarks/bench_decomposition.py --decks 1,2,3 --players 3 --hands 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_logic import BotPlayer  # noqa: E402
+from cards import rank_counts  # noqa: E402
+from game_logic import Game, HandType  # noqa: E402
+from hand_solver import HandSolver  # noqa: E402
+
+
+def _deal(seed, num_decks, num_players):
+    game = Game()
+    game.update_room_settings({'num_decks': num_decks})
+    for i in range(num_players):
+        game.add_player(f'p{i}', f'玩家{i}', is_bot=True)
+    game.start_game(seed=seed)
+    return game
+
+
+def run(deck_counts, num_players, num_hands, seed, check):
+    print(f"{'decks':>5} {'cards':>5} {'greedy':>7} {'solver':>7} {'fewer%':>7} {'uncov':>6} "
+          f"{'greedy ms':>10} {'cold ms':>8} {'warm ms':>8}")
+    rng = random.Random(seed)
+    for num_decks in deck_counts:
+        greedy_hands = solver_hands = fewer = uncovered = 0
+        greedy_time = cold_time = warm_time = 0.0
+        solver, measured, cards = None, 0, 0
+        while measured < num_hands:
+            game = _deal(rng.randrange(1 << 30), num_decks, num_players)
+            solver = solver or HandSolver(game.classifier)
+            for sid in game.player_order:
+                hand = list(game.players[sid]['hand'])
+                bot = BotPlayer(hand, game.get_game_state(sid, encode_cards=False), game)
+
+                started = time.perf_counter()
+                analysis = bot._analyze_hand_uncached(hand)
+                greedy_time += time.perf_counter() - started
+                combos = [c for group in analysis.values() for c in group]
+
+                counts = rank_counts(hand)
+                started = time.perf_counter()
+                result = solver.solve(counts)
+                cold_time += time.perf_counter() - started
+                started = time.perf_counter()
+                solver.solve(counts)
+                warm_time += time.perf_counter() - started
+
+                if check:
+                    assert [sum(col) for col in zip(*result.plays)] == counts, hand
+                    assert all(game.classifier.classify_signature(p).hand_type != HandType.UNKNOWN for p in result.plays), hand
+
+                greedy_hands += len(combos)
+                solver_hands += result.hands
+                fewer += result.hands < len(combos)
+                uncovered += len(hand) - sum(len(c) for c in combos)
+                cards += len(hand)
+                measured += 1
+
+        print(f"{num_decks:>5} {cards / measured:>5.0f} {greedy_hands / measured:>7.2f} {solver_hands / measured:>7.2f} "
+              f"{fewer / measured * 100:>7.1f} {uncovered / measured:>6.1f} {greedy_time / measured * 1000:>10.3f} "
+              f"{cold_time / measured * 1000:>8.3f} {warm_time / measured * 1000:>8.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--decks', default='1,2,3', help='逗号分隔的副牌数')
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--hands', type=int, default=200, help='每种副牌数测量的手牌数')
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--check', action='store_true', help='同时校验每个拆分都是合法牌型且恰好用完手牌')
+    args = parser.parse_args()
+    run([int(x) for x in args.decks.split(',')], args.players, args.hands, args.seed, args.check)
+
+
+if __name__ == '__main__':
+    main()
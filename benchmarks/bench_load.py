@@ -0,0 +1,323 @@
+"""负载测试：启动 server.py（可选不同异步模式与 worker 数），用大量 WebSocket 连接持续对局，统计能维持的连接数与消息速率。
+
+每个房间一个“驾驶”连接：加入游戏、添加机器人、开局，轮到自己时请求提示并打出第一个提示（没有则过牌），
+一局结束后立即重开；另有若干只接收广播的旁观连接。客户端直接实现 Engine.IO v4 协议
+（与浏览器相同：长轮询握手后升级为 WebSocket），只依赖 Flask-SocketIO 已经带上的 simple-websocket。
+--workers 1,2,4 时比较多进程分片下“局/秒”（同时服务的牌桌）随 worker 数的增长；压测端本身也受 GIL 限制，
+负载较大时配合 --client-procs 把连接分到多个进程。
+
+用法：
+    python benchmarks/bench_load.py --modes threading,eventlet --rooms 10,50 --watchers 3 --duration 20
+    python benchmarks/bench_load.py --modes eventlet --workers 1,2,4 --rooms 200 --watchers 0 --client-procs 4
+    python benchmarks/bench_load.py --url http://127.0.0.1:5000 --rooms 20    # 压测已启动的服务器
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import simple_websocket
+
+from _common import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONNECT_TIMEOUT = 10
+
+
+class EngineIOClient:
+    """
+    最小的 Socket.IO 客户端（默认命名空间、文本包）：与浏览器一样先长轮询握手再升级到 WebSocket，
+    之后在后台线程里接收并分发事件。握手期间收到的事件先缓存，start() 时再交给处理函数。
+    """
+
+    def __init__(self, base_url, room, stats):
+        self.stats = stats
+        self.handlers = {}
+        self.closed = False
+        self.ws = None
+        polling = f'{base_url}/socket.io/?EIO=4&transport=polling&room={room}'
+        opened = self._poll(polling)
+        if not opened or not opened[0].startswith('0'):
+            raise ConnectionError('未收到 Engine.IO open 包')
+        eio_sid = json.loads(opened[0][1:])['sid']
+        polling += f'&sid={eio_sid}'
+        self._poll(polling, data='40')
+        packets = self._poll(polling)
+        if not packets or not packets[0].startswith('40'):
+            raise ConnectionError(f'命名空间连接失败: {packets[:1]}')
+        self.sid = json.loads(packets[0][2:])['sid']
+        self._pending = packets[1:]
+
+        ws_url = base_url.replace('http://', 'ws://', 1)
+        self.ws = simple_websocket.Client(f'{ws_url}/socket.io/?EIO=4&transport=websocket&room={room}&sid={eio_sid}')
+        try:
+            self.ws.send('2probe')
+            if self.ws.receive(CONNECT_TIMEOUT) != '3probe':
+                raise ConnectionError('WebSocket 升级失败')
+            self.ws.send('5')
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _poll(url, data=None):
+        request = urllib.request.Request(url, data=data.encode() if data is not None else None,
+                                         headers={'Content-Type': 'text/plain;charset=UTF-8'})
+        with urllib.request.urlopen(request, timeout=CONNECT_TIMEOUT) as response:
+            body = response.read().decode('utf-8')
+        return body.split('\x1e') if data is None else []
+
+    def start(self):
+        for packet in self._pending:
+            self._dispatch(packet)
+        threading.Thread(target=self._receive_loop, daemon=True).start()
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def emit(self, event, data=None):
+        self.ws.send('42' + json.dumps([event] if data is None else [event, data], separators=(',', ':')))
+
+    def close(self):
+        self.closed = True
+        try:
+            if self.ws is not None:
+                self.ws.close()
+        except Exception:
+            pass
+
+    def _dispatch(self, packet):
+        self.stats.count('messages')
+        if packet.startswith('42'):
+            event, *args = json.loads(packet[2:])
+            handler = self.handlers.get(event)
+            if handler is not None:
+                handler(*args)
+
+    def _receive_loop(self):
+        while not self.closed:
+            try:
+                packet = self.ws.receive()
+            except Exception:
+                break
+            if packet is None:
+                break
+            if packet == '2':
+                self.ws.send('3')
+            elif packet != '6':
+                self._dispatch(packet)
+        if not self.closed:
+            self.stats.count('dropped')
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.hint_rtts = []
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def rtt(self, seconds):
+        with self._lock:
+            self.hint_rtts.append(seconds)
+
+
+class Driver:
+    """驾驶连接：维护“是否轮到我”，轮到时请求提示并出牌，一局结束后重新开局。"""
+
+    def __init__(self, client, bots, stats):
+        self.client, self.stats = client, stats
+        self.turn = None
+        self.requested_version = None
+        self.hint_sent_at = None
+        self.version = 0
+        client.on('game_update', self._on_update)
+        client.on('game_delta', self._on_delta)
+        client.on('hint', self._on_hint)
+        client.on('game_over', self._on_game_over)
+        client.start()
+        client.emit('join_game', {'name': 'load'})
+        for _ in range(bots):
+            client.emit('add_bot')
+        client.emit('start_game')
+
+    def _on_update(self, state):
+        self.version = state.get('state_version', 0)
+        self.turn = state['current_turn_sid'] if state.get('game_started') else None
+        self._maybe_act()
+
+    def _on_delta(self, delta):
+        self.version = delta['state_version']
+        for op in delta['ops']:
+            if op['op'] == 'turn':
+                self.turn = op['sid']
+        self._maybe_act()
+
+    def _maybe_act(self):
+        if self.turn == self.client.sid and self.requested_version != self.version:
+            self.requested_version = self.version
+            self.hint_sent_at = time.perf_counter()
+            self.client.emit('request_hint')
+
+    def _on_hint(self, data):
+        if self.hint_sent_at is not None:
+            self.stats.rtt(time.perf_counter() - self.hint_sent_at)
+        if data['plays']:
+            self.client.emit('play_cards', {'cards': data['plays'][0]})
+        else:
+            self.client.emit('pass_turn')
+
+    def _on_game_over(self, _):
+        self.stats.count('games')
+        self.turn = None
+        self.client.emit('start_game')
+
+
+def _wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load(base_url, rooms, watchers, bots, duration, run_id):
+    """对 rooms（房间下标区间）建立连接并持续对局 duration 秒，返回原始计数与提示往返样本。"""
+    stats = Stats()
+    clients, failures = [], 0
+    started = time.perf_counter()
+    for i in rooms:
+        room = f'load{run_id}-{i}'
+        try:
+            driver_client = EngineIOClient(base_url, room, stats)
+            clients.append(driver_client)
+            Driver(driver_client, bots, stats)
+            for _ in range(watchers):
+                watcher = EngineIOClient(base_url, room, stats)
+                watcher.start()
+                clients.append(watcher)
+        except Exception:
+            failures += 1
+    ramp = time.perf_counter() - started
+
+    before = dict(stats.counters)
+    time.sleep(duration)
+    after = dict(stats.counters)
+    for client in clients:
+        client.close()
+    return {
+        'connections': len(clients),
+        'failed': failures,
+        'dropped': after.get('dropped', 0),
+        'ramp_s': ramp,
+        'messages': after.get('messages', 0) - before.get('messages', 0),
+        'games': after.get('games', 0) - before.get('games', 0),
+        'hint_rtts': stats.hint_rtts,
+    }
+
+
+def _run_load_star(job):
+    return run_load(*job)
+
+
+def run_load_parallel(base_url, num_rooms, watchers, bots, duration, run_id, client_procs):
+    """把房间分给 client_procs 个压测进程（避免压测端自身受 GIL 限制），汇总结果。"""
+    if client_procs <= 1:
+        parts = [run_load(base_url, range(num_rooms), watchers, bots, duration, run_id)]
+    else:
+        jobs = [(base_url, range(k, num_rooms, client_procs), watchers, bots, duration, run_id)
+                for k in range(client_procs)]
+        with multiprocessing.Pool(client_procs) as pool:
+            parts = pool.map(_run_load_star, jobs)
+    rtts = sorted(rtt for part in parts for rtt in part['hint_rtts']) or [0.0]
+    return {
+        'rooms': num_rooms,
+        'connections': sum(p['connections'] for p in parts),
+        'failed': sum(p['failed'] for p in parts),
+        'dropped': sum(p['dropped'] for p in parts),
+        'ramp_s': max(p['ramp_s'] for p in parts),
+        'messages_per_s': sum(p['messages'] for p in parts) / duration,
+        'games_per_s': sum(p['games'] for p in parts) / duration,
+        'hint_rtt_p50_ms': statistics.median(rtts) * 1000,
+        'hint_rtt_p99_ms': rtts[min(len(rtts) - 1, int(len(rtts) * 0.99))] * 1000,
+    }
+
+
+def _start_server(mode, workers, think_time):
+    port = free_port()
+    env = dict(os.environ, NETPDK_BOT_THINK_TIME=think_time)
+    # 不读写状态快照：否则上一档压测退出时写下的同名房间会在下一档启动时被恢复出来
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'), '--async-mode', mode,
+                               '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+                               '--snapshot', ''],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # 多 worker 时路由端口最后才开始监听
+    if not _wait_for_port(port, timeout=15 + 5 * workers):
+        server.kill()
+        return None, None
+    return server, f'http://127.0.0.1:{port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='threading,eventlet', help='逗号分隔的异步模式（由本脚本启动服务器时使用）')
+    parser.add_argument('--workers', default='1', help='逗号分隔的 worker 进程数，如 1,2,4（大于 1 时经路由与消息中转）')
+    parser.add_argument('--url', help='压测已启动的服务器，此时忽略 --modes/--workers')
+    parser.add_argument('--rooms', default='10,50', help='逗号分隔的房间数')
+    parser.add_argument('--watchers', type=int, default=3, help='每个房间的旁观连接数')
+    parser.add_argument('--bots', type=int, default=2, help='每个房间的机器人数')
+    parser.add_argument('--duration', type=float, default=15, help='每档负载的测量时长（秒）')
+    parser.add_argument('--think-time', default='0', help='服务器的 NETPDK_BOT_THINK_TIME')
+    parser.add_argument('--client-procs', type=int, default=1, help='压测端进程数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+    room_counts = [int(x) for x in args.rooms.split(',')]
+    run_ids = itertools.count()
+
+    if args.url:
+        targets = [(None, None)]
+    else:
+        targets = [(m.strip(), int(w)) for m in args.modes.split(',') if m.strip() for w in args.workers.split(',')]
+    results = []
+    for mode, workers in targets:
+        server, url = None, args.url
+        if url is None:
+            server, url = _start_server(mode, workers, args.think_time)
+            if server is None:
+                print(f'{mode} x{workers}: 服务器未能启动', file=sys.stderr)
+                continue
+        label = f'{mode} x{workers}' if mode else url
+        try:
+            for num_rooms in room_counts:
+                result = {'mode': mode, 'workers': workers,
+                          **run_load_parallel(url, num_rooms, args.watchers, args.bots, args.duration,
+                                              next(run_ids), args.client_procs)}
+                results.append(result)
+                if not args.json:
+                    print(f"{label:>14} 房间 {num_rooms:>4}  连接 {result['connections']:>5}（失败 {result['failed']}，"
+                          f"掉线 {result['dropped']}）  {result['messages_per_s']:>8.0f} 消息/秒  {result['games_per_s']:>6.2f} 局/秒  "
+                          f"提示往返 p50 {result['hint_rtt_p50_ms']:.1f} ms  p99 {result['hint_rtt_p99_ms']:.1f} ms", flush=True)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=20)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
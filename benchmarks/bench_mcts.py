@@ -0,0 +1,82 @@
+"""蒙特卡洛AI基准：每核每秒模拟次数，以及轮换座位时对启发式AI的胜率。
+
+吞吐部分对种子发牌得到的开局局面反复调用 run_simulations（单进程与进程池各测一次）；
+胜率部分用 simulator 在每个座位上各放一个 mcts，其余座位为 heuristic。
+
+用法：
+    python benchmarks/bench_mcts.py --budget 0.05 --games 200 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcts_bot  # noqa: E402
+import simulator  # noqa: E402
+from game_logic import Game  # noqa: E402
+
+
+def _positions(num_positions, num_players, settings, seed):
+    positions = []
+    for i in range(num_positions):
+        game = Game()
+        game.update_room_settings(settings)
+        for p in range(num_players):
+            game.add_player(f'p{p}', f'玩家{p}', is_bot=True)
+        game.start_game(seed=seed + i)
+        sid = game.current_turn_sid
+        bot = mcts_bot.MonteCarloBot(list(game.players[sid]['hand']), game.get_game_state(sid, encode_cards=False), game)
+        position = bot._position()
+        positions.append((position, bot._root_moves(position, bot._decide_lead())))
+    return positions
+
+
+def measure_throughput(positions, seconds, workers):
+    jobs = [(position, moves, seconds, i) for i, (position, moves) in enumerate(positions)]
+    started = time.perf_counter()
+    if workers > 1:
+        results = mcts_bot._get_pool(workers).map(mcts_bot._run_simulations_star, jobs)
+    else:
+        results = [mcts_bot.run_simulations(*job) for job in jobs]
+    elapsed = time.perf_counter() - started
+    simulations = sum(n for _, _, n in results)
+    return simulations / elapsed, simulations / (seconds * len(jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=0.05, help='对局中蒙特卡洛AI每步的思考时间（秒）')
+    parser.add_argument('--games', type=int, default=200, help='每个座位轮换的对局数')
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--preset', choices=sorted(simulator.PRESETS), default='full')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--positions', type=int, default=8, help='测吞吐用的局面数')
+    parser.add_argument('--seed', type=int, default=17)
+    args = parser.parse_args()
+    settings = {'num_decks': 1, **simulator.PRESETS[args.preset]}
+
+    positions = _positions(args.positions, args.players, settings, args.seed)
+    for workers in sorted({1, args.workers}):
+        # 吞吐：每个局面在每个进程上各模拟 1 秒
+        total, per_core = measure_throughput(positions * workers, 1.0, workers)
+        print(f"进程数 {workers}: {total:.0f} 次模拟/秒，每核 {per_core:.0f} 次模拟/秒")
+
+    mcts_bot.MonteCarloBot.time_budget = args.budget
+    random.seed(args.seed)
+    wins = 0.0
+    for seat in range(args.players):
+        seats = ['heuristic'] * args.players
+        seats[seat] = 'mcts'
+        stats = simulator.simulate(args.games, seats, settings, workers=args.workers, base_seed=args.seed * 1000)
+        rate = stats['bot_win_rate_per_seat']['mcts']
+        wins += rate
+        print(f"mcts 在座位 {seat}: 胜率 {rate:.1%}（基准 {1 / args.players:.1%}），平均决策 {stats['avg_decision_ms']:.1f} ms，"
+              f"出错 {stats['errors']}")
+    print(f"mcts 平均胜率 {wins / args.players:.1%}，每步预算 {args.budget * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
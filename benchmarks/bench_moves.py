@@ -0,0 +1,70 @@
+"""合法出牌枚举微基准：多副牌大手牌下，领出与跟牌两种情形的枚举耗时与结果数量。
+
+用法：
+    python benchmarks/bench_moves.py --decks 6 --players 2,4,6 --hands 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import Hand, JOKERS, STANDARD_DECK  # noqa: E402
+from game_logic import Game, HandType  # noqa: E402
+
+
+def _deal_hands(rng, num_decks, num_players, count):
+    deck = list(STANDARD_DECK + JOKERS) * num_decks
+    hands = []
+    while len(hands) < count:
+        rng.shuffle(deck)
+        per_player = len(deck) // num_players
+        hands.extend(Hand(deck[i * per_player:(i + 1) * per_player]) for i in range(num_players))
+    return hands[:count]
+
+
+def run(num_decks, player_counts, num_hands, seed):
+    rng = random.Random(seed)
+    game = Game()
+    game.update_room_settings({'num_decks': num_decks})
+    print(f"{'players':>7} {'cards':>5} {'mode':>6} {'plays':>8} {'avg ms':>8} {'max ms':>8}")
+    for num_players in player_counts:
+        hands = _deal_hands(rng, num_decks, num_players, num_hands)
+
+        lead_times, lead_counts = [], []
+        follow_times, follow_counts = [], []
+        for hand in hands:
+            started = time.perf_counter()
+            lead = game.find_legal_plays(hand)
+            lead_times.append(time.perf_counter() - started)
+            lead_counts.append(len(lead))
+
+            # 以对手可能打出的一手牌作为上家出牌，覆盖各种牌型
+            opponent = _deal_hands(rng, num_decks, num_players, 1)[0]
+            candidates = [info for _, info in game.find_legal_plays(opponent) if info.hand_type != HandType.ROCKET]
+            last_play = rng.choice(candidates)
+            started = time.perf_counter()
+            follow = game.find_legal_plays(hand, last_play)
+            follow_times.append(time.perf_counter() - started)
+            follow_counts.append(len(follow))
+
+        cards = sum(len(h) for h in hands) // len(hands)
+        for mode, times, counts in (('lead', lead_times, lead_counts), ('follow', follow_times, follow_counts)):
+            print(f"{num_players:>7} {cards:>5} {mode:>6} {sum(counts) / len(counts):>8.0f} "
+                  f"{sum(times) / len(times) * 1000:>8.2f} {max(times) * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--players', default='2,4,6', help='逗号分隔的玩家人数')
+    parser.add_argument('--hands', type=int, default=50, help='每种人数测量的手牌数')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+    run(args.decks, [int(x) for x in args.players.split(',')], args.hands, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""多副牌机器人基准：1~6 副牌下每次决策的耗时分布（p50/p99/最大），与服务端的决策时限比较。
+
+每种副牌数跑若干局全机器人对局，决策按服务端的方式带截止时间（bot_scheduler.DEFAULT_DECISION_BUDGET），
+同时核对每一步：决策必须合法（不触发 FALLBACK）、不抛异常。超过时限的决策单独计数。
+
+用法：
+    python benchmarks/bench_multideck.py --games 5 --players 4
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _common import bot_turns, new_game  # noqa: E402
+from bot_scheduler import DEFAULT_DECISION_BUDGET  # noqa: E402
+from simulator import MAX_TURNS, PRESETS  # noqa: E402
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def play_games(num_games, players, decks, settings, budget, seed):
+    """返回 (每次决策的耗时列表, FALLBACK 次数, 对局步数上限内未结束的局数)。"""
+    timings, fallbacks, unfinished = [], 0, 0
+    for g in range(num_games):
+        game = new_game(players, {'num_decks': decks, **settings}, seed=seed + g, bots=True)
+        status = None
+        for _, move, status, _, msg, elapsed in bot_turns(game, MAX_TURNS * decks, budget):
+            timings.append(elapsed)
+            if status == 'FALLBACK':
+                fallbacks += 1
+                print(f'  FALLBACK：{decks} 副牌第 {g} 局，{msg}，决策 {move}')
+        unfinished += status != 'WIN'
+    return timings, fallbacks, unfinished
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=5, help='每种副牌数的局数')
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--max-decks', type=int, default=6)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='full')
+    parser.add_argument('--budget', type=float, default=DEFAULT_DECISION_BUDGET, help='决策时限（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    settings = PRESETS[args.preset]
+
+    print(f'决策时限 {args.budget * 1000:.0f}ms，{args.players} 人，每种副牌数 {args.games} 局')
+    print(f"{'decks':>5} {'decisions':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'over':>5} {'fallback':>8} {'unfinished':>10}")
+    failed = False
+    for decks in range(1, args.max_decks + 1):
+        timings, fallbacks, unfinished = play_games(args.games, args.players, decks, settings, args.budget, args.seed)
+        timings.sort()
+        over = sum(1 for t in timings if t > args.budget)
+        print(f'{decks:>5} {len(timings):>9} {_percentile(timings, 0.5) * 1000:>8.2f} {_percentile(timings, 0.99) * 1000:>8.2f} '
+              f'{timings[-1] * 1000:>8.2f} {over:>5} {fallbacks:>8} {unfinished:>10}')
+        failed = failed or bool(fallbacks)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""回放基准：每局回放的字节数、归档批量读入速度，以及跳到任意一步的耗时（关键帧 vs 从头重放）。
+
+用机器人打若干局，按不同的关键帧间隔编码，统计每局原始/zlib 压缩后的字节数（归档里存的是后者）；
+每局随机抽若干步跳转，比较从最近关键帧恢复与不带关键帧（从发牌重放到该步）的耗时。
+最后把全部对局写入归档文件再整体读回，给出每秒读入的局数。
+
+用法：
+    python benchmarks/bench_replay.py --games 200 --players 4 --decks 2 --intervals 8,16,32,64
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _common import bot_turns, new_game  # noqa: E402
+import replay  # noqa: E402
+from simulator import MAX_TURNS  # noqa: E402
+
+
+def play_games(num_games, players, decks, seed):
+    games = []
+    for g in range(num_games):
+        game = new_game(players, {'num_decks': decks}, seed=seed + g, bots=True)
+        for _ in bot_turns(game, MAX_TURNS * decks):
+            pass
+        games.append(replay.Replay.from_game(game))
+    return games
+
+
+def _copy(record, interval):
+    return replay.Replay(record.settings, record.names, record.bots, record.moves, seed=record.seed,
+                         deal=record.deal, finished_at=record.finished_at, interval=interval)
+
+
+def measure_seek(records, samples, rng):
+    """返回每次跳转的耗时列表（秒）。"""
+    timings = []
+    for record in records:
+        record.game_at(0)    # 关键帧在首次跳转时生成，不计入
+        for move in rng.sample(range(len(record.moves) + 1), min(samples, len(record.moves) + 1)):
+            started = time.perf_counter()
+            record.game_at(move)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--decks', type=int, default=2)
+    parser.add_argument('--intervals', default='8,16,32,64', help='逗号分隔的关键帧间隔')
+    parser.add_argument('--samples', type=int, default=10, help='每局随机跳转的次数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    games = play_games(args.games, args.players, args.decks, args.seed)
+    moves = sum(len(r.moves) for r in games)
+    print(f'{args.games} 局（{args.players} 人 {args.decks} 副牌），平均 {moves / args.games:.1f} 步，'
+          f'生成耗时 {time.perf_counter() - started:.1f}s')
+
+    print(f"{'keyframes':>9} {'raw B/game':>10} {'zlib B/game':>11} {'MB/10k games':>12} {'seek mean us':>12} {'seek max us':>11}")
+    intervals = [int(x) for x in args.intervals.split(',')]
+    for interval in [None] + intervals:
+        records = [_copy(r, interval or replay.KEYFRAME_INTERVAL) for r in games]
+        blobs = [r.encode(keyframes=interval is not None) for r in records]
+        compressed = sum(len(zlib.compress(b)) for b in blobs)
+        # 不带关键帧时从编码读回：跳转前先重建关键帧，这里用「从头重放」衡量读回后的首次跳转
+        if interval is None:
+            records = [_copy(r, len(r.moves) + 1) for r in games]
+        timings = measure_seek(records, args.samples, random.Random(args.seed))
+        print(f"{interval or 'none':>9} {sum(map(len, blobs)) / args.games:>10.0f} {compressed / args.games:>11.0f} "
+              f"{compressed / args.games * 1e4 / 1e6:>12.2f} {sum(timings) / len(timings) * 1e6:>12.0f} {max(timings) * 1e6:>11.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for keyframes in (True, False):
+            path = os.path.join(tmp, f'replays-{keyframes}.bin')
+            started = time.perf_counter()
+            replay.append_archive(path, games, keyframes=keyframes)
+            written = time.perf_counter() - started
+            started = time.perf_counter()
+            loaded = replay.read_archive(path)
+            elapsed = time.perf_counter() - started
+            label = f'关键帧间隔 {replay.KEYFRAME_INTERVAL}' if keyframes else '不带关键帧'
+            print(f'归档（{label}）：{os.path.getsize(path) / 1024:.1f} KB，写入 {written * 1e3:.1f}ms，'
+                  f'读回 {len(loaded)} 局 {elapsed * 1e3:.1f}ms（{len(loaded) / elapsed:,.0f} 局/秒）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""多房间吞吐基准：随活跃房间数增长，测量事件吞吐（events/s）与 p99 延迟。
+
+每个房间由两个真人测试客户端组成，通过 Flask-SocketIO 的 test_client 走真实的事件处理器。
+轮到谁谁就出手里最小的单张，非新一轮则 pass，一局结束后房主重新开局。
+
+用法：
+    python benchmarks/bench_rooms.py --rooms 1,10,50,100,200 --events 200 --threads 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, rooms, socketio  # noqa: E402
+
+
+def _latest_state(client, previous):
+    """最新的完整状态：公开状态合并同版本的私有状态（sid 与手牌），与前端的做法相同。"""
+    state, private = previous, None
+    for packet in client.get_received():
+        if packet['name'] == 'private_state':
+            private = packet['args'][0]
+        elif packet['name'] == 'game_update' and private is not None and private['state_version'] == packet['args'][0]['state_version']:
+            state = {**packet['args'][0], **private}
+    return state
+
+
+def _run_room(room_id, num_events):
+    """在一个房间里驱动 num_events 次出牌/过牌事件，返回每次事件的延迟（秒）。"""
+    clients = [socketio.test_client(app, query_string=f'room={room_id}') for _ in range(2)]
+    states = [None, None]
+    for i, client in enumerate(clients):
+        client.emit('join_game', {'name': f'{room_id}-p{i}'})
+    host = clients[0]
+    host.emit('start_game')
+    states = [_latest_state(c, s) for c, s in zip(clients, states)]
+
+    latencies = []
+    while len(latencies) < num_events:
+        state = states[0]
+        if not state or not state['game_started']:
+            started = time.perf_counter()
+            host.emit('start_game')
+            latencies.append(time.perf_counter() - started)
+            states = [_latest_state(c, s) for c, s in zip(clients, states)]
+            continue
+
+        turn_index = 0 if state['current_turn_sid'] == state['my_sid'] else 1
+        client, my_state = clients[turn_index], states[turn_index]
+        is_lead = not my_state['last_played_cards'] or my_state['last_player_sid'] == my_state['my_sid']
+
+        started = time.perf_counter()
+        if is_lead:
+            client.emit('play_cards', {'cards': [my_state['my_hand'][0]]})
+        else:
+            client.emit('pass_turn')
+        latencies.append(time.perf_counter() - started)
+        states = [_latest_state(c, s) for c, s in zip(clients, states)]
+
+    for client in clients:
+        client.disconnect()
+    return latencies
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(room_counts, num_events, num_threads):
+    print(f"{'rooms':>6} {'events':>8} {'events/s':>10} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for num_rooms in room_counts:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            results = list(pool.map(lambda i: _run_room(f'bench{num_rooms}_{i}', num_events), range(num_rooms)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(lat for room_latencies in results for lat in room_latencies)
+        print(f"{num_rooms:>6} {len(latencies):>8} {len(latencies) / elapsed:>10.0f} "
+              f"{_percentile(latencies, 50) * 1000:>9.2f} {_percentile(latencies, 99) * 1000:>9.2f}")
+        rooms.collect_garbage(now=float('inf'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', default='1,10,50,100,200', help='逗号分隔的活跃房间数')
+    parser.add_argument('--events', type=int, default=200, help='每个房间驱动的事件数')
+    parser.add_argument('--threads', type=int, default=8, help='并发驱动房间的线程数')
+    args = parser.parse_args()
+    run([int(x) for x in args.rooms.split(',')], args.events, args.threads)
+
+
+if __name__ == '__main__':
+    main()
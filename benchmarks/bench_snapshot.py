@@ -0,0 +1,103 @@
+"""状态快照基准：数百个进行中房间的编码、写盘、读取恢复耗时与文件大小，并与 pickle 对比。
+
+房间取自按种子录制的对局中途局面（1~3 副牌、3~4 人），每个房间带房主与座位令牌。
+编码分冷（全部重新编码）与热（状态未变，复用缓存）两种；恢复包含读文件与重建 Game/Room。
+
+用法：
+    python benchmarks/bench_snapshot.py --rooms 100,300,1000 --check
+"""
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot  # noqa: E402
+from bench_suite import Fixture  # noqa: E402
+from room_manager import Room  # noqa: E402
+
+
+def _make_rooms(num_rooms, seed):
+    positions = [g for decks in (1, 2, 3) for players in (3, 4) for g in Fixture(decks, players, seed).positions]
+    rooms = []
+    for i in range(num_rooms):
+        room = Room(f'table{i}')
+        room.game = positions[i % len(positions)]
+        room.host_sid = room.game.player_order[0]
+        for sid in room.game.player_order:
+            room.issue_seat_token(sid)
+        rooms.append(room)
+    return rooms
+
+
+def _plain_state(room):
+    """pickle 对照组：同样的字段放进普通容器。"""
+    game = room.game
+    return (room.room_id, room.host_sid, room.seat_tokens, game.room_settings, game.game_started, game.state_version,
+            {sid: (p['name'], p['is_bot'], p['offline'], list(p['hand'])) for sid, p in game.players.items()},
+            game.player_order, game.current_turn_sid, game.last_player_sid, game.last_played_cards,
+            game.total_rank_counts, game.seen_rank_counts, game.events)
+
+
+def _timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _check(rooms, restored):
+    for room, copy in zip(rooms, restored):
+        assert copy.room_id == room.room_id and copy.host_sid == room.host_sid and copy.seat_tokens == room.seat_tokens
+        assert copy.game.events == room.game.events and copy.game.last_play_info == room.game.last_play_info
+        for sid in room.game.player_order:
+            assert copy.game.get_game_state(sid) == room.game.get_game_state(sid), (room.room_id, sid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', default='100,300,1000', help='逗号分隔的房间数')
+    parser.add_argument('--rounds', type=int, default=5, help='每项重复轮数（取中位数）')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--check', action='store_true', help='校验恢复后的每个房间与原房间一致')
+    args = parser.parse_args()
+
+    print(f"{'rooms':>6} {'KB':>8} {'B/room':>7} {'cold ms':>8} {'warm ms':>8} {'write ms':>9} {'restore ms':>11} "
+          f"{'pickle KB':>10} {'pickle ms':>10} {'unpickle ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot.bin')
+        for num_rooms in [int(x) for x in args.rooms.split(',')]:
+            rooms = _make_rooms(num_rooms, args.seed)
+
+            def encode_cold():
+                for room in rooms:
+                    room.snapshot_cache = None
+                return [snapshot.encode_room(room) for room in rooms]
+
+            cold = _timed(encode_cold, args.rounds)
+            warm = _timed(lambda: [snapshot.encode_room(room) for room in rooms], args.rounds)
+            blobs = [snapshot.encode_room(room) for room in rooms]
+            write = _timed(lambda: snapshot.write_snapshot(path, blobs), args.rounds)
+            size = os.path.getsize(path)
+            restore = _timed(lambda: snapshot.read_snapshot(path), args.rounds)
+            if args.check:
+                _check(rooms, snapshot.read_snapshot(path))
+
+            plain = [_plain_state(room) for room in rooms]
+            pickled = pickle.dumps(plain, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle_ms = _timed(lambda: pickle.dumps(plain, protocol=pickle.HIGHEST_PROTOCOL), args.rounds)
+            unpickle_ms = _timed(lambda: pickle.loads(pickled), args.rounds)
+            print(f"{num_rooms:>6} {size / 1024:>8.1f} {size / num_rooms:>7.0f} {cold:>8.2f} {warm:>8.2f} {write:>9.2f} "
+                  f"{restore:>11.2f} {len(pickled) / 1024:>10.1f} {pickle_ms:>10.2f} {unpickle_ms:>12.2f}")
+    if args.check:
+        print('校验通过：恢复后的房间与原房间一致')
+
+
+if __name__ == '__main__':
+    main()
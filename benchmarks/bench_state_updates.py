@@ -0,0 +1,55 @@
+"""状态推送基准：比较每步“完整快照”与“版本化增量”的字节数和序列化耗时（1~6 副牌）。
+
+用法：
+    python benchmarks/bench_state_updates.py --players 4 --moves 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _common import new_game, play_lowest_or_pass  # noqa: E402
+
+
+def run(num_players, num_moves, seed):
+    print(f"{'decks':>5} {'snapshot B':>11} {'delta B':>8} {'snapshot us':>12} {'delta us':>9}")
+    for num_decks in range(1, 7):
+        random.seed(seed)
+        game = new_game(num_players, {'num_decks': num_decks})
+
+        snapshot_bytes = delta_bytes = 0
+        snapshot_time = delta_time = 0.0
+        steps = 0
+        while steps < num_moves and play_lowest_or_pass(game) == 'OK':
+            started = time.perf_counter()
+            for sid in game.player_order:
+                snapshot_bytes += len(json.dumps(game.get_game_state(sid), ensure_ascii=False).encode())
+            snapshot_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            delta = game.get_state_delta()
+            for sid in game.player_order:
+                delta_bytes += len(json.dumps(delta, ensure_ascii=False).encode())
+            delta_time += time.perf_counter() - started
+            steps += 1
+
+        steps = max(1, steps)
+        print(f"{num_decks:>5} {snapshot_bytes / steps:>11.0f} {delta_bytes / steps:>8.0f} "
+              f"{snapshot_time / steps * 1e6:>12.1f} {delta_time / steps * 1e6:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--moves', type=int, default=200, help='每种副牌数测量的步数')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run(args.players, args.moves, args.seed)
+
+
+if __name__ == '__main__':
+    main()
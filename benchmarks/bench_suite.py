@@ -0,0 +1,295 @@
+"""规则、AI 与广播热点路径的基准套件：按种子发牌，覆盖 1~6 副牌、2~8 名玩家，结果输出为 JSON。
+
+测量项（每项在每种 副牌数×人数 组合下单独计时，取多轮的中位数，单位微秒/次）：
+    get_play_info   Game._get_play_info（出牌牌型识别）
+    validate_play   Game._validate_play（与上家比较）
+    play_turn       Game.play_turn / pass_turn（按录制好的走法重放整局）
+    start_game      Game.start_game（洗牌与发牌）
+    game_state      Game.get_game_state + json 序列化（每个玩家一份）
+    analyze_hand    BotPlayer._analyze_hand_uncached（不经共享缓存）
+    decide_move     BotPlayer.decide_move（不含 AI 构造，每轮清空共享缓存）
+
+对局走法由简单的确定性策略生成（领出最小的单张，跟牌用刚好更大的单张，否则过牌），
+保证同一种子在任何机器上得到相同的局面。
+
+用法：
+    python benchmarks/bench_suite.py --out baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 0.15
+    python benchmarks/bench_suite.py --decks 1,2 --players 3,4 --cases play_turn,decide_move
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_logic import BOT_CACHES, BotPlayer  # noqa: E402
+from cards import CARD_VALUE  # noqa: E402
+from game_logic import Game, HandType  # noqa: E402
+
+SUITE_VERSION = 1
+# 每个组合录制的对局数，以及从中抽取的局面数
+GAMES_PER_CONFIG = 3
+POSITIONS_PER_GAME = 4
+
+
+# --- 确定性的局面生成 ---
+
+def _new_game(num_decks, num_players):
+    game = Game()
+    game.update_room_settings({'num_decks': num_decks})
+    for i in range(num_players):
+        game.add_player(f'p{i}', f'玩家{i}', is_bot=True)
+    return game
+
+
+def _driver_move(game):
+    """领出最小的单张；跟单张时出刚好更大的一张，其余情况过牌。"""
+    sid = game.current_turn_sid
+    hand = game.players[sid]['hand']
+    if not game.last_played_cards or game.last_player_sid == sid:
+        return [next(iter(hand))]
+    if game.last_play_info.hand_type == HandType.SINGLE:
+        for card in hand:
+            if CARD_VALUE[card] > game.last_play_info.value:
+                return [card]
+    return None
+
+
+def _record_game(seed, num_decks, num_players):
+    """从种子打完整局，返回走法序列 [(sid, cards 或 None)]。"""
+    game = _new_game(num_decks, num_players)
+    game.start_game(seed=seed)
+    moves = []
+    while game.game_started:
+        sid, cards = game.current_turn_sid, _driver_move(game)
+        moves.append((sid, cards))
+        if cards is None:
+            game.pass_turn(sid)
+        else:
+            game.play_turn(sid, cards)
+    return moves
+
+
+def _replay(seed, num_decks, num_players, moves):
+    game = _new_game(num_decks, num_players)
+    game.start_game(seed=seed)
+    for sid, cards in moves:
+        if cards is None:
+            game.pass_turn(sid)
+        else:
+            game.play_turn(sid, cards)
+    return game
+
+
+class Fixture:
+    """一个 副牌数×人数 组合下的全部输入：录制的对局、抽样局面、手牌与候选出牌。"""
+
+    def __init__(self, num_decks, num_players, seed):
+        rng = random.Random(f'{seed}-{num_decks}-{num_players}')
+        self.num_decks, self.num_players = num_decks, num_players
+        self.games = []
+        self.positions = []
+        for _ in range(GAMES_PER_CONFIG):
+            game_seed = rng.randrange(1 << 30)
+            moves = _record_game(game_seed, num_decks, num_players)
+            self.games.append((game_seed, moves))
+            for k in sorted(rng.sample(range(len(moves)), min(POSITIONS_PER_GAME, len(moves)))):
+                self.positions.append(_replay(game_seed, num_decks, num_players, moves[:k]))
+
+        self.hands = [list(p['hand']) for game in self.positions for p in game.players.values()]
+        # 候选出牌：从手牌中抽取的随机子集（大多不合法）和按点数凑出的同点数组合
+        self.plays = []
+        for hand in self.hands:
+            for size in (1, 2, 3, 4, 5, 6, 8):
+                if len(hand) >= size:
+                    self.plays.append(rng.sample(hand, size))
+            ordered = sorted(hand)
+            self.plays.extend(ordered[i:i + 2] for i in range(0, len(ordered) - 1, 3))
+
+
+# --- 各测量项：返回 (每轮要执行的可调用对象, 每轮包含的操作数) ---
+
+def case_get_play_info(fx):
+    game = fx.positions[0]
+    plays = fx.plays
+    return (lambda: [game._get_play_info(p) for p in plays]), len(plays)
+
+
+def case_validate_play(fx):
+    game = fx.positions[-1]
+    plays = [(p, game._get_play_info(p)) for p in fx.plays]
+    return (lambda: [game._validate_play(p, info) for p, info in plays]), len(plays)
+
+
+def case_play_turn(fx):
+    games = [(_new_game(fx.num_decks, fx.num_players), seed, moves) for seed, moves in fx.games]
+    ops = sum(len(moves) for _, _, moves in games)
+
+    def run():
+        elapsed = 0.0
+        for game, seed, moves in games:
+            game.game_started = False
+            game.start_game(seed=seed)
+            started = time.perf_counter()
+            for sid, cards in moves:
+                if cards is None:
+                    game.pass_turn(sid)
+                else:
+                    game.play_turn(sid, cards)
+            elapsed += time.perf_counter() - started
+        return elapsed
+    return run, ops
+
+
+def case_start_game(fx):
+    game = _new_game(fx.num_decks, fx.num_players)
+    seeds = [seed for seed, _ in fx.games] * 5
+
+    def run():
+        for seed in seeds:
+            game.game_started = False
+            game.start_game(seed=seed)
+    return run, len(seeds)
+
+
+def case_game_state(fx):
+    positions = fx.positions
+
+    def run():
+        for game in positions:
+            for sid in game.player_order:
+                json.dumps(game.get_game_state(sid), ensure_ascii=False)
+    return run, sum(len(g.player_order) for g in positions)
+
+
+def case_analyze_hand(fx):
+    game = fx.positions[0]
+    sid = game.player_order[0]
+    bot = BotPlayer(list(game.players[sid]['hand']), game.get_game_state(sid, encode_cards=False), game)
+    hands = fx.hands
+    return (lambda: [bot._analyze_hand_uncached(h) for h in hands]), len(hands)
+
+
+def case_decide_move(fx):
+    positions = [g for g in fx.positions if g.game_started]
+
+    def run():
+        # 每轮都从空的共享缓存开始，测的是决策本身的计算量
+        for cache in BOT_CACHES.values():
+            cache.clear()
+        elapsed = 0.0
+        for game in positions:
+            sid = game.current_turn_sid
+            bot = BotPlayer(list(game.players[sid]['hand']), game.get_game_state(sid, encode_cards=False), game)
+            started = time.perf_counter()
+            bot.decide_move()
+            elapsed += time.perf_counter() - started
+        return elapsed
+    return run, len(positions)
+
+
+CASES = {
+    'get_play_info': case_get_play_info,
+    'validate_play': case_validate_play,
+    'play_turn': case_play_turn,
+    'start_game': case_start_game,
+    'game_state': case_game_state,
+    'analyze_hand': case_analyze_hand,
+    'decide_move': case_decide_move,
+}
+
+
+def measure(run, ops, rounds):
+    """执行 rounds 轮，返回每次操作耗时（微秒）的中位数与最小值；run 返回数值时以其作为本轮计时。"""
+    per_op = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = run()
+        elapsed = result if isinstance(result, float) else time.perf_counter() - started
+        per_op.append(elapsed / max(1, ops) * 1e6)
+    return {'median_us': statistics.median(per_op), 'min_us': min(per_op), 'ops': ops}
+
+
+def run_suite(deck_counts, player_counts, case_names, rounds, seed):
+    results = {}
+    for num_decks in deck_counts:
+        for num_players in player_counts:
+            fx = Fixture(num_decks, num_players, seed)
+            for name in case_names:
+                key = f'{name}/d{num_decks}p{num_players}'
+                try:
+                    results[key] = measure(*CASES[name](fx), rounds)
+                except Exception as exc:  # 记录下来而不是中断整个套件
+                    results[key] = {'error': f'{type(exc).__name__}: {exc}'}
+                entry = results[key]
+                print(f"{key:<28} " + (f"{entry['median_us']:>12.2f} us" if 'error' not in entry else entry['error']),
+                      file=sys.stderr)
+    return {
+        'suite_version': SUITE_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'rounds': rounds,
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """逐项比较中位数，返回变慢超过 threshold（比例）的项目列表，并打印对比表。"""
+    regressions = []
+    print(f"{'case':<28} {'baseline us':>12} {'current us':>12} {'ratio':>7}")
+    for key, entry in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None or 'error' in base or 'error' in entry:
+            status = entry.get('error') or (base or {}).get('error') or '无基线'
+            print(f"{key:<28} {status}")
+            continue
+        ratio = entry['median_us'] / base['median_us'] if base['median_us'] else float('inf')
+        flag = '  <-- 变慢' if ratio > 1 + threshold else ('  (变快)' if ratio < 1 - threshold else '')
+        if ratio > 1 + threshold:
+            regressions.append(key)
+        print(f"{key:<28} {base['median_us']:>12.2f} {entry['median_us']:>12.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--decks', default='1,2,3,4,5,6', help='逗号分隔的副牌数')
+    parser.add_argument('--players', default='2,3,4,5,6,7,8', help='逗号分隔的玩家人数')
+    parser.add_argument('--cases', default=','.join(CASES), help=f'逗号分隔的测量项，可选: {", ".join(CASES)}')
+    parser.add_argument('--rounds', type=int, default=5, help='每项重复轮数（取中位数）')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--out', help='把结果写入该 JSON 文件（默认输出到标准输出）')
+    parser.add_argument('--compare', metavar='BASELINE', help='与已保存的基线 JSON 比较，存在变慢项时以状态码 1 退出')
+    parser.add_argument('--threshold', type=float, default=0.15, help='判定变慢的比例阈值')
+    args = parser.parse_args()
+
+    case_names = [c.strip() for c in args.cases.split(',') if c.strip()]
+    unknown = [c for c in case_names if c not in CASES]
+    if unknown:
+        parser.error(f'未知的测量项: {", ".join(unknown)}')
+
+    report = run_suite([int(x) for x in args.decks.split(',')], [int(x) for x in args.players.split(',')],
+                       case_names, args.rounds, args.seed)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"变慢 {len(regressions)} 项（阈值 {args.threshold:.0%}）")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""事件编码基准：JSON 与 wire 二进制编码的每步字节数、服务端编码耗时和浏览器端解码耗时（1~6 副牌）。
+
+字节数按 Socket.IO 实际发出的帧计算：JSON 为事件包的文本；二进制为带占位符的文本头加二进制附件。
+每步编码一份公开状态和每个玩家各一份私有状态（手牌），增量所有人共用一份。解码耗时由 node 分别运行 JSON.parse
+与 static/js/wire.js 得到（需要 node，没有时跳过这两列）。
+
+用法：
+    python benchmarks/bench_wire.py --players 4 --moves 200
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _common import new_game, play_lowest_or_pass  # noqa: E402
+import wire  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 二进制事件的文本头，如 51-["game_update",{"_placeholder":true,"num":0}]
+_BINARY_HEADER = len('51-["game_update",{"_placeholder":true,"num":0}]')
+_PRIVATE_HEADER = len('51-["private_state",{"_placeholder":true,"num":0}]')
+_NODE_TIMER = r'''
+const fs = require('fs');
+const NetPDKWire = require(process.argv[1]);
+const { json, binary, players, repeat } = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const decode = { state: b => NetPDKWire.decodeState(b), delta: b => NetPDKWire.decodeDelta(b, players) };
+// 先空跑一轮让 JIT 预热，只计稳定后的耗时
+const time = (items, fn) => { for (let r = 0; r < repeat; r++) items.forEach(fn);
+                              const t = process.hrtime.bigint(); for (let r = 0; r < repeat; r++) items.forEach(fn);
+                              return Number(process.hrtime.bigint() - t) / 1e3 / repeat / items.length; };
+const result = {};
+for (const kind of ['state', 'delta']) {
+    const buffers = binary[kind].map(b => Buffer.from(b, 'base64'));
+    result[kind] = [time(json[kind], s => JSON.parse(s)), time(buffers, decode[kind])];
+}
+process.stdout.write(JSON.stringify(result));
+'''
+
+
+def _json_frame(event, data):
+    return json.dumps([event, data], separators=(',', ':'))
+
+
+def measure(num_decks, num_players, num_moves, seed):
+    random.seed(seed)
+    game = new_game(num_players, {'num_decks': num_decks})
+    stats = {key: 0.0 for key in ('state_json', 'state_bin', 'delta_json', 'delta_bin',
+                                  'state_json_us', 'state_bin_us', 'delta_json_us', 'delta_bin_us')}
+    samples = {'json': {'state': [], 'delta': []}, 'binary': {'state': [], 'delta': []}}
+    steps = 0
+    while steps < num_moves and play_lowest_or_pass(game) == 'OK':
+        message = f'第 {steps} 步'
+        started = time.perf_counter()
+        state = game.get_public_state()
+        state.update(host_sid='p0', room_id='bench', message=message)
+        frame = _json_frame('game_update', state)
+        private_frames = [_json_frame('private_state', game.get_private_state(sid)) for sid in game.player_order]
+        stats['state_json_us'] += time.perf_counter() - started
+        started = time.perf_counter()
+        payload = wire.encode_public_state(game, 'p0', 'bench', message)
+        private_payloads = [wire.encode_private_state(game, sid) for sid in game.player_order]
+        stats['state_bin_us'] += time.perf_counter() - started
+        stats['state_json'] += len(frame.encode()) * num_players + sum(len(f.encode()) for f in private_frames)
+        stats['state_bin'] += ((_BINARY_HEADER + len(payload)) * num_players
+                               + sum(_PRIVATE_HEADER + len(p) for p in private_payloads))
+
+        started = time.perf_counter()
+        delta = game.get_state_delta()
+        delta['message'] = message
+        delta_frame = _json_frame('game_delta', delta)
+        stats['delta_json_us'] += time.perf_counter() - started
+        started = time.perf_counter()
+        delta_payload = wire.encode_delta(game, message)
+        stats['delta_bin_us'] += time.perf_counter() - started
+        stats['delta_json'] += len(delta_frame.encode()) * num_players
+        stats['delta_bin'] += (_BINARY_HEADER - 1 + len(delta_payload)) * num_players
+
+        if steps % 5 == 0:
+            samples['json']['state'].append(frame[len('["game_update",'):-1])
+            samples['binary']['state'].append(payload)
+            samples['json']['delta'].append(delta_frame[len('["game_delta",'):-1])
+            samples['binary']['delta'].append(delta_payload)
+        steps += 1
+
+    steps = max(1, steps)
+    per_step = {key: value / steps for key, value in stats.items()}
+    for key in ('state_json_us', 'state_bin_us'):
+        per_step[key] *= 1e6 / num_players
+    for key in ('delta_json_us', 'delta_bin_us'):
+        per_step[key] *= 1e6
+    players = game.get_public_state()['players']
+    return per_step, samples, players
+
+
+def node_decode_us(samples, players, repeat):
+    node = shutil.which('node')
+    if node is None:
+        return None
+    data = {'json': samples['json'], 'players': players, 'repeat': repeat,
+            'binary': {kind: [base64.b64encode(p).decode() for p in items] for kind, items in samples['binary'].items()}}
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        path = f.name
+    try:
+        output = subprocess.run([node, '-e', _NODE_TIMER, os.path.join(ROOT, 'static', 'js', 'wire.js'), path],
+                                check=True, capture_output=True, text=True).stdout
+    finally:
+        os.unlink(path)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--moves', type=int, default=200, help='每种副牌数测量的步数')
+    parser.add_argument('--repeat', type=int, default=500, help='node 解码计时的重复次数')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print('每步字节数为发给全部玩家的合计（状态含公开与私有两部分）；编码耗时按玩家平摊，解码耗时为单条公开消息（us）')
+    print(f"{'decks':>5} {'state B json/bin':>17} {'delta B json/bin':>17} {'enc state':>13} {'enc delta':>11} "
+          f"{'dec state':>13} {'dec delta':>11}")
+    for num_decks in range(1, 7):
+        s, samples, players = measure(num_decks, args.players, args.moves, args.seed)
+        decoded = node_decode_us(samples, players, args.repeat)
+        dec_state = f"{decoded['state'][0]:.1f}/{decoded['state'][1]:.1f}" if decoded else '-'
+        dec_delta = f"{decoded['delta'][0]:.1f}/{decoded['delta'][1]:.1f}" if decoded else '-'
+        print(f"{num_decks:>5} {s['state_json']:>8.0f}/{s['state_bin']:<8.0f} {s['delta_json']:>8.0f}/{s['delta_bin']:<8.0f} "
+              f"{s['state_json_us']:>6.1f}/{s['state_bin_us']:<6.1f} {s['delta_json_us']:>5.1f}/{s['delta_bin_us']:<5.1f} "
+              f"{dec_state:>13} {dec_delta:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# bot_scheduler.py
+import random
+import threading
+import time
+
+DEFAULT_THINK_TIME = (0.8, 1.5)
+# 思考时间短于此值（如零延迟配置）时，AI仍至少有这么多计算时间
+DEFAULT_DECISION_BUDGET = 0.3
+
+
+def parse_think_time(raw, default=DEFAULT_THINK_TIME):
+    """解析思考时间配置：'0' 表示零延迟，'0.5' 表示固定值，'0.8,1.5' 表示随机区间。"""
+    if raw is None or str(raw).strip() == '':
+        return default
+    parts = [max(0.0, float(p)) for p in str(raw).split(',') if p.strip()]
+    if not parts:
+        return default
+    low, high = (parts[0], parts[0]) if len(parts) == 1 else (parts[0], parts[1])
+    return (min(low, high), max(low, high))
+
+
+class BotTurnScheduler:
+    """
+    把机器人回合放到后台任务里排队执行，而不是在广播中递归调用。
+
+    每个房间同一时间最多只有一个机器人任务：任务在房间锁内复制一份局面（capture），
+    同时把该座位的AI实例从房间取出归自己独占，放开锁后在副本上带截止时间做决策并等满思考时间的剩余部分，
+    再回到锁内落子并把AI实例放回（restore）；期间局面变了或任务已被作废（cancel）则丢弃这次决策和AI实例，
+    因此被作废的旧任务与新任务不会同时改动同一个AI。决策期间同房间的其他事件不会被挡住；
+    落子后若仍轮到机器人则在同一个任务里继续循环，因此调用栈深度恒定，
+    人类玩家的事件也能在两次机器人落子之间插入执行。
+
+    截止时间 = 开始时刻 + max(本回合思考时间, decision_budget)：实际计算耗时计入思考时间，
+    不再叠加在等待之上，机器人每一手的延迟不超过这个上限（外加一点收尾开销）。
+    """
+
+    def __init__(self, start_task, sleep, current_bot, capture, decide, restore, run_turn,
+                 think_time=DEFAULT_THINK_TIME, decision_budget=DEFAULT_DECISION_BUDGET):
+        self._start_task = start_task
+        self._sleep = sleep
+        self._current_bot = current_bot
+        self._capture = capture
+        self._decide = decide
+        self._restore = restore
+        self._run_turn = run_turn
+        self.think_time = think_time
+        self.decision_budget = decision_budget
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._active = {}
+
+    def _think_delay(self):
+        low, high = self.think_time
+        return low if low == high else random.uniform(low, high)
+
+    def schedule(self, room):
+        """如果当前轮到机器人且房间内没有在跑的机器人任务，则启动一个。调用方需持有房间锁。"""
+        if self._current_bot(room) is None:
+            return False
+        with self._lock:
+            if room.room_id in self._active:
+                return False
+            generation = self._generations.get(room.room_id, 0)
+            self._active[room.room_id] = generation
+        self._start_task(self._run, room, generation)
+        return True
+
+    def cancel(self, room):
+        """作废房间内正在排队的机器人任务（房间回收或有玩家离开时调用）。"""
+        with self._lock:
+            self._generations[room.room_id] = self._generations.get(room.room_id, 0) + 1
+            self._active.pop(room.room_id, None)
+
+    def forget(self, room):
+        """房间被回收后彻底清理其调度状态。"""
+        self.cancel(room)
+        with self._lock:
+            self._generations.pop(room.room_id, None)
+
+    def is_current(self, room, generation):
+        with self._lock:
+            return self._active.get(room.room_id) == generation and self._generations.get(room.room_id, 0) == generation
+
+    def _release(self, room, generation):
+        with self._lock:
+            if self._active.get(room.room_id) == generation:
+                del self._active[room.room_id]
+
+    def _run(self, room, generation):
+        try:
+            while True:
+                delay = self._think_delay()
+                started = time.perf_counter()
+                with room.lock:
+                    if not self.is_current(room, generation):
+                        return
+                    bot_sid = self._current_bot(room)
+                    if bot_sid is None:
+                        self._release(room, generation)
+                        return
+                    version = room.game.state_version
+                    view = self._capture(room, bot_sid)
+                # 在锁外就局面副本决策并等完思考时间的剩余部分，期间其他事件可以正常处理
+                move = self._decide(room, view, bot_sid, started + max(delay, self.decision_budget))
+                self._sleep(max(0.0, delay - (time.perf_counter() - started)))
+                with room.lock:
+                    if not self.is_current(room, generation):
+                        return
+                    if self._current_bot(room) == bot_sid and room.game.state_version == version:
+                        self._restore(room, view)
+                        self._run_turn(room, bot_sid, move)
+                    if self._current_bot(room) is None:
+                        self._release(room, generation)
+                        return
+        except Exception:
+            # 出错时释放名额，避免房间永远卡在“机器人任务进行中”
+            self._release(room, generation)
+            raise
@@ -0,0 +1,176 @@
+# broker.py
+"""
+多进程部署用的本地消息中转（Redis 等消息队列的替身）与对应的 Socket.IO 客户端管理器。
+
+中转协议：TCP 上的 4 字节大端长度 + 负载帧。连接建立后先发 1 字节角色：
+b'P' 发布者（只发帧），b'S' 订阅者（只收帧）；任何发布者发来的帧原样转发给全部订阅者。
+
+用法：
+    python broker.py --port 5100
+    NETPDK_MESSAGE_QUEUE=netpdk://127.0.0.1:5100 python server.py --port 5001
+"""
+import argparse
+import asyncio
+import pickle
+import socket
+import struct
+import threading
+import time
+from urllib.parse import urlsplit
+
+import socketio
+
+SCHEME = 'netpdk'
+ROLE_PUBLISHER = b'P'
+ROLE_SUBSCRIBER = b'S'
+_FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+RECONNECT_DELAY = 0.5
+
+
+# --- 中转进程 ---
+
+class Broker:
+    """单进程的发布/订阅中转：不解析负载，只做帧级转发。"""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.frames = 0
+
+    async def _handle(self, reader, writer):
+        try:
+            role = await reader.readexactly(1)
+            if role == ROLE_SUBSCRIBER:
+                self.subscribers.add(writer)
+                # 订阅者不会再发数据，读到 EOF 即视为断开
+                await reader.read()
+            elif role == ROLE_PUBLISHER:
+                while True:
+                    header = await reader.readexactly(_FRAME_HEADER.size)
+                    (size,) = _FRAME_HEADER.unpack(header)
+                    if size > MAX_FRAME_SIZE:
+                        break
+                    frame = header + await reader.readexactly(size)
+                    self.frames += 1
+                    for subscriber in list(self.subscribers):
+                        if subscriber.is_closing():
+                            self.subscribers.discard(subscriber)
+                        else:
+                            subscriber.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self._handle, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+def run_broker(host='127.0.0.1', port=0, ready=None):
+    """阻塞运行中转；ready(port) 在开始监听后被调用（port=0 时可据此得知实际端口）。"""
+    asyncio.run(Broker().serve(host, port, ready))
+
+
+# --- Socket.IO 客户端管理器 ---
+
+def parse_broker_url(url):
+    parts = urlsplit(url)
+    if parts.scheme != SCHEME or not parts.hostname or not parts.port:
+        raise ValueError(f'消息中转地址应形如 {SCHEME}://host:port，实际为 {url!r}')
+    return parts.hostname, parts.port
+
+
+def _connect(address, role):
+    sock = socket.create_connection(address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.sendall(role)
+    return sock
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('消息中转连接已关闭')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class BrokerManager(socketio.PubSubManager):
+    """
+    经由本地中转在多个 worker 之间同步 Socket.IO 事件。
+
+    房间按房间号固定分片到某个 worker，房间内的连接都在本进程，因此发往本地已有成员的房间
+    （以及单个本地连接）的事件直接投递，不经过中转；只有目标不在本进程时才发布出去。
+    否则每条广播都要在全部 N 个 worker 上各反序列化一次，扩容反而拖慢每个 worker。
+    """
+    name = 'netpdk'
+
+    def __init__(self, url, channel='flask-socketio', write_only=False, logger=None):
+        self.address = parse_broker_url(url)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, **kwargs):
+        if not kwargs.get('ignore_queue') and self._has_local_participants(namespace or '/', room):
+            kwargs['ignore_queue'] = True
+        return super().emit(event, data, namespace=namespace, room=room, skip_sid=skip_sid,
+                            callback=callback, **kwargs)
+
+    def _has_local_participants(self, namespace, room):
+        if room is None or self.server is None:
+            return False
+        return bool(self.rooms.get(namespace, {}).get(room))
+
+    def _publish(self, data):
+        frame = pickle.dumps({'channel': self.channel, 'data': data})
+        frame = _FRAME_HEADER.pack(len(frame)) + frame
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = _connect(self.address, ROLE_PUBLISHER)
+                    self._publisher.sendall(frame)
+                    return
+                except OSError:
+                    self._publisher = None
+                    if attempt:
+                        raise
+
+    def _listen(self):
+        while True:
+            try:
+                sock = _connect(self.address, ROLE_SUBSCRIBER)
+            except OSError:
+                time.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                while True:
+                    (size,) = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+                    message = pickle.loads(_recv_exactly(sock, size))
+                    if message.get('channel') == self.channel:
+                        yield message['data']
+            except (OSError, pickle.UnpicklingError):
+                self._get_logger().warning('消息中转连接中断，稍后重连')
+                sock.close()
+                time.sleep(RECONNECT_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NetPDK 本地消息中转')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5100)
+    args = parser.parse_args()
+    run_broker(args.host, args.port, ready=lambda port: print(f'消息中转已启动: {SCHEME}://{args.host}:{port}', flush=True))
+
+
+if __name__ == '__main__':
+    main()
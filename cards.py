@@ -0,0 +1,173 @@
+# cards.py
+"""
+紧凑的牌面编码。
+
+每张牌用一个小整数 ID 表示：普通牌 ID = 点数序号 * 4 + 花色序号（0~51），小王 52，大王 53。
+ID 的大小顺序与牌面点数顺序一致，因此对 ID 排序即是按点数理牌。
+字符串形式（如 '♠10'、'小王'）只在与客户端通信时使用。
+"""
+
+CARD_VALUES = {
+    '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
+    'J': 11, 'Q': 12, 'K': 13, 'A': 14, '2': 15,
+    '小王': 16, '大王': 17
+}
+SUITS = ['♠', '♥', '♣', '♦']
+RANKS = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2']
+
+NUM_RANKS = 15            # 13 个普通点数 + 小王 + 大王
+NUM_CARD_IDS = 54
+SMALL_JOKER = 52
+BIG_JOKER = 53
+MIN_VALUE = CARD_VALUES['3']
+
+# ID -> 字符串 / 点数序号(0~14) / 点数值(3~17)
+CARD_NAMES = tuple([f"{suit}{rank}" for rank in RANKS for suit in SUITS] + ['小王', '大王'])
+CARD_RANK = tuple([i // 4 for i in range(52)] + [13, 14])
+CARD_VALUE = tuple(rank + MIN_VALUE for rank in CARD_RANK)
+CARD_IDS = {name: card_id for card_id, name in enumerate(CARD_NAMES)}
+
+# 点数序号 -> 该点数下的全部 ID
+RANK_CARD_IDS = tuple([tuple(range(rank * 4, rank * 4 + 4)) for rank in range(13)] + [(SMALL_JOKER,), (BIG_JOKER,)])
+
+STANDARD_DECK = tuple(range(52))
+JOKERS = (SMALL_JOKER, BIG_JOKER)
+
+
+def value_to_rank(value):
+    return value - MIN_VALUE
+
+
+def rank_to_value(rank):
+    return rank + MIN_VALUE
+
+
+def parse_cards(names):
+    """把客户端传来的牌面字符串转为 ID 列表；含有无法识别的牌时返回 None。"""
+    try:
+        return [CARD_IDS[name] for name in names]
+    except (KeyError, TypeError):
+        return None
+
+
+def card_names(cards):
+    return [CARD_NAMES[c] for c in cards]
+
+
+def rank_counts(cards):
+    """统计一组牌在 15 个点数上的张数。"""
+    counts = [0] * NUM_RANKS
+    for c in cards:
+        counts[CARD_RANK[c]] += 1
+    return counts
+
+
+class Hand:
+    """
+    以“每个 ID 的张数”存储的手牌，多副牌时同一 ID 可以出现多次。
+
+    迭代时总是按点数从小到大输出；判断是否持有、加入和移除一张牌都是 O(1)。
+    同时维护每个点数的张数，供牌型分析直接使用。
+    """
+
+    __slots__ = ('_counts', 'rank_counts', '_size')
+
+    def __init__(self, cards=()):
+        self._counts = [0] * NUM_CARD_IDS
+        self.rank_counts = [0] * NUM_RANKS
+        self._size = 0
+        for c in cards:
+            self.add(c)
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __contains__(self, card):
+        return 0 <= card < NUM_CARD_IDS and self._counts[card] > 0
+
+    def __iter__(self):
+        for card, n in enumerate(self._counts):
+            for _ in range(n):
+                yield card
+
+    def __eq__(self, other):
+        if isinstance(other, Hand):
+            return self._counts == other._counts
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Hand({' '.join(self.names())})"
+
+    def count(self, card):
+        return self._counts[card]
+
+    def copy(self):
+        clone = Hand.__new__(Hand)
+        clone._counts = list(self._counts)
+        clone.rank_counts = list(self.rank_counts)
+        clone._size = self._size
+        return clone
+
+    def card_counts(self):
+        """每个牌 ID 的张数（长度 NUM_CARD_IDS），用于紧凑序列化。"""
+        return self._counts
+
+    @classmethod
+    def from_card_counts(cls, counts):
+        hand = cls.__new__(cls)
+        c = hand._counts = list(counts)
+        # 牌 ID 按点数每 4 张一组排列，大小王各占一个 ID
+        hand.rank_counts = [a + b + d + e for a, b, d, e in zip(c[0:52:4], c[1:52:4], c[2:52:4], c[3:52:4])] + c[52:]
+        hand._size = sum(c)
+        return hand
+
+    def add(self, card):
+        self._counts[card] += 1
+        self.rank_counts[CARD_RANK[card]] += 1
+        self._size += 1
+
+    def remove(self, card):
+        if not self._counts[card]:
+            raise ValueError(f"手牌中没有 {CARD_NAMES[card]}")
+        self._counts[card] -= 1
+        self.rank_counts[CARD_RANK[card]] -= 1
+        self._size -= 1
+
+    def contains_all(self, cards):
+        """判断多重集合 cards 是否完全包含在手牌中。"""
+        needed = {}
+        for c in cards:
+            if not 0 <= c < NUM_CARD_IDS:
+                return False
+            needed[c] = needed.get(c, 0) + 1
+        return all(self._counts[c] >= n for c, n in needed.items())
+
+    def remove_all(self, cards):
+        for c in cards:
+            self.remove(c)
+
+    def take_rank(self, rank, n):
+        """从某个点数中取出 n 张牌（按花色顺序），返回取出的 ID 列表。"""
+        taken = []
+        for card in RANK_CARD_IDS[rank]:
+            while self._counts[card] and len(taken) < n:
+                self.remove(card)
+                taken.append(card)
+            if len(taken) == n:
+                break
+        return taken
+
+    def peek_rank(self, rank, n):
+        """与 take_rank 相同，但不修改手牌。"""
+        picked = []
+        for card in RANK_CARD_IDS[rank]:
+            picked.extend([card] * min(self._counts[card], n - len(picked)))
+            if len(picked) == n:
+                break
+        return picked
+
+    def names(self):
+        return [CARD_NAMES[c] for c in self]
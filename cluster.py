@@ -0,0 +1,171 @@
+# cluster.py
+"""
+多进程部署：同一端口后面运行 N 个 worker 进程，按房间号分片并粘性路由。
+
+- 路由进程（本模块的 Router）对外监听端口，读出每个连接首个请求的 ?room= 参数，
+  按 shard_for(房间号) 把整条 TCP 连接转发给固定的 worker；Socket.IO 的每个请求都带房间号，
+  因此长轮询、WebSocket 升级和后续轮询总是落在同一个 worker 上，牌局状态无需跨进程共享。
+- 普通 HTTP 请求会被改写为 Connection: close，避免浏览器复用的长连接把别的房间带到错误的 worker。
+- worker 之间通过 broker.py 的本地中转（或 NETPDK_MESSAGE_QUEUE 指定的 Redis 等）同步跨分片的 Socket.IO 事件。
+
+由 server.py --workers N 调用，一般不直接运行。
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+from room_manager import normalize_room_id
+
+MAX_HEADER_SIZE = 64 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+WORKER_START_TIMEOUT = 30
+_HOP_HEADERS = (b'connection', b'keep-alive', b'x-forwarded-for')
+
+
+def shard_for(room_id, num_workers):
+    """房间号 -> worker 下标；用 crc32 而不是 hash()，保证各进程、每次启动结果一致。"""
+    return zlib.crc32(normalize_room_id(room_id).encode('utf-8')) % num_workers
+
+
+def _room_of_target(target):
+    values = parse_qs(urlsplit(target).query).get('room')
+    return values[0] if values else None
+
+
+def _rewrite_head(head, client_ip, websocket):
+    """去掉逐跳头与客户端伪造的 X-Forwarded-For，补上真实来源；非 WebSocket 请求强制一次一连接。"""
+    lines = head.rstrip(b'\r\n').split(b'\r\n')
+    kept = [lines[0]] + [line for line in lines[1:] if line.split(b':', 1)[0].strip().lower() not in _HOP_HEADERS]
+    kept.append(b'X-Forwarded-For: ' + client_ip.encode('ascii'))
+    kept.append(b'Connection: Upgrade' if websocket else b'Connection: close')
+    return b'\r\n'.join(kept) + b'\r\n\r\n'
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+
+
+class Router:
+    """对外监听的反向代理：按房间号把连接整条转发给对应的 worker。"""
+
+    def __init__(self, workers):
+        self.workers = list(workers)
+
+    async def _handle(self, reader, writer):
+        upstream_writer = None
+        try:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            request_line = head.split(b'\r\n', 1)[0].decode('latin-1').split(' ')
+            if len(request_line) != 3:
+                return
+            lowered = head.lower()
+            websocket = b'upgrade: websocket' in lowered or b'upgrade:websocket' in lowered
+            worker = self.workers[shard_for(_room_of_target(request_line[1]), len(self.workers))]
+            client_ip = (writer.get_extra_info('peername') or ('',))[0]
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection(*worker)
+            except OSError:
+                writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                return
+            upstream_writer.write(_rewrite_head(head, client_ip, websocket))
+            # 任一方向结束即关闭两端：HTTP 请求在 worker 发完响应并断开时结束，WebSocket 在任一端关闭时结束
+            tasks = [asyncio.ensure_future(_pipe(reader, upstream_writer)),
+                     asyncio.ensure_future(_pipe(upstream_reader, writer))]
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+        finally:
+            for w in (writer, upstream_writer):
+                if w is not None:
+                    w.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_SIZE)
+        async with server:
+            await server.serve_forever()
+
+
+def _wait_for_port(host, port, process, timeout=WORKER_START_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def _interrupt(signum, frame):
+    # 把 SIGTERM 转成 KeyboardInterrupt，与 Ctrl+C 走同一条清理路径
+    raise KeyboardInterrupt
+
+
+def worker_snapshot_path(path, index):
+    """每个 worker 一个快照文件（回放归档同理）；分片规则不变时，重启后各房间仍落在写下它的 worker 上。"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{index}{ext}'
+
+
+def run_cluster(host, port, num_workers, async_mode, message_queue=None, access_log=False, snapshot='', replay_archive=''):
+    """启动中转（未指定外部消息队列时）与 N 个 worker，然后在前台运行路由，退出时结束全部子进程。"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    worker_host = '127.0.0.1'
+    worker_ports = [port + 1 + i for i in range(num_workers)]
+    processes = []
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        if message_queue is None:
+            broker_port = port + 1 + num_workers
+            broker = subprocess.Popen([sys.executable, os.path.join(root, 'broker.py'),
+                                       '--host', worker_host, '--port', str(broker_port)])
+            processes.append(broker)
+            if not _wait_for_port(worker_host, broker_port, broker):
+                raise RuntimeError('消息中转未能启动')
+            message_queue = f'netpdk://{worker_host}:{broker_port}'
+
+        env = dict(os.environ, NETPDK_MESSAGE_QUEUE=message_queue, NETPDK_BEHIND_PROXY='1')
+        for index, worker_port in enumerate(worker_ports):
+            command = [sys.executable, os.path.join(root, 'server.py'), '--workers', '1', '--async-mode', async_mode,
+                       '--host', worker_host, '--port', str(worker_port)]
+            if access_log:
+                command.append('--access-log')
+            command += ['--snapshot', worker_snapshot_path(snapshot, index) if snapshot else '',
+                        '--replay-archive', worker_snapshot_path(replay_archive, index) if replay_archive else '']
+            processes.append(subprocess.Popen(command, env=dict(env, NETPDK_WORKER_ID=str(index))))
+        for worker_port, process in zip(worker_ports, processes[-num_workers:]):
+            if not _wait_for_port(worker_host, worker_port, process):
+                raise RuntimeError(f'worker（端口 {worker_port}）未能启动')
+
+        print(f'NetPDK 集群启动: http://{host}:{port}（{num_workers} 个 worker，端口 '
+              f'{worker_ports[0]}~{worker_ports[-1]}，异步模式 {async_mode}，消息队列 {message_queue}）', flush=True)
+        asyncio.run(Router([(worker_host, p) for p in worker_ports]).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -1,14 +1,26 @@
 import random
-from collections import Counter
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from typing import NamedTuple
+
+from cards import (
+    CARD_VALUES, CARD_VALUE, CARD_NAMES, STANDARD_DECK, JOKERS,
+    CARD_RANK, NUM_RANKS, MIN_VALUE, Hand, rank_counts,
+)
+
+ROCKET_RANKS = (CARD_VALUES['小王'] - MIN_VALUE, CARD_VALUES['大王'] - MIN_VALUE)
+
+
+class EventType:
+    DEAL = 0
+    PLAY = 1
+    PASS = 2
 
-CARD_VALUES = {
-    '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
-    'J': 11, 'Q': 12, 'K': 13, 'A': 14, '2': 15,
-    '小王': 16, '大王': 17
-}
-SUITS = ['♠', '♥', '♣', '♦']
-RANKS = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2']
+
+# 状态快照中附带的最近出牌记录条数
+RECENT_PLAYS_IN_STATE = 5
 
 
 class HandType:
@@ -28,7 +40,7 @@ class HandType:
     ROCKET = 13
 
 
-@dataclass
+@dataclass(frozen=True)
 class PlayInfo:
     hand_type: int
     value: int
@@ -36,6 +48,305 @@ class PlayInfo:
     sequence_length: int = 0
 
 
+UNKNOWN_PLAY = PlayInfo(HandType.UNKNOWN, 0, 0, 0)
+
+# 影响牌型识别的规则开关；同一组开关共享同一个编译好的识别器
+CLASSIFIER_RULE_KEYS = ('allow_rocket', 'allow_four_with_two', 'allow_airplane_wings')
+CLASSIFIER_MEMO_SIZE = 1 << 16
+
+# 房间可选的玩法预设
+RULE_PRESETS = {
+    'classic': {'include_jokers': False, 'allow_rocket': False, 'allow_airplane_wings': True, 'allow_four_with_two': False},
+    'full': {'include_jokers': True, 'allow_rocket': True, 'allow_airplane_wings': True, 'allow_four_with_two': True},
+    'strict': {'include_jokers': False, 'allow_rocket': False, 'allow_airplane_wings': False, 'allow_four_with_two': True},
+}
+DEFAULT_RULE_PRESET = 'full'
+
+# --- 牌型规则表：识别器按这些表判定，export_rules_table 原样导出给客户端预检 ---
+
+ROCKET_VALUE = 99
+SAME_RANK_TYPES = {1: HandType.SINGLE, 2: HandType.PAIR, 3: HandType.THREE_OF_A_KIND, 4: HandType.BOMB}
+# 多副牌时同一点数 MIN_BOMB_SIZE 张及以上都是炸弹：张数多的更大，张数相同比点数
+MIN_BOMB_SIZE = 4
+THREE_WITH_TYPES = {4: HandType.THREE_WITH_ONE, 5: HandType.THREE_WITH_TWO}   # 两种点数、其一为三张时按总张数
+FOUR_WITH_TWO_KICKERS = ([1, 1], [2], [2, 2])                                 # 四带二副牌各点数张数（升序）
+CHAIN_RANK_LIMIT = CARD_VALUES['2'] - MIN_VALUE   # 顺子/连对/飞机只能用 3~A
+MIN_CHAIN_LENGTH = {1: 5, 2: 3, 3: 2}
+CHAIN_TYPES = {1: HandType.STRAIGHT, 2: HandType.CONSECUTIVE_PAIRS, 3: HandType.AIRPLANE}
+WING_TYPES = {1: HandType.AIRPLANE_WITH_SINGLES, 2: HandType.AIRPLANE_WITH_PAIRS}  # 每组三张带的副牌张数
+
+HAND_TYPE_LABELS = {
+    HandType.SINGLE: '单张', HandType.PAIR: '对子', HandType.THREE_OF_A_KIND: '三张',
+    HandType.THREE_WITH_ONE: '三带一', HandType.THREE_WITH_TWO: '三带二', HandType.STRAIGHT: '顺子',
+    HandType.CONSECUTIVE_PAIRS: '连对', HandType.AIRPLANE: '飞机', HandType.AIRPLANE_WITH_SINGLES: '飞机带单',
+    HandType.AIRPLANE_WITH_PAIRS: '飞机带对', HandType.BOMB: '炸弹', HandType.FOUR_WITH_TWO: '四带二',
+    HandType.ROCKET: '王炸',
+}
+
+# 出牌校验失败的原因；客户端预检显示同样的提示
+PLAY_ERRORS = {
+    'invalid': "不合法的牌型。",
+    'rocket': "王炸是最大的！",
+    'too_small': "出的牌要比上家大。",
+    'mismatch': "必须出与上家相同类型、相同张数的牌，或使用炸弹。",
+}
+
+
+class HandClassifier:
+    """
+    按一组规则开关“编译”好的牌型识别器。
+
+    只看各点数的张数（点数签名）来识别牌型，识别结果按签名记忆，
+    表大小有上限，并由所有使用同一规则预设的对局共享。
+    """
+
+    def __init__(self, allow_rocket=True, allow_four_with_two=True, allow_airplane_wings=True, memo_size=CLASSIFIER_MEMO_SIZE):
+        self.allow_rocket = allow_rocket
+        self.allow_four_with_two = allow_four_with_two
+        self.allow_airplane_wings = allow_airplane_wings
+        # lru_cache 自带线程安全的有界记忆表
+        self.classify_signature = lru_cache(maxsize=memo_size)(self._classify_signature)
+
+    def classify(self, cards):
+        if not cards:
+            return UNKNOWN_PLAY
+        return self.classify_signature(tuple(rank_counts(cards)))
+
+    def memo_info(self):
+        return self.classify_signature.cache_info()
+
+    def _classify_signature(self, signature):
+        counts = {rank + MIN_VALUE: c for rank, c in enumerate(signature) if c}
+        if not counts:
+            return UNKNOWN_PLAY
+        values = list(counts)  # 按点数序号构造，天然有序
+        n = sum(signature)
+
+        if self.allow_rocket and n == 2 and all(signature[r] == 1 for r in ROCKET_RANKS):
+            return PlayInfo(HandType.ROCKET, ROCKET_VALUE, n, 0)
+
+        if len(counts) == 1 and (n in SAME_RANK_TYPES or n >= MIN_BOMB_SIZE):
+            return PlayInfo(SAME_RANK_TYPES.get(n, HandType.BOMB), values[0], n, 0)
+
+        if len(counts) == 2 and n in THREE_WITH_TYPES and 3 in counts.values():
+            return PlayInfo(THREE_WITH_TYPES[n], [v for v, c in counts.items() if c == 3][0], n, 0)
+
+        if self.allow_four_with_two and 4 in counts.values():
+            kicker_counts = sorted(c for c in counts.values() if c != 4)
+            if kicker_counts in FOUR_WITH_TWO_KICKERS and n == 4 + sum(kicker_counts):
+                return PlayInfo(HandType.FOUR_WITH_TWO, [v for v, c in counts.items() if c == 4][0], n, 0)
+
+        # 2 与大小王不能进连牌，也不能做飞机的翼
+        if values[-1] - MIN_VALUE >= CHAIN_RANK_LIMIT:
+            return PlayInfo(HandType.UNKNOWN, 0, n, 0)
+
+        is_consecutive = values[-1] - values[0] == len(values) - 1
+        widths = set(counts.values())
+        if is_consecutive and len(widths) == 1:
+            width = widths.pop()
+            if width in CHAIN_TYPES and len(values) >= MIN_CHAIN_LENGTH[width]:
+                return PlayInfo(CHAIN_TYPES[width], values[-1], n, len(values))
+
+        if self.allow_airplane_wings:
+            threes = [v for v, c in counts.items() if c == 3]
+            if len(threes) >= MIN_CHAIN_LENGTH[3] and threes[-1] - threes[0] == len(threes) - 1:
+                for wing, hand_type in WING_TYPES.items():
+                    # 带对时每种副牌点数都必须正好两张
+                    if n == len(threes) * (3 + wing) and (wing == 1 or all(c in (2, 3) for c in counts.values())):
+                        return PlayInfo(hand_type, threes[-1], n, len(threes))
+
+        return PlayInfo(HandType.UNKNOWN, 0, n, 0)
+
+
+def compare_plays(current_play, last_play):
+    """判断已识别的 current_play 能否压过上一手 last_play，返回 (是否可以, 原因)。"""
+    if current_play.hand_type == HandType.ROCKET:
+        return True, "OK"
+    if last_play.hand_type == HandType.ROCKET:
+        return False, PLAY_ERRORS['rocket']
+    if current_play.hand_type == HandType.BOMB and last_play.hand_type != HandType.BOMB:
+        return True, "OK"
+    if current_play.hand_type == HandType.BOMB == last_play.hand_type and current_play.length != last_play.length:
+        return (True, "OK") if current_play.length > last_play.length else (False, PLAY_ERRORS['too_small'])
+
+    same_type = current_play.hand_type == last_play.hand_type
+    same_length = current_play.length == last_play.length
+    same_sequence_length = current_play.sequence_length == last_play.sequence_length
+
+    if same_type and same_length and same_sequence_length:
+        if current_play.value > last_play.value:
+            return True, "OK"
+        return False, PLAY_ERRORS['too_small']
+    return False, PLAY_ERRORS['mismatch']
+
+
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_classifier(room_settings):
+    """返回与房间规则对应的共享识别器，同一规则组合只编译一次。"""
+    key = tuple(bool(room_settings.get(k, True)) for k in CLASSIFIER_RULE_KEYS)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        with _classifiers_lock:
+            classifier = _classifiers.get(key)
+            if classifier is None:
+                classifier = _classifiers[key] = HandClassifier(**dict(zip(CLASSIFIER_RULE_KEYS, key)))
+    return classifier
+
+
+def export_rules_table():
+    """
+    导出客户端预检用的规则表（可直接序列化为 JSON）：牌面到点数序号的映射、牌型编号与名称、
+    识别器使用的各张规则表、比较规则涉及的牌型、失败提示与玩法预设。房间实际生效的开关随状态中的 room_settings 下发。
+    """
+    return {
+        'card_ranks': {name: CARD_RANK[c] for c, name in enumerate(CARD_NAMES)},
+        'num_ranks': NUM_RANKS,
+        'min_value': MIN_VALUE,
+        'hand_types': {name: value for name, value in vars(HandType).items() if not name.startswith('_')},
+        'labels': HAND_TYPE_LABELS,
+        'rule_keys': CLASSIFIER_RULE_KEYS,
+        'rocket_ranks': ROCKET_RANKS,
+        'rocket_value': ROCKET_VALUE,
+        'same_rank_types': SAME_RANK_TYPES,
+        'min_bomb_size': MIN_BOMB_SIZE,
+        'three_with_types': THREE_WITH_TYPES,
+        'four_with_two_kickers': FOUR_WITH_TWO_KICKERS,
+        'chain_rank_limit': CHAIN_RANK_LIMIT,
+        'min_chain_length': MIN_CHAIN_LENGTH,
+        'chain_types': CHAIN_TYPES,
+        'wing_types': WING_TYPES,
+        'errors': PLAY_ERRORS,
+        'presets': RULE_PRESETS,
+        'default_preset': DEFAULT_RULE_PRESET,
+    }
+
+
+# --- 合法出牌枚举（基于点数张数，按点数签名去重，不区分花色排列） ---
+
+BOMB_LIKE_TYPES = (HandType.BOMB, HandType.ROCKET)
+
+
+class LegalPlay(NamedTuple):
+    signature: tuple
+    info: PlayInfo
+
+
+def _signature(parts):
+    counts = [0] * NUM_RANKS
+    for rank, n in parts:
+        counts[rank] += n
+    return tuple(counts)
+
+
+def _chains(counts, width, length=None):
+    """枚举所有每个点数至少 width 张的连续区间 (起点, 长度)；length 给定时只返回该长度。"""
+    min_length = MIN_CHAIN_LENGTH[width]
+    for start in range(CHAIN_RANK_LIMIT):
+        for end in range(start, CHAIN_RANK_LIMIT):
+            if counts[end] < width:
+                break
+            run = end - start + 1
+            if run >= min_length and (length is None or run == length):
+                yield start, run
+
+
+def _kickers(counts, exclude, unit, k, distinct):
+    """枚举 k 份副牌（每份 unit 张）的点数组合；distinct 为 True 时各份点数互不相同。"""
+    eligible = [r for r in range(NUM_RANKS) if r not in exclude and counts[r] >= unit]
+    if distinct:
+        yield from combinations(eligible, k)
+        return
+    # 允许同一点数出多份，但份数受该点数持有张数限制
+    limits = [counts[r] // unit for r in eligible]
+
+    def extend(start, remaining, combo):
+        if not remaining:
+            yield tuple(combo)
+            return
+        for i in range(start, len(eligible)):
+            for times in range(1, min(limits[i], remaining) + 1):
+                yield from extend(i + 1, remaining - times, combo + [eligible[i]] * times)
+
+    yield from extend(0, k, [])
+
+
+def _candidates(counts, hand_type, seq_length):
+    """按目标牌型生成候选点数签名；seq_length 非空时只生成该长度的连牌。"""
+    ranks = [r for r in range(NUM_RANKS) if counts[r]]
+    if hand_type == HandType.SINGLE:
+        for r in ranks:
+            yield _signature([(r, 1)])
+    elif hand_type in (HandType.PAIR, HandType.THREE_OF_A_KIND):
+        width = 2 if hand_type == HandType.PAIR else 3
+        for r in ranks:
+            if counts[r] >= width:
+                yield _signature([(r, width)])
+    elif hand_type == HandType.BOMB:
+        # 多副牌时同一点数可以拆成不同张数的炸弹
+        for r in ranks:
+            for width in range(MIN_BOMB_SIZE, counts[r] + 1):
+                yield _signature([(r, width)])
+    elif hand_type == HandType.ROCKET:
+        if all(counts[r] for r in ROCKET_RANKS):
+            yield _signature([(r, 1) for r in ROCKET_RANKS])
+    elif hand_type in (HandType.THREE_WITH_ONE, HandType.THREE_WITH_TWO):
+        unit = 1 if hand_type == HandType.THREE_WITH_ONE else 2
+        for t in ranks:
+            if counts[t] >= 3:
+                for (k,) in _kickers(counts, (t,), unit, 1, True):
+                    yield _signature([(t, 3), (k, unit)])
+    elif hand_type == HandType.FOUR_WITH_TWO:
+        for b in ranks:
+            if counts[b] >= 4:
+                for combo in _kickers(counts, (b,), 1, 2, False):
+                    yield _signature([(b, 4)] + [(k, 1) for k in combo])
+                for combo in _kickers(counts, (b,), 2, 2, True):
+                    yield _signature([(b, 4)] + [(k, 2) for k in combo])
+    elif hand_type in (HandType.STRAIGHT, HandType.CONSECUTIVE_PAIRS, HandType.AIRPLANE):
+        width = {HandType.STRAIGHT: 1, HandType.CONSECUTIVE_PAIRS: 2, HandType.AIRPLANE: 3}[hand_type]
+        for start, run in _chains(counts, width, seq_length):
+            yield _signature([(r, width) for r in range(start, start + run)])
+    elif hand_type in (HandType.AIRPLANE_WITH_SINGLES, HandType.AIRPLANE_WITH_PAIRS):
+        unit, distinct = (1, False) if hand_type == HandType.AIRPLANE_WITH_SINGLES else (2, True)
+        for start, run in _chains(counts, 3, seq_length):
+            body = [(r, 3) for r in range(start, start + run)]
+            for combo in _kickers(counts, range(start, start + run), unit, run, distinct):
+                yield _signature(body + [(k, unit) for k in combo])
+
+
+ALL_HAND_TYPES = tuple(t for t in range(HandType.SINGLE, HandType.ROCKET + 1))
+
+
+def enumerate_legal_plays(counts, classifier, last_play=None):
+    """
+    枚举一手牌（15 个点数的张数）的全部合法出牌，每种点数签名只出现一次。
+    last_play 为空表示自己领出，否则只返回能压过 last_play 的出牌（同型更大、炸弹或王炸）。
+    """
+    if last_play is None or last_play.hand_type == HandType.UNKNOWN:
+        targets, seq_length, last_play = ALL_HAND_TYPES, None, None
+    else:
+        targets = (last_play.hand_type,) + tuple(t for t in BOMB_LIKE_TYPES if t != last_play.hand_type)
+        seq_length = last_play.sequence_length or None
+
+    plays, seen = [], set()
+    for hand_type in targets:
+        for signature in _candidates(counts, hand_type, seq_length if hand_type == targets[0] else None):
+            if signature in seen:
+                continue
+            seen.add(signature)
+            info = classifier.classify_signature(signature)
+            if info.hand_type == HandType.UNKNOWN:
+                continue
+            if last_play is not None and not compare_plays(info, last_play)[0]:
+                continue
+            plays.append(LegalPlay(signature, info))
+    plays.sort(key=lambda p: (p.info.hand_type in BOMB_LIKE_TYPES, p.info.hand_type, p.info.value, p.signature))
+    return plays
+
+
 class Game:
     def __init__(self):
         self.players = {}
@@ -51,150 +362,178 @@ class Game:
             'allow_four_with_two': True,
             'allow_rocket': True,
         }
+        self.classifier = get_classifier(self.room_settings)
+        self.last_play_info = UNKNOWN_PLAY
+        # 状态版本号：每次状态变化 +1；last_delta 描述最近一次变化，None 表示只能用完整快照描述
+        self.state_version = 0
+        self.last_delta = None
+        # 本局只追加的事件日志 (EventType, sid, 牌 ID 元组)，以及各点数在发牌时的总张数与已打出张数
+        self.events = []
+        self.total_rank_counts = [0] * NUM_RANKS
+        self.seen_rank_counts = [0] * NUM_RANKS
+        # 本局发牌用的种子（回放记录据此重现发牌）；从快照恢复的对局没有种子
+        self.seed = None
+
+    def _record_change(self, ops=None):
+        self.state_version += 1
+        self.last_delta = ops
 
     def update_room_settings(self, settings):
         self.room_settings.update(settings or {})
+        # 规则变化时切换到对应预设的识别器
+        self.classifier = get_classifier(self.room_settings)
+        self._record_change()
 
     def add_player(self, sid, name, is_bot=False):
         if not self.game_started and sid not in self.players:
-            self.players[sid] = {'name': name, 'hand': [], 'is_bot': is_bot}
+            self.players[sid] = {'name': name, 'hand': Hand(), 'is_bot': is_bot, 'offline': False}
             self.player_order.append(sid)
+            self._record_change()
             return True
         return False
 
     def remove_player(self, sid):
         if sid in self.players:
             del self.players[sid]
+            self._record_change()
         if sid in self.player_order:
             self.player_order.remove(sid)
 
-    def start_game(self, num_decks=1):
+    def set_offline(self, sid, offline):
+        """标记人类玩家掉线/重连；掉线期间座位和手牌保留，由服务端的AI代为出牌。"""
+        player = self.players.get(sid)
+        if player is not None and player['offline'] != offline:
+            player['offline'] = offline
+            self._record_change()
+
+    def is_ai_controlled(self, sid):
+        player = self.players.get(sid)
+        return player is not None and (player['is_bot'] or player['offline'])
+
+    def rebind_player(self, old_sid, new_sid):
+        """把座位从旧连接 ID 转到新连接 ID（断线重连时使用），座次、手牌与事件日志原样保留。"""
+        if old_sid not in self.players or new_sid in self.players:
+            return False
+        def rename(sid):
+            return new_sid if sid == old_sid else sid
+        self.players = {rename(sid): p for sid, p in self.players.items()}
+        self.player_order = [rename(sid) for sid in self.player_order]
+        self.current_turn_sid = rename(self.current_turn_sid)
+        self.last_player_sid = rename(self.last_player_sid)
+        self.events = [(t, rename(sid), cards) for t, sid, cards in self.events]
+        self._record_change()
+        return True
+
+    def copy(self):
+        """
+        复制当前局面：手牌、桌面、事件日志与计数各自独立，之后对原对局的修改不影响副本。
+        供机器人在房间锁外决策；牌堆、规则分类器等开局后不再修改的对象直接共享。
+        """
+        other = Game.__new__(Game)
+        other.__dict__.update(self.__dict__)
+        other.players = {sid: dict(p, hand=p['hand'].copy()) for sid, p in self.players.items()}
+        other.player_order = list(self.player_order)
+        other.last_played_cards = list(self.last_played_cards)
+        other.room_settings = dict(self.room_settings)
+        other.events = list(self.events)
+        other.total_rank_counts = list(self.total_rank_counts)
+        other.seen_rank_counts = list(self.seen_rank_counts)
+        return other
+
+    def start_game(self, num_decks=1, seed=None):
         if self.game_started or len(self.players) < 2:
             return False
         settings_decks = max(1, int(self.room_settings.get('num_decks', num_decks) or 1))
         self.room_settings['num_decks'] = settings_decks
 
-        self.deck = [f"{suit}{rank}" for suit in SUITS for rank in RANKS] * settings_decks
+        self.deck = list(STANDARD_DECK) * settings_decks
         if self.room_settings.get('include_jokers', True):
-            self.deck.extend(['小王', '大王'] * settings_decks)
-        random.shuffle(self.deck)
+            self.deck.extend(JOKERS * settings_decks)
+        # 发牌总是可复现：未指定 seed 时随机取一个并记下（用于模拟与回放）
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        random.Random(seed).shuffle(self.deck)
 
         player_sids = self.player_order
         num_players = len(player_sids)
         cards_per_player = len(self.deck) // num_players
+        self.events = []
+        self.total_rank_counts = rank_counts(self.deck)
+        self.seen_rank_counts = [0] * NUM_RANKS
         for i, sid in enumerate(player_sids):
-            hand = self.deck[i * cards_per_player: (i + 1) * cards_per_player]
-            self.players[sid]['hand'] = self._sort_hand(hand)
+            dealt = self.deck[i * cards_per_player: (i + 1) * cards_per_player]
+            self.players[sid]['hand'] = Hand(dealt)
+            self.events.append((EventType.DEAL, sid, tuple(sorted(dealt))))
 
         self.game_started = True
         self.current_turn_sid = self.player_order[0]
         self.last_player_sid = self.current_turn_sid
         self.last_played_cards = []
+        self.last_play_info = UNKNOWN_PLAY
+        self._record_change()
         return True
 
     def _get_card_value(self, card):
-        if card in CARD_VALUES:
-            return CARD_VALUES[card]
-        return CARD_VALUES.get(card[1:], 0)
+        return CARD_VALUE[card]
 
     def _sort_hand(self, hand):
-        return sorted(hand, key=lambda card: self._get_card_value(card))
+        # 牌的 ID 顺序即点数顺序
+        return sorted(hand)
 
     def _get_play_info(self, cards):
-        if not cards:
-            return PlayInfo(HandType.UNKNOWN, 0, 0, 0)
-        n = len(cards)
-        counts = Counter(self._get_card_value(c) for c in cards)
-        values = sorted(counts.keys())
-
-        if self.room_settings.get('allow_rocket', True) and n == 2 and set(cards) == {'小王', '大王'}:
-            return PlayInfo(HandType.ROCKET, 99, n, 0)
-
-        if len(counts) == 1:
-            if n == 1:
-                return PlayInfo(HandType.SINGLE, values[0], n, 0)
-            if n == 2:
-                return PlayInfo(HandType.PAIR, values[0], n, 0)
-            if n == 3:
-                return PlayInfo(HandType.THREE_OF_A_KIND, values[0], n, 0)
-            if n == 4:
-                return PlayInfo(HandType.BOMB, values[0], n, 0)
-
-        if len(counts) == 2:
-            if n == 4 and 3 in counts.values():
-                return PlayInfo(HandType.THREE_WITH_ONE, [v for v, c in counts.items() if c == 3][0], n, 0)
-            if n == 5 and 3 in counts.values():
-                return PlayInfo(HandType.THREE_WITH_TWO, [v for v, c in counts.items() if c == 3][0], n, 0)
-
-        if self.room_settings.get('allow_four_with_two', True) and n in (6, 8) and 4 in counts.values():
-            kicker_counts = sorted(c for c in counts.values() if c != 4)
-            if kicker_counts in ([1, 1], [2], [2, 2]):
-                return PlayInfo(HandType.FOUR_WITH_TWO, [v for v, c in counts.items() if c == 4][0], n, 0)
-
-        if CARD_VALUES['2'] in values or CARD_VALUES['小王'] in values or CARD_VALUES['大王'] in values:
-            return PlayInfo(HandType.UNKNOWN, 0, n, 0)
+        return self.classifier.classify(cards)
 
-        is_consecutive = values[-1] - values[0] == len(values) - 1
-        if is_consecutive:
-            if n >= 5 and len(counts) == n:
-                return PlayInfo(HandType.STRAIGHT, values[-1], n, len(values))
-            if n >= 6 and n % 2 == 0 and all(c == 2 for c in counts.values()):
-                return PlayInfo(HandType.CONSECUTIVE_PAIRS, values[-1], n, len(values))
-            if n >= 6 and n % 3 == 0 and all(c == 3 for c in counts.values()):
-                return PlayInfo(HandType.AIRPLANE, values[-1], n, len(values))
-
-        if self.room_settings.get('allow_airplane_wings', True):
-            threes = sorted([v for v, c in counts.items() if c == 3])
-            if len(threes) >= 2 and threes[-1] - threes[0] == len(threes) - 1:
-                if len(cards) == len(threes) * 4:
-                    return PlayInfo(HandType.AIRPLANE_WITH_SINGLES, threes[-1], n, len(threes))
-                if len(cards) == len(threes) * 5 and all(c in (2, 3) for c in counts.values()):
-                    return PlayInfo(HandType.AIRPLANE_WITH_PAIRS, threes[-1], n, len(threes))
-
-        return PlayInfo(HandType.UNKNOWN, 0, n, 0)
-
-    def _validate_play(self, cards_to_play):
-        current_play = self._get_play_info(cards_to_play)
+    def _validate_play(self, cards_to_play, current_play=None):
+        if current_play is None:
+            current_play = self._get_play_info(cards_to_play)
         if current_play.hand_type == HandType.UNKNOWN:
-            return False, "不合法的牌型。"
+            return False, PLAY_ERRORS['invalid']
         if not self.last_played_cards or self.current_turn_sid == self.last_player_sid:
             return True, "OK"
-        last_play = self._get_play_info(self.last_played_cards)
-
-        if current_play.hand_type == HandType.ROCKET:
-            return True, "OK"
-        if last_play.hand_type == HandType.ROCKET:
-            return False, "王炸是最大的！"
-        if current_play.hand_type == HandType.BOMB and last_play.hand_type != HandType.BOMB:
-            return True, "OK"
-
-        same_type = current_play.hand_type == last_play.hand_type
-        same_length = current_play.length == last_play.length
-        same_sequence_length = current_play.sequence_length == last_play.sequence_length
-
-        if same_type and same_length and same_sequence_length:
-            if current_play.value > last_play.value:
-                return True, "OK"
-            return False, "出的牌要比上家大。"
-        return False, "必须出与上家相同类型、相同张数的牌，或使用炸弹。"
+        # 上一手的牌型在出牌时已识别过，这里直接复用
+        return compare_plays(current_play, self.last_play_info)
+
+    def find_legal_plays(self, hand, last_play=None):
+        """对给定手牌枚举全部合法出牌，返回 [(牌 ID 列表, PlayInfo)]，同一点数签名只取一种花色组合。"""
+        plays = enumerate_legal_plays(hand.rank_counts, self.classifier, last_play)
+        # 每个点数的牌只取一次，之后按签名切片即可得到具体的牌
+        by_rank = [hand.peek_rank(rank, n) for rank, n in enumerate(hand.rank_counts)]
+        return [([c for rank, n in enumerate(p.signature) if n for c in by_rank[rank][:n]], p.info) for p in plays]
+
+    def get_legal_moves(self, sid):
+        """当前轮到 sid 时，他此刻可以打出的全部合法出牌。"""
+        if not self.game_started or sid != self.current_turn_sid:
+            return []
+        is_lead = not self.last_played_cards or self.current_turn_sid == self.last_player_sid
+        return self.find_legal_plays(self.players[sid]['hand'], None if is_lead else self.last_play_info)
 
     def play_turn(self, sid, cards):
         if not self.game_started or sid != self.current_turn_sid:
             return None, "还没轮到你。"
         player_hand = self.players[sid]['hand']
-        if Counter(cards) - Counter(player_hand):
+        if not player_hand.contains_all(cards):
             return None, "试图打出不存在的牌。"
-        is_valid, reason = self._validate_play(cards)
+        current_play = self._get_play_info(cards)
+        is_valid, reason = self._validate_play(cards, current_play)
         if not is_valid:
             return None, reason
-        for card in cards:
-            player_hand.remove(card)
+        player_hand.remove_all(cards)
         self.last_played_cards = self._sort_hand(cards)
+        self.events.append((EventType.PLAY, sid, tuple(self.last_played_cards)))
+        for c in cards:
+            self.seen_rank_counts[CARD_RANK[c]] += 1
+        self.last_play_info = current_play
         self.last_player_sid = sid
         if not player_hand:
             self.game_started = False
+            self._record_change()
             return 'WIN', None
         self._next_turn()
+        self._record_change([
+            {'op': 'play', 'sid': sid, 'cards': self.last_played_cards},
+            {'op': 'turn', 'sid': self.current_turn_sid},
+        ])
         return 'OK', None
 
     def pass_turn(self, sid):
@@ -202,9 +541,14 @@ class Game:
             return False, "还没轮到你。"
         if self.current_turn_sid == self.last_player_sid or not self.last_played_cards:
             return False, "你是新一轮，必须出牌。"
+        self.events.append((EventType.PASS, sid, ()))
         self._next_turn()
+        ops = [{'op': 'pass', 'sid': sid}, {'op': 'turn', 'sid': self.current_turn_sid}]
         if self.current_turn_sid == self.last_player_sid:
             self.last_played_cards = []
+            self.last_play_info = UNKNOWN_PLAY
+            ops.append({'op': 'clear'})
+        self._record_change(ops)
         return True, None
 
     def _next_turn(self):
@@ -212,18 +556,66 @@ class Game:
             current_index = self.player_order.index(self.current_turn_sid)
             next_index = (current_index + 1) % len(self.player_order)
             self.current_turn_sid = self.player_order[next_index]
-            if len(self.players.get(self.current_turn_sid, {}).get('hand', [])) > 0:
+            if len(self.players.get(self.current_turn_sid, {}).get('hand', ())) > 0:
                 break
 
-    def get_game_state(self, for_sid):
+    def get_game_state(self, for_sid, encode_cards=True):
+        """
+        返回某个玩家视角的游戏状态：公开状态加上他自己的手牌。
+        encode_cards 为 True 时牌面转为字符串（发送给客户端），否则保留内部的牌 ID（供服务端的 AI 使用）。
+        """
+        state = self.get_public_state(encode_cards)
+        state.update(self.get_private_state(for_sid, encode_cards))
+        return state
+
+    def get_public_state(self, encode_cards=True):
+        """所有人（包括旁观者）看到的都相同的那部分状态，每次变化只需构造、序列化一次。"""
+        encode = (lambda cards: [CARD_NAMES[c] for c in cards]) if encode_cards else list
         return {
             'game_started': self.game_started,
-            'my_hand': self.players.get(for_sid, {}).get('hand', []),
-            'my_sid': for_sid,
-            'players': [{'name': p['name'], 'sid': s, 'card_count': len(p['hand']), 'is_bot': p['is_bot']} for s, p in self.players.items()],
+            'players': [{'name': p['name'], 'sid': s, 'card_count': len(p['hand']), 'is_bot': p['is_bot'], 'offline': p['offline']}
+                        for s, p in self.players.items()],
             'player_order': self.player_order,
             'current_turn_sid': self.current_turn_sid,
-            'last_played_cards': self.last_played_cards,
+            'last_played_cards': encode(self.last_played_cards),
             'last_player_sid': self.last_player_sid,
             'room_settings': self.room_settings,
+            'state_version': self.state_version,
+            'recent_plays': self.get_recent_plays(RECENT_PLAYS_IN_STATE, encode_cards),
+        }
+
+    def get_private_state(self, for_sid, encode_cards=True):
+        """只发给 for_sid 本人的部分：他的手牌（未入座的旁观者为空）。带版本号，客户端据此与公开状态对齐。"""
+        hand = self.players.get(for_sid, {}).get('hand', ())
+        return {
+            'state_version': self.state_version,
+            'my_sid': for_sid,
+            'my_hand': [CARD_NAMES[c] for c in hand] if encode_cards else list(hand),
         }
+
+    def get_recent_plays(self, k, encode_cards=True):
+        """事件日志中最近 k 次出牌/过牌（从旧到新），过牌的 cards 为空列表。"""
+        recent = []
+        for event_type, sid, cards in reversed(self.events):
+            if event_type == EventType.DEAL or len(recent) >= k:
+                break
+            recent.append({'sid': sid, 'cards': [CARD_NAMES[c] for c in cards] if encode_cards else list(cards)})
+        recent.reverse()
+        return recent
+
+    def get_unseen_rank_counts(self, for_sid):
+        """从 for_sid 的视角，各点数既不在自己手里、也还没被打出的张数。"""
+        hand_counts = self.players[for_sid]['hand'].rank_counts
+        return [total - seen - mine for total, seen, mine in zip(self.total_rank_counts, self.seen_rank_counts, hand_counts)]
+
+    def get_state_delta(self, encode_cards=True):
+        """
+        返回最近一次状态变化的增量（版本号 + 操作列表），无法用增量描述时返回 None。
+        操作包括：play（某人出了哪些牌，出牌者自己的手牌随之减少）、pass、turn（轮到谁）、clear（清空桌面）。
+        """
+        if self.last_delta is None:
+            return None
+        ops = self.last_delta
+        if encode_cards:
+            ops = [{**op, 'cards': [CARD_NAMES[c] for c in op['cards']]} if 'cards' in op else op for op in ops]
+        return {'state_version': self.state_version, 'ops': ops}
@@ -0,0 +1,467 @@
+# hand_solver.py
+"""
+手牌最优拆分：在 15 个点数的计数向量上做带记忆的搜索，求出完手牌所需的最少手数。
+
+搜索只对“连牌”（顺子、连对、飞机）分支，并要求连牌按起点不降的顺序选取，
+这样每种连牌组合只会被搜索一次；飞机只先拿走机身，翅膀等连牌选完后再从剩下的牌里挑。
+剩下的单张、对子、三条、炸弹与带牌（三带一/三带二/四带二，带牌可以从三张、炸弹里拆）的搭配
+只与“张数形状”有关，按形状另做一次小搜索并单独记忆，在所有手牌之间共用。
+搜索结果按 (计数向量, 起点, 待配翅膀的飞机) 只记手数和最优的一步，最后再沿最优步组出拆分；
+同一规则预设的所有AI共享一个求解器。tools/check_hand_solver.py 用暴力搜索核对最少手数。
+
+求解可以带截止时间（time.perf_counter() 时刻）：超时抛出 SearchTimeout，已算完的子问题仍留在记忆表里，
+下次求解同一手牌时可以接着用；estimate_hands 给出不拆连牌时的手数（上界），几乎不花时间。
+"""
+import threading
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+from cards import NUM_RANKS, CARD_VALUES, MIN_VALUE
+from game_logic import CHAIN_RANK_LIMIT, MIN_CHAIN_LENGTH, CLASSIFIER_RULE_KEYS, MIN_BOMB_SIZE, ROCKET_RANKS, get_classifier
+
+SOLVER_MEMO_SIZE = 1 << 16
+# 超过这么多张牌时（多副牌的大手牌）改为逐步贪心：每步取一手使剩余牌最省的连牌，直到牌数回到精确搜索的范围
+EXACT_SEARCH_CARD_LIMIT = 30
+# 飞机的翅膀不能带 2 和王（与识别器一致）
+_WING_RANK_LIMIT = CARD_VALUES['2'] - MIN_VALUE
+
+
+class Decomposition(NamedTuple):
+    hands: int
+    plays: tuple    # 每手牌的点数签名（长度为 15 的元组）
+
+
+def _single_rank(rank, n):
+    counts = [0] * NUM_RANKS
+    counts[rank] = n
+    return tuple(counts)
+
+
+def _merge(*parts):
+    counts = [0] * NUM_RANKS
+    for rank, n in parts:
+        counts[rank] += n
+    return tuple(counts)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class HandSolver:
+    """按一组规则开关求解最少手数的拆牌方案；记忆表有上限且线程安全（lru_cache）。"""
+
+    def __init__(self, classifier, memo_size=SOLVER_MEMO_SIZE):
+        self.classifier = classifier
+        self._expand = lru_cache(maxsize=memo_size)(self._expand_uncached)
+        self._search = lru_cache(maxsize=memo_size)(self._search_uncached)
+        self._shape_leftover = lru_cache(maxsize=memo_size)(self._shape_leftover_uncached)
+        self._winged_shape = lru_cache(maxsize=memo_size)(self._winged_shape_uncached)
+        # 截止时间按线程（协作式 worker 下按协程）各自记录，求解器本身在AI之间共享
+        self._local = threading.local()
+
+    def solve(self, counts, deadline=None):
+        """返回手牌（15 个点数的张数）的最少手数拆分；超过 deadline 时抛出 SearchTimeout。"""
+        self._local.deadline = deadline
+        try:
+            return self._expand(tuple(counts))
+        finally:
+            self._local.deadline = None
+
+    def min_hands(self, counts, deadline=None):
+        return self.solve(counts, deadline).hands
+
+    def estimate_hands(self, counts):
+        """不拆连牌时的手数，是最少手数的上界。"""
+        return self._leftover_hands(tuple(counts))
+
+    def memo_info(self):
+        return self._search.cache_info()
+
+    def clear_memo(self):
+        for memo in (self._expand, self._search, self._winged_shape, self._shape_leftover):
+            memo.cache_clear()
+
+    # --- 搜索 ---
+
+    def _check_deadline(self):
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout
+
+    def _expand_uncached(self, counts):
+        """沿记忆表里每个子问题记下的最优一步走到底，组出完整的拆分。"""
+        plays, start, airplanes = [], 0, ()
+        while True:
+            _, step = self._search(counts, start, airplanes)
+            if step is None:
+                rest = self._attach_wings(counts, airplanes)
+                return Decomposition(len(plays) + rest.hands, tuple(plays) + rest.plays)
+            play, counts, start, airplanes = step
+            if play is not None:
+                plays.append(play)
+
+    def _search_uncached(self, counts, start, airplanes):
+        """
+        返回 (最少手数, 最优的一步)；最优的一步是 (打出的连牌, 剩余计数, 起点, 待配翅膀的飞机)，
+        其中飞机机身记在待配翅膀的飞机里、打出的连牌为 None；不再选连牌时为 None。只记手数，拆分由 _expand 组出。
+        """
+        self._check_deadline()
+        if sum(counts) > EXACT_SEARCH_CARD_LIMIT:
+            return self._descend(counts)
+        best = (self._winged_hands(counts, airplanes), None)
+        for play, chain_start in self._chain_moves(counts, start):
+            rest = tuple(c - p for c, p in zip(counts, play))
+            if play[chain_start] == 3 and self.classifier.allow_airplane_wings:
+                # 飞机先只拿走机身，带不带翼、带哪些翅膀留到连牌选完后再定（_attach_wings 负责计入这一手）
+                step = (None, rest, chain_start, airplanes + (play,))
+                hands = self._search(*step[1:])[0]
+            else:
+                step = (play, rest, chain_start, airplanes)
+                hands = self._search(*step[1:])[0] + 1
+            if hands < best[0]:
+                best = (hands, step)
+        return best
+
+    def _descend(self, counts):
+        """大手牌：只走一步最优的连牌（打完后剩余牌的无连牌手数最少，相同时取张数多的），其余交给递归。"""
+        best = (self._leftover_hands(counts), None)
+        step = None
+        for body, _ in self._chain_moves(counts, 0):
+            self._check_deadline()
+            for play in self._smallest_wings(counts, body):
+                rest = tuple(c - p for c, p in zip(counts, play))
+                key = (self._leftover_hands(rest), -sum(play))
+                if step is None or key < step[0]:
+                    step = (key, play, rest)
+        if step is None or step[0][0] + 1 > best[0]:
+            return best
+        hands = self._search(step[2], 0, ())[0] + 1
+        return (hands, (step[1], step[2], 0, ())) if hands < best[0] else best
+
+    @staticmethod
+    def _chain_moves(counts, start):
+        """起点不小于 start 的所有连牌 (签名, 起点)；飞机只给机身。"""
+        for width in (1, 2, 3):
+            min_length = MIN_CHAIN_LENGTH[width]
+            for s in range(start, CHAIN_RANK_LIMIT):
+                end = s
+                while end < CHAIN_RANK_LIMIT and counts[end] >= width:
+                    end += 1
+                for length in range(min_length, end - s + 1):
+                    yield _merge(*((r, width) for r in range(s, s + length))), s
+
+    def _smallest_wings(self, counts, body):
+        """大手牌逐步贪心用：连牌本身，飞机另外带上正好一张/两张的最小点数作翅膀（够的话）。"""
+        yield body
+        length = sum(1 for n in body if n)
+        if max(body) != 3 or not self.classifier.allow_airplane_wings:
+            return
+        for wing_width in (1, 2):
+            wing_ranks = [r for r in range(_WING_RANK_LIMIT) if not body[r] and counts[r] == wing_width][:length]
+            if len(wing_ranks) == length:
+                yield tuple(n + wing_width * (r in wing_ranks) for r, n in enumerate(body))
+
+    def _attach_wings(self, counts, airplanes):
+        """给连牌搜索里留下的飞机机身配翅膀（或不带），其余的牌交给 _leftover；返回整体的最少拆分。"""
+        if not airplanes:
+            return self._leftover(counts)
+        # 先只比较手数，选定带法后再组出这一支的拆分
+        best = None
+        for play, rest in self._wing_options(counts, airplanes):
+            hands = self._winged_hands(rest, airplanes[1:])
+            if best is None or hands < best[0]:
+                best = (hands, play, rest)
+        sub = self._attach_wings(best[2], airplanes[1:])
+        return Decomposition(sub.hands + 1, (best[1],) + sub.plays)
+
+    def _wing_options(self, counts, airplanes):
+        """第一架飞机的全部带法 (整手签名, 剩余计数)：不带翼、带单或带对。"""
+        body, later = airplanes[0], airplanes[1:]
+        yield body, counts
+        classes = {}
+        for r in range(_WING_RANK_LIMIT):
+            if not body[r] and counts[r]:
+                classes.setdefault((counts[r],) + tuple(not b[r] for b in later), []).append(r)
+        classes = [(key[0], ranks) for key, ranks in classes.items()]
+        length = sum(1 for n in body if n)
+        for wing_width in (1, 2):
+            for picked in self._wing_choices(classes, length * wing_width, wing_width):
+                yield (tuple(n + picked.get(r, 0) for r, n in enumerate(body)),
+                       tuple(n - picked.get(r, 0) for r, n in enumerate(counts)))
+
+    def _winged_hands(self, counts, airplanes):
+        """
+        同 _attach_wings(counts, airplanes).hands，但不组牌。剩余牌的手数只看张数形状，所以点数本身无关紧要，
+        只需记下每个点数的张数和它能给哪几架飞机作翅膀：按这个“形状”记忆，不同手牌之间也能共用。
+        """
+        if not airplanes:
+            return self._leftover_count(counts)
+        entries = tuple(sorted(
+            (counts[r], sum(1 << i for i, body in enumerate(airplanes) if r < _WING_RANK_LIMIT and not body[r]))
+            for r in range(ROCKET_RANKS[0]) if counts[r]))
+        lengths = tuple(sum(1 for n in body if n) for body in airplanes)
+        return self._winged_shape(entries, tuple(counts[r] for r in ROCKET_RANKS), lengths)
+
+    def _winged_shape_uncached(self, entries, jokers, lengths):
+        """entries 为排好序的 (张数, 能作哪几架飞机翅膀的位掩码)，lengths 为各架飞机的长度。"""
+        if not lengths:
+            counts = tuple(n for n, _ in entries) + (0,) * (ROCKET_RANKS[0] - len(entries)) + jokers
+            return self._leftover_count(counts)
+        self._check_deadline()
+        best = self._winged_shape(tuple(sorted((n, mask >> 1) for n, mask in entries)), jokers, lengths[1:])
+        classes = {}
+        for i, (n, mask) in enumerate(entries):
+            if mask & 1:
+                classes.setdefault((n, mask), []).append(i)
+        classes = [(key[0], members) for key, members in classes.items()]
+        for wing_width in (1, 2):
+            for picked in self._wing_choices(classes, lengths[0] * wing_width, wing_width):
+                rest = ((n - picked.get(i, 0), mask >> 1) for i, (n, mask) in enumerate(entries))
+                best = min(best, self._winged_shape(tuple(sorted(e for e in rest if e[0])), jokers, lengths[1:]))
+        return best + 1
+
+    @staticmethod
+    def _wing_choices(classes, length, wing_width):
+        """
+        从各类点数 [(张数, [点数...]), ...] 里挑出共 length 张翅膀的全部方式 {点数: 张数}，同类里靠前的点数先出。
+        带单时一个点数最多出 2 张（出 3 张就成了另一组三张）；带对时每个点数出一对。
+        """
+        if not length:
+            yield {}
+            return
+        if not classes:
+            return
+        (count, ranks), others = classes[0], classes[1:]
+        doubles_limit = len(ranks) if count >= 2 else 0
+        for doubles in range(min(doubles_limit, length // 2) + 1):
+            singles_limit = 0 if wing_width == 2 else len(ranks) - doubles
+            for singles in range(min(singles_limit, length - 2 * doubles) + 1):
+                for rest in HandSolver._wing_choices(others, length - 2 * doubles - singles, wing_width):
+                    picked = dict(rest)
+                    picked.update((r, 2) for r in ranks[:doubles])
+                    picked.update((r, 1) for r in ranks[doubles:doubles + singles])
+                    yield picked
+
+    # --- 连牌之外的部分 ---
+
+    def _leftover(self, counts):
+        """
+        没有连牌时的最少手数。不超过 EXACT_SEARCH_CARD_LIMIT 张时精确求解：带牌可以取自任何点数，
+        包括从三张、炸弹（多副牌时 5 张以上）里拆出来的牌；更大的手牌按张数估算（_leftover_estimate）。
+        """
+        if sum(counts) > EXACT_SEARCH_CARD_LIMIT:
+            return self._leftover_estimate(counts)
+        plays = []
+        # 多副牌时可能有几个王炸；手数相同时保留王炸，不把大小王拆成单张
+        while self.classifier.allow_rocket and all(counts[r] for r in ROCKET_RANKS):
+            without_rocket = tuple(n - (r in ROCKET_RANKS) for r, n in enumerate(counts))
+            if self._leftover_count(without_rocket) + 1 > self._leftover_count(counts):
+                break
+            plays.append(_merge(*((r, 1) for r in ROCKET_RANKS)))
+            counts = without_rocket
+        counts = list(counts)
+        # 去掉王以外的点数身份，只剩“张数形状”：同形状的手牌拆法相同，记忆表在所有手牌之间共用
+        while any(counts):
+            order = sorted((r for r in range(NUM_RANKS) if counts[r]), key=lambda r: -counts[r])
+            play = self._shape_leftover(tuple(counts[r] for r in order))[2]
+            for i, n in play:
+                counts[order[i]] -= n
+            plays.append(_merge(*((order[i], n) for i, n in play)))
+        return Decomposition(len(plays), tuple(plays))
+
+    def _leftover_count(self, counts):
+        """同 _leftover(counts).hands，只查张数形状的记忆表、不组牌（不超过 EXACT_SEARCH_CARD_LIMIT 张时使用）。"""
+        hands = self._shape_leftover(tuple(sorted(filter(None, counts), reverse=True)))[0]
+        if self.classifier.allow_rocket and all(counts[r] for r in ROCKET_RANKS):
+            hands = min(hands, 1 + self._leftover_count(tuple(n - (r in ROCKET_RANKS) for r, n in enumerate(counts))))
+        return hands
+
+    def _shape_leftover_uncached(self, shape):
+        """
+        张数形状（降序）的最少手数，返回 (手数, 四带二手数, 最优的第一手)；一手牌是 ((形状下标, 张数), ...)。
+        每一步只枚举包含第 0 个点数的出法，其余点数按张数分组、同组只取代表，因此分支很少。
+        手数相同时四带二少的优先，尽量保留炸弹不被拆去带牌。
+        """
+        if not shape:
+            return 0, 0, None
+        self._check_deadline()
+        best = None
+        for play, is_four in self._shape_moves(shape):
+            rest = list(shape)
+            for i, n in play:
+                rest[i] -= n
+            hands, fours, _ = self._shape_leftover(tuple(sorted(filter(None, rest), reverse=True)))
+            key = (hands + 1, fours + is_four)
+            if best is None or key < best[:2]:
+                best = key + (play,)
+        return best
+
+    def _shape_moves(self, shape):
+        """包含第 0 个点数的全部非连牌出法 (((形状下标, 张数), ...), 是否四带二)。"""
+        first = shape[0]
+        groups = {}
+        for i in range(1, len(shape)):
+            members = groups.setdefault(shape[i], [])
+            if len(members) < 2:
+                members.append(i)
+        others = [members[0] for members in groups.values()]
+
+        def partners(j):
+            """与 j 不同的其他点数（每组一个代表；与 j 同组时取组里的另一个）。"""
+            for members in groups.values():
+                if members[0] != j:
+                    yield members[0]
+                elif len(members) > 1:
+                    yield members[1]
+
+        four_with_two = self.classifier.allow_four_with_two
+        # 第 0 个点数单独成手（单张/对子/三张/炸弹）
+        for n in range(1, first + 1):
+            yield ((0, n),), False
+        # 第 0 个点数做三带一/三带二、四带二的主体
+        if first >= 3:
+            for j in others:
+                for w in (1, 2):
+                    if shape[j] >= w:
+                        yield ((0, 3), (j, w)), False
+        if four_with_two and first >= 4:
+            for j in others:
+                if shape[j] >= 2:
+                    yield ((0, 4), (j, 2)), True
+                for k in partners(j):
+                    if k > j:
+                        yield ((0, 4), (j, 1), (k, 1)), True
+                        if shape[j] >= 2 and shape[k] >= 2:
+                            yield ((0, 4), (j, 2), (k, 2)), True
+        # 第 0 个点数做别人的带牌
+        for j in others:
+            if shape[j] >= 3:
+                for w in (1, 2):
+                    if first >= w:
+                        yield ((j, 3), (0, w)), False
+            if four_with_two and shape[j] >= 4:
+                if first >= 2:
+                    yield ((j, 4), (0, 2)), True
+                for k in partners(j):
+                    yield ((j, 4), (0, 1), (k, 1)), True
+                    if first >= 2 and shape[k] >= 2:
+                        yield ((j, 4), (0, 2), (k, 2)), True
+
+    def _leftover_estimate(self, counts):
+        """大手牌没有连牌时的手数估算：按张数分成单/对/三/炸，再把单张和对子尽量作为带牌挂上去（是上界）。"""
+        options = [self._leftover_with(counts, use_rocket=False)]
+        if self.classifier.allow_rocket and all(counts[r] == 1 for r in ROCKET_RANKS):
+            options.append(self._leftover_with(counts, use_rocket=True))
+        # 手数相同时，优先保留炸弹不被拆去带牌
+        return min(options, key=lambda o: (o[0].hands, o[1]))[0]
+
+    def _leftover_hands(self, counts):
+        """同 _leftover_estimate(counts).hands，只按张数计数、不组牌（估算与大手牌逐步贪心时给连牌候选打分用）。"""
+        best = None
+        for use_rocket in ((False, True) if self.classifier.allow_rocket and all(counts[r] == 1 for r in ROCKET_RANKS)
+                           else (False,)):
+            plays, sizes = int(use_rocket), [0, 0, 0, 0]
+            for rank, n in enumerate(counts):
+                if not n or (use_rocket and rank in ROCKET_RANKS):
+                    continue
+                if n > MIN_BOMB_SIZE:
+                    plays += 1
+                else:
+                    sizes[n - 1] += 1
+            singles, pairs, trios, quads = sizes
+            for trio_singles in range(min(trios, singles) + 1):
+                for quad_kickers in ((False, True) if self.classifier.allow_four_with_two and quads else (False,)):
+                    hands = plays + self._count_kicker_hands(singles, pairs, trios, quads, trio_singles, quad_kickers)[0]
+                    if best is None or hands < best:
+                        best = hands
+        return best
+
+    def _leftover_with(self, counts, use_rocket):
+        plays, singles, pairs, trios, quads = [], [], [], [], []
+        for rank, n in enumerate(counts):
+            if not n or (use_rocket and rank in ROCKET_RANKS):
+                continue
+            if n > MIN_BOMB_SIZE:
+                # 多副牌时同一点数的全部张数就是一个炸弹
+                plays.append(_single_rank(rank, n))
+                continue
+            (singles, pairs, trios, quads)[n - 1].append(rank)
+        if use_rocket:
+            plays.append(_merge(*((r, 1) for r in ROCKET_RANKS)))
+
+        # 先只按张数估算每种带牌方式的手数，选出最好的一种再真正组牌
+        best = None
+        for trio_singles in range(min(len(trios), len(singles)) + 1):
+            for quad_kickers in ((False, True) if self.classifier.allow_four_with_two and quads else (False,)):
+                key = self._count_kicker_hands(len(singles), len(pairs), len(trios), len(quads), trio_singles, quad_kickers)
+                if best is None or key < best[0]:
+                    best = (key, trio_singles, quad_kickers)
+        kicker_plays, quads_used = self._attach_kickers(singles, pairs, trios, quads, best[1], best[2])
+        all_plays = plays + kicker_plays
+        return Decomposition(len(all_plays), tuple(all_plays)), quads_used
+
+    @staticmethod
+    def _count_kicker_hands(singles, pairs, trios, quads, trio_singles, quad_kickers):
+        """与 _attach_kickers 相同的带牌顺序，只计数：返回 (手数, 被拆去带牌的炸弹数)。"""
+        pairs -= min(trios - trio_singles, pairs)
+        singles -= trio_singles
+        used = 0
+        if quad_kickers:
+            with_singles = min(quads, singles // 2)
+            with_two_pairs = min(quads - with_singles, pairs // 2)
+            with_pair = min(quads - with_singles - with_two_pairs, pairs - 2 * with_two_pairs)
+            singles -= 2 * with_singles
+            pairs -= 2 * with_two_pairs + with_pair
+            used = with_singles + with_two_pairs + with_pair
+        return trios + quads + singles + pairs, used
+
+    @staticmethod
+    def _attach_kickers(singles, pairs, trios, quads, trio_singles, quad_kickers):
+        """前 trio_singles 个三条带单张、其余带对子；quad_kickers 时炸弹再按四带二带走两张单或一/两对。"""
+        singles, pairs = list(singles), list(pairs)
+        plays, quads_used = [], 0
+
+        def take(pool, rank, k):
+            picked = [r for r in pool if r != rank][:k]
+            if len(picked) < k:
+                return None
+            for r in picked:
+                pool.remove(r)
+            return picked
+
+        for i, rank in enumerate(trios):
+            kicker = take(singles, rank, 1) if i < trio_singles else take(pairs, rank, 1)
+            width = 1 if i < trio_singles else 2
+            plays.append(_merge((rank, 3), *((r, width) for r in kicker or ())))
+        for rank in quads:
+            kickers = None
+            if quad_kickers:
+                for pool, k, width in ((singles, 2, 1), (pairs, 2, 2), (pairs, 1, 2)):
+                    kickers = take(pool, rank, k)
+                    if kickers:
+                        kickers = [(r, width) for r in kickers]
+                        break
+            if kickers:
+                quads_used += 1
+            plays.append(_merge((rank, 4), *(kickers or ())))
+        plays.extend(_single_rank(r, 1) for r in singles)
+        plays.extend(_single_rank(r, 2) for r in pairs)
+        return plays, quads_used
+
+
+_solvers = {}
+_solvers_lock = threading.Lock()
+
+
+def get_solver(room_settings):
+    """返回与房间规则对应的共享求解器，同一规则组合只创建一次。"""
+    key = tuple(bool(room_settings.get(k, True)) for k in CLASSIFIER_RULE_KEYS)
+    solver = _solvers.get(key)
+    if solver is None:
+        with _solvers_lock:
+            solver = _solvers.get(key)
+            if solver is None:
+                solver = _solvers[key] = HandSolver(get_classifier(room_settings))
+    return solver
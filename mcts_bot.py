@@ -0,0 +1,217 @@
+# mcts_bot.py
+"""
+限时蒙特卡洛机器人：对根节点的候选出牌做 UCB1 选择，每次模拟先按未见牌随机“确定化”对手手牌，
+再用快速走子策略打完整局，以胜率决定出牌。接口与 BotPlayer 相同（decide_move）。
+
+整个模拟只在 15 个点数的计数向量上进行（牌型只取决于点数），选定后再映射回具体的牌。
+可以把模拟分摊到进程池（根并行）：各进程独立模拟同一组候选，最后合并访问次数与胜场。
+"""
+import math
+import os
+import random
+import threading
+import time
+from multiprocessing import Pool
+
+from ai_logic import BOT_TYPES, PASS_MOVE, BotPlayer
+from cards import NUM_RANKS, Hand, rank_counts
+from game_logic import BOMB_LIKE_TYPES, CLASSIFIER_RULE_KEYS, enumerate_legal_plays, get_classifier
+from hand_solver import get_solver
+
+DEFAULT_TIME_BUDGET = 0.5
+# 根节点最多保留的候选数（按“打出后还需几手”先验排序），启发式AI的选择总会保留
+MAX_ROOT_MOVES = 12
+UCB_EXPLORATION = 0.7
+# 走子策略中，上家剩余牌数不超过该值时才会用炸弹去压
+ROLLOUT_BOMB_THRESHOLD = 4
+MAX_ROLLOUT_TURNS = 1000
+# 每做这么多次模拟调用一次 pause(0)，让协作式服务器（eventlet/gevent）有机会处理其他事件
+PAUSE_EVERY = 8
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.terminate()
+            _pool, _pool_workers = Pool(workers), workers
+        return _pool
+
+
+# --- 计数向量上的模拟（模块级函数，便于在进程池中执行） ---
+
+def _subtract(counts, signature):
+    return [c - s for c, s in zip(counts, signature)]
+
+
+def _determinize(rng, position):
+    """把未见牌随机分给对手，张数与各对手实际剩余牌数一致（多余的即未发出的底牌）。"""
+    pool = [rank for rank, n in enumerate(position['unseen']) if n for _ in range(n)]
+    rng.shuffle(pool)
+    hands, offset = [], 0
+    for seat, size in enumerate(position['sizes']):
+        if seat == position['seat']:
+            hands.append(list(position['hand']))
+            continue
+        counts = [0] * NUM_RANKS
+        for rank in pool[offset:offset + size]:
+            counts[rank] += 1
+        offset += size
+        hands.append(counts)
+    return hands
+
+
+def _rollout_move(counts, last, hands, classifier, solver):
+    """快速走子策略：领出时打最优拆分中最小的非炸弹牌；跟牌时用最小的同型牌，必要时才炸。"""
+    if last is None:
+        plays = solver.solve(counts).plays
+        return min(plays, key=lambda p: (classifier.classify_signature(p).hand_type in BOMB_LIKE_TYPES,
+                                         classifier.classify_signature(p).value))
+    signature, last_seat = last
+    legal = enumerate_legal_plays(counts, classifier, classifier.classify_signature(signature))
+    for play in legal:
+        if play.info.hand_type not in BOMB_LIKE_TYPES:
+            return play.signature
+    if legal and sum(hands[last_seat]) <= ROLLOUT_BOMB_THRESHOLD:
+        return legal[0].signature
+    return None
+
+
+def _simulate(rng, position, move, classifier, solver):
+    """在一次确定化下先执行根节点的 move（None 表示过牌），再模拟到终局，返回获胜座位。"""
+    hands = _determinize(rng, position)
+    num_seats = len(hands)
+    last, turn = position['last'], position['seat']
+    for _ in range(MAX_ROLLOUT_TURNS):
+        if move is not False:
+            play, move = move, False
+        else:
+            play = _rollout_move(hands[turn], last, hands, classifier, solver)
+        if play is not None:
+            hands[turn] = _subtract(hands[turn], play)
+            if not any(hands[turn]):
+                return turn
+            last = (play, turn)
+        turn = (turn + 1) % num_seats
+        if last is not None and last[1] == turn:
+            last = None     # 一圈无人接牌，由出牌者重新领出
+    return None
+
+
+def run_simulations(position, moves, budget, seed, max_iterations=None, pause=None):
+    """在 budget 秒内对根节点候选做 UCB1 模拟，返回 (各候选胜场, 各候选访问次数, 模拟次数)。"""
+    rng = random.Random(seed)
+    classifier = get_classifier(position['settings'])
+    solver = get_solver(position['settings'])
+    wins, visits = [0.0] * len(moves), [0] * len(moves)
+    deadline = time.perf_counter() + budget
+    iterations = 0
+    while time.perf_counter() < deadline and (max_iterations is None or iterations < max_iterations):
+        iterations += 1
+        if iterations <= len(moves):
+            index = iterations - 1
+        else:
+            log_total = math.log(iterations)
+            index = max(range(len(moves)), key=lambda i: wins[i] / visits[i] + UCB_EXPLORATION * math.sqrt(log_total / visits[i]))
+        winner = _simulate(rng, position, moves[index], classifier, solver)
+        if pause is not None and iterations % PAUSE_EVERY == 0:
+            pause(0)
+        visits[index] += 1
+        wins[index] += winner == position['seat']
+    return wins, visits, iterations
+
+
+def _run_simulations_star(args):
+    return run_simulations(*args)
+
+
+class MonteCarloBot(BotPlayer):
+    """
+    限时蒙特卡洛AI：沿用 BotPlayer 的局面同步与记牌，决策时以启发式AI的选择为基准，
+    在时间预算内模拟比较若干候选出牌，选访问次数最多的一手。
+    时间预算与进程数可用环境变量 NETPDK_MCTS_BUDGET（秒）、NETPDK_MCTS_WORKERS 配置，也可直接改类属性。
+    """
+
+    time_budget = float(os.environ.get('NETPDK_MCTS_BUDGET', DEFAULT_TIME_BUDGET))
+    workers = max(1, int(os.environ.get('NETPDK_MCTS_WORKERS', 1)))
+    # 单进程搜索时定期调用的让出函数（服务端设为 socketio.sleep）；进程池只适用于 threading 模式
+    pause = None
+
+    def __init__(self, hand, game_state, game_logic_instance):
+        super().__init__(hand, game_state, game_logic_instance)
+        # 最近一次搜索的统计：模拟次数、耗时、进程数
+        self.last_search = None
+
+    def decide_move(self, deadline=None):
+        own_deadline = time.perf_counter() + self.time_budget
+        deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+        heuristic = super().decide_move(deadline)
+        position = self._position()
+        moves = self._root_moves(position, heuristic)
+        budget = deadline - time.perf_counter()
+        if len(moves) == 1 or budget <= 0:
+            self.last_search = None
+            return heuristic
+
+        started = time.perf_counter()
+        wins, visits, simulations = self._search(position, moves, budget)
+        self.last_search = {'simulations': simulations, 'elapsed': time.perf_counter() - started, 'workers': self.workers}
+        best = max(range(len(moves)), key=lambda i: (visits[i], wins[i]))
+        return self._to_cards(moves[best])
+
+    def _position(self):
+        """把当前局面压缩成只含点数计数的可序列化结构，座位按出牌顺序编号。"""
+        order = self.game_state['player_order']
+        last_cards, last_sid = self.game_state['last_played_cards'], self.game_state['last_player_sid']
+        last = None
+        if last_cards and last_sid != self.my_sid:
+            last = (tuple(rank_counts(last_cards)), order.index(last_sid))
+        return {
+            'settings': {k: self.game.room_settings.get(k, True) for k in CLASSIFIER_RULE_KEYS},
+            'seat': order.index(self.my_sid),
+            'hand': tuple(rank_counts(self.hand_backup)),
+            'sizes': [self.player_states[sid]['card_count'] for sid in order],
+            'unseen': tuple(max(0, n) for n in self.unseen_ranks),
+            'last': last,
+        }
+
+    def _root_moves(self, position, heuristic):
+        """根节点候选：按打出后剩余手数（到截止时间后改用估算）排序的前若干个合法出牌，加上过牌（跟牌时）和启发式AI的选择。"""
+        hand, last = list(position['hand']), position['last']
+        classifier = self.game.classifier
+        legal = enumerate_legal_plays(hand, classifier, classifier.classify_signature(last[0]) if last else None)
+        legal.sort(key=lambda p: (self._min_hands_bounded(_subtract(hand, p.signature)),
+                                  p.info.hand_type in BOMB_LIKE_TYPES, p.info.value))
+        moves = [p.signature for p in legal[:MAX_ROOT_MOVES]]
+        if last is not None:
+            moves.append(None)
+        heuristic_move = None if heuristic == PASS_MOVE else tuple(rank_counts(heuristic))
+        if heuristic_move not in moves:
+            moves.append(heuristic_move)
+        return moves
+
+    def _search(self, position, moves, budget):
+        if self.workers <= 1:
+            return run_simulations(position, moves, budget, random.randrange(1 << 30), pause=self.pause)
+        seed = random.randrange(1 << 30)
+        jobs = [(position, moves, budget, seed + i) for i in range(self.workers)]
+        wins, visits, simulations = [0.0] * len(moves), [0] * len(moves), 0
+        for w, v, n in _get_pool(self.workers).map(_run_simulations_star, jobs):
+            wins = [a + b for a, b in zip(wins, w)]
+            visits = [a + b for a, b in zip(visits, v)]
+            simulations += n
+        return wins, visits, simulations
+
+    def _to_cards(self, move):
+        if move is None:
+            return PASS_MOVE
+        hand = Hand(self.hand_backup)
+        return [card for rank, n in enumerate(move) if n for card in hand.peek_rank(rank, n)]
+
+
+BOT_TYPES['mcts'] = MonteCarloBot
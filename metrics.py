@@ -0,0 +1,288 @@
+# metrics.py
+"""
+轻量的进程内指标（计数器、仪表、直方图）与 Prometheus 文本格式输出，不依赖第三方库。
+
+每次记录只是在锁内做几次加法，可以常驻开启；抓取时才把数据渲染成文本。
+模块底部定义了服务端使用的全部指标，app.py 负责在各处记录并通过 /metrics 暴露。
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# 单位为秒的默认桶：覆盖亚毫秒级的规则判断到数秒的机器人思考
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 单位为字节的默认桶
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536, 262144, 1048576)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """返回某组标签值对应的子指标（首次使用时创建）。"""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        # 没有标签的指标直接在自身上记录
+        return self.labels()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, _format_labels(self.labelnames, values)))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [f'{name}_total{labels} {_format_value(self.value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    _new_child = _CounterChild
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """抓取时调用 function 取值，适合房间数、玩家数这类随时可算的量。"""
+        self.function = function
+
+    def samples(self, name, labels):
+        value = self.function() if self.function is not None else self.value
+        return [f'{name}{labels} {_format_value(value)}']
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self.observe)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        base = labels[1:-1] if labels else ''
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f'{name}_bucket{{{base + "," if base else ""}{le}}} {cumulative}')
+        lines.append(f'{name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{name}_count{labels} {count}')
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class _Timer:
+    """计时上下文管理器：退出时把耗时（秒）交给 observe。"""
+
+    __slots__ = ('_observe', '_started')
+
+    def __init__(self, observe):
+        self._observe = observe
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._observe(time.perf_counter() - self._started)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self):
+        """按 Prometheus 文本格式（0.0.4）输出全部指标。"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# --- 服务端指标 ---
+
+HANDLER_SECONDS = Histogram('netpdk_handler_seconds', 'Socket.IO 事件处理耗时（秒）', ['event'])
+HANDLER_ERRORS = Counter('netpdk_handler_errors', 'Socket.IO 事件处理中抛出的异常数', ['event'])
+EMITTED_BYTES = Histogram('netpdk_emitted_bytes', '服务端发出的每条消息编码后的字节数', ['event'], buckets=SIZE_BUCKETS)
+BOT_THINK_SECONDS = Histogram('netpdk_bot_think_seconds', '机器人决策（decide_move）实际计算耗时（秒）', ['bot'])
+BOT_SLEEP_SECONDS = Histogram('netpdk_bot_sleep_seconds', '机器人出牌前人为等待的时长（秒）')
+BOT_CACHE_LOOKUPS = Gauge('netpdk_bot_cache_lookups', '机器人共享缓存累计查询次数（本进程）', ['cache', 'result'])
+BOT_CACHE_ENTRIES = Gauge('netpdk_bot_cache_entries', '机器人共享缓存当前条目数（本进程）', ['cache'])
+SNAPSHOT_SECONDS = Histogram('netpdk_snapshot_seconds', '编码并写入一次全部房间快照的耗时（秒）')
+SNAPSHOT_BYTES = Gauge('netpdk_snapshot_bytes', '最近一次写入的快照文件大小（字节）')
+ACTIVE_ROOMS = Gauge('netpdk_active_rooms', '当前存在的房间数')
+ACTIVE_CONNECTIONS = Gauge('netpdk_active_connections', '当前在线的 Socket.IO 连接数')
+ACTIVE_PLAYERS = Gauge('netpdk_active_players', '各房间中的玩家数', ['kind'])
+ACTIVE_GAMES = Gauge('netpdk_active_games', '正在进行中的对局数')
+
+
+def instrument_handler(event):
+    """装饰 Socket.IO 事件处理函数：记录耗时，异常计数后照常抛出。"""
+    histogram = HANDLER_SECONDS.labels(event)
+    errors = HANDLER_ERRORS.labels(event)
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# Socket.IO 编码事件包时使用的分隔符
+_PACKET_SEPARATORS = (',', ':')
+
+
+class PreEncoded:
+    """
+    创建时就编码好的事件参数。python-socketio 向房间广播时按连接逐个编码事件包，
+    参数是 PreEncoded 时 MeasuredJSON 直接拼接这份文本，整个房间只序列化一次。
+    有意不继承 dict：构造事件包时 python-socketio 会逐层遍历 dict/list 查找二进制数据，独立对象被当作叶子跳过。
+    """
+    __slots__ = ('data', 'encoded')
+
+    def __init__(self, data):
+        self.data = data
+        self.encoded = json.dumps(data, separators=_PACKET_SEPARATORS)
+
+
+def _pre_encoded_data(obj):
+    if isinstance(obj, PreEncoded):
+        return obj.data
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class MeasuredJSON:
+    """
+    交给 Socket.IO 的 json 模块：编码事件包时顺便记录字节数，不做额外的序列化。
+    事件包的数据是 [事件名, 参数...]，据此按事件名归类。
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        if (isinstance(obj, list) and len(obj) == 2 and isinstance(obj[1], PreEncoded) and not args
+                and kwargs == {'separators': _PACKET_SEPARATORS}):
+            encoded = f'[{json.dumps(obj[0])},{obj[1].encoded}]'
+        else:
+            encoded = json.dumps(obj, *args, default=_pre_encoded_data, **kwargs)
+        if isinstance(obj, list) and obj and isinstance(obj[0], str):
+            # Socket.IO 编码时不关闭 ensure_ascii，字符数即字节数
+            EMITTED_BYTES.labels(obj[0]).observe(len(encoded))
+        return encoded
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return json.loads(s, *args, **kwargs)
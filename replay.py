@@ -0,0 +1,269 @@
+# replay.py
+"""
+已结束对局的回放记录：种子发牌 + 出牌流，外加每隔 KEYFRAME_INTERVAL 步一个完整 Game 的关键帧。
+
+跳到第 k 步时从不超过 k 的最近关键帧恢复，再重放至多 KEYFRAME_INTERVAL 步，不必从头模拟。
+关键帧由 snapshot.encode_game 编码，只保留最近几条事件（其余事件就是出牌流本身）。
+
+记录布局（小端）：
+    副牌数 u8 | 规则开关位 u8 | 结束时间 u32 | 玩家数 u8 + 每人（昵称、机器人标志 u8）
+    种子标志 u8 [+ 种子 u64] | 步数 u32 | 每步牌数 u8 一列 | 所有牌连成一段
+    关键帧间隔 u16 | 关键帧数 u16 | 每个关键帧：长度 u32 + 对局块（长度 0 表示省略）
+没有人出完之前轮次严格按座次轮转，所以每步的出牌者由步号推出，不单独存；牌数为 0 表示过牌。
+有种子时第 0 帧（刚发完牌）可由种子重新发牌得到，不存；从快照恢复的对局没有种子，第 0 帧照存。
+
+归档文件：b'NPRP' | 版本 u8 | 若干条：长度 u32 + zlib 压缩的记录。只追加，可整体批量读入做离线分析。
+"""
+import os
+import struct
+import time
+import zlib
+
+import snapshot
+from cards import Hand
+from game_logic import RECENT_PLAYS_IN_STATE, EventType, Game
+
+KEYFRAME_INTERVAL = 32
+ARCHIVE_MAGIC = b'NPRP'
+ARCHIVE_VERSION = 1
+
+_ARCHIVE_HEADER = struct.Struct('<4sB')
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_HEAD = struct.Struct('<BBI')                # 副牌数, 规则开关位, 结束时间
+_KEYFRAME_HEAD = struct.Struct('<HH')        # 关键帧间隔, 关键帧数
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def _seat(index):
+    return f'p{index}'
+
+
+class Replay:
+    """一局的回放。moves 为每步打出的牌 ID 元组（空元组为过牌），第 i 步的出牌者是座次第 i % 人数 位。"""
+
+    def __init__(self, settings, names, bots, moves, seed=None, deal=None, finished_at=0,
+                 interval=KEYFRAME_INTERVAL, keyframes=None):
+        self.settings = settings
+        self.names = names
+        self.bots = bots
+        self.moves = moves
+        self.seed = seed
+        # 各座位发到的牌；只在由对局构造、且种子无法重现发牌时用于生成第 0 帧
+        self.deal = deal
+        self.finished_at = finished_at
+        self.interval = interval
+        # keyframes[i] 为第 i * interval 步之后的对局块，None 表示未存；整体为 None 表示尚未生成
+        self.keyframes = keyframes
+
+    @classmethod
+    def from_game(cls, game):
+        """从刚结束的对局的事件日志构造回放（只复制数据，关键帧在首次编码或跳转时才生成）。"""
+        order = list(game.player_order)
+        index = {sid: i for i, sid in enumerate(order)}
+        deal, moves = [None] * len(order), []
+        for event_type, sid, cards in game.events:
+            if event_type == EventType.DEAL:
+                deal[index[sid]] = cards
+            else:
+                moves.append(cards)
+        seed = game.seed if isinstance(game.seed, int) and 0 <= game.seed < 1 << 64 else None
+        return cls(dict(game.room_settings), [game.players[sid]['name'] for sid in order],
+                   [game.players[sid]['is_bot'] for sid in order], moves, seed=seed, deal=deal,
+                   finished_at=int(time.time()))
+
+    @property
+    def winner(self):
+        """获胜者的座位号（最后一步的出牌者）。"""
+        return (len(self.moves) - 1) % len(self.names) if self.moves else None
+
+    def player_of(self, move_index):
+        return move_index % len(self.names)
+
+    # --- 关键帧与跳转 ---
+
+    def _dealt_game(self):
+        """刚发完牌的对局：按种子重新发牌；种子无法重现记录的发牌时直接摆上记录的手牌。"""
+        game = Game()
+        game.update_room_settings(self.settings)
+        for i, (name, is_bot) in enumerate(zip(self.names, self.bots)):
+            game.add_player(_seat(i), name, is_bot)
+        game.start_game(seed=self.seed if self.seed is not None else 0)
+        if self.seed is None:
+            if self.deal is None:
+                raise ReplayError('回放缺少发牌：既没有种子也没有第 0 帧')
+            for sid, cards in zip(game.player_order, self.deal):
+                game.players[sid]['hand'] = Hand(cards)
+            game.events = [(EventType.DEAL, sid, tuple(cards)) for sid, cards in zip(game.player_order, self.deal)]
+        return game
+
+    def _apply(self, game, start, stop):
+        for i in range(start, stop):
+            sid, cards = _seat(self.player_of(i)), self.moves[i]
+            ok = game.play_turn(sid, list(cards))[0] if cards else game.pass_turn(sid)[0]
+            if not ok:
+                raise ReplayError(f'第 {i} 步不合法，回放与规则不一致')
+
+    def _encode_keyframe(self, game):
+        return bytes(snapshot.encode_game(game, events=game.events[-RECENT_PLAYS_IN_STATE:]))
+
+    def build_keyframes(self):
+        """整局重放一遍，每 interval 步记一个关键帧。"""
+        game = self._dealt_game()
+        if self.seed is not None and self.deal is not None and [cards for _, _, cards in game.events] != list(self.deal):
+            # 种子重现不了记录的发牌（例如指定了非常规种子），改为存第 0 帧
+            self.seed = None
+            game = self._dealt_game()
+        keyframes = [None if self.seed is not None else self._encode_keyframe(game)]
+        for k in range(self.interval, len(self.moves) + 1, self.interval):
+            self._apply(game, k - self.interval, k)
+            keyframes.append(self._encode_keyframe(game))
+        self.keyframes = keyframes
+        return keyframes
+
+    def game_at(self, move):
+        """前 move 步之后的对局（0 为刚发完牌）。从最近的关键帧恢复，至多重放 interval 步。"""
+        if not 0 <= move <= len(self.moves):
+            raise ReplayError(f'步数 {move} 超出范围 0~{len(self.moves)}')
+        keyframes = self.keyframes if self.keyframes is not None else self.build_keyframes()
+        i = min(move // self.interval, len(keyframes) - 1)
+        game = snapshot.decode_game_bytes(keyframes[i]) if keyframes[i] is not None else self._dealt_game()
+        self._apply(game, i * self.interval, move)
+        return game
+
+    def view(self, move):
+        """回放页面在第 move 步看到的状态：公开状态加上所有人的手牌。"""
+        game = self.game_at(move)
+        state = game.get_public_state()
+        state.update(move=move, total_moves=len(self.moves),
+                     hands={sid: game.get_private_state(sid)['my_hand'] for sid in game.player_order},
+                     winner_sid=_seat(self.winner) if move == len(self.moves) else None)
+        return state
+
+    def summary(self):
+        return {'players': self.names, 'winner': self.names[self.winner] if self.moves else None,
+                'moves': len(self.moves), 'finished_at': self.finished_at, 'num_decks': self.settings.get('num_decks', 1)}
+
+    # --- 编码 ---
+
+    def encode(self, keyframes=True):
+        """编码为一条记录。keyframes 为 False 时只存发牌与出牌流，归档最小，读回后首次跳转时重建关键帧。"""
+        settings = self.settings
+        flags = sum(1 << i for i, key in enumerate(snapshot.SETTING_FLAGS) if settings.get(key, True))
+        out = bytearray(_HEAD.pack(int(settings.get('num_decks', 1)), flags, self.finished_at))
+        out += _U8.pack(len(self.names))
+        for name, is_bot in zip(self.names, self.bots):
+            snapshot.write_str(out, name)
+            out += _U8.pack(int(is_bot))
+        if keyframes and self.keyframes is None:
+            self.build_keyframes()
+        if self.seed is not None:
+            out += _U8.pack(1) + _U64.pack(self.seed)
+        else:
+            out += _U8.pack(0)
+        # 一手牌最多是一个人的全部手牌（6 副牌 2 人时 162 张），一个字节放得下
+        out += _U32.pack(len(self.moves))
+        out += bytes(len(cards) for cards in self.moves)
+        out += bytes(c for cards in self.moves for c in cards)
+
+        frames = self.keyframes if keyframes else []
+        if not keyframes and self.seed is None:
+            # 没有种子时第 0 帧就是发牌，必须保留
+            frames = (self.keyframes or self.build_keyframes())[:1]
+        out += _KEYFRAME_HEAD.pack(self.interval, len(frames))
+        for frame in frames:
+            frame = frame or b''
+            out += _U32.pack(len(frame))
+            out += frame
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        reader = snapshot.Reader(memoryview(data))
+        try:
+            num_decks, flags, finished_at = reader.unpack(_HEAD)
+            settings = {'num_decks': num_decks, **{key: bool(flags >> i & 1) for i, key in enumerate(snapshot.SETTING_FLAGS)}}
+            names, bots = [], []
+            for _ in range(reader.u8()):
+                names.append(reader.str())
+                bots.append(bool(reader.u8()))
+            seed = reader.unpack(_U64)[0] if reader.u8() else None
+            (num_moves,) = reader.unpack(_U32)
+            lengths = reader.raw(num_moves)
+            cards = bytes(reader.raw(sum(lengths)))
+            moves, pos = [], 0
+            for n in lengths:
+                moves.append(tuple(cards[pos:pos + n]))
+                pos += n
+            interval, count = reader.unpack(_KEYFRAME_HEAD)
+            frames = []
+            for _ in range(count):
+                (size,) = reader.unpack(_U32)
+                frames.append(bytes(reader.raw(size)) if size else None)
+        except (struct.error, IndexError, UnicodeDecodeError, snapshot.SnapshotError) as exc:
+            raise ReplayError(f'回放数据损坏: {exc}') from exc
+        if len(frames) == len(moves) // interval + 1:
+            return cls(settings, names, bots, moves, seed=seed, finished_at=finished_at, interval=interval,
+                       keyframes=frames)
+        # 不带关键帧的记录：没有种子时从第 0 帧取出发牌，关键帧在首次跳转时重建
+        deal = None
+        if seed is None:
+            if not frames:
+                raise ReplayError('回放缺少发牌：既没有种子也没有第 0 帧')
+            game = snapshot.decode_game_bytes(frames[0])
+            deal = [tuple(game.players[sid]['hand']) for sid in game.player_order]
+        return cls(settings, names, bots, moves, seed=seed, deal=deal, finished_at=finished_at, interval=interval)
+
+
+# --- 归档 ---
+
+def append_archive(path, replays, keyframes=True):
+    """把若干局追加到归档文件（不存在时新建），返回写入的字节数。"""
+    parts = []
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        parts.append(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+    for replay in replays:
+        blob = zlib.compress(replay.encode(keyframes))
+        parts.append(_U32.pack(len(blob)))
+        parts.append(blob)
+    data = b''.join(parts)
+    with open(path, 'ab') as f:
+        f.write(data)
+    return len(data)
+
+
+def iter_archive(data):
+    """逐局解码归档数据（bytes）；末尾写了一半的记录（进程在追加时退出）忽略。"""
+    if len(data) < _ARCHIVE_HEADER.size:
+        raise ReplayError('回放归档过短')
+    magic, version = _ARCHIVE_HEADER.unpack_from(data)
+    if magic != ARCHIVE_MAGIC:
+        raise ReplayError('不是 NetPDK 回放归档')
+    if version != ARCHIVE_VERSION:
+        raise ReplayError(f'回放归档版本 {version} 与当前版本 {ARCHIVE_VERSION} 不兼容')
+    view, pos = memoryview(data), _ARCHIVE_HEADER.size
+    while pos + _U32.size <= len(data):
+        (size,) = _U32.unpack_from(view, pos)
+        pos += _U32.size
+        if pos + size > len(data):
+            break
+        try:
+            record = zlib.decompress(view[pos:pos + size])
+        except zlib.error as exc:
+            raise ReplayError(f'回放归档损坏: {exc}') from exc
+        yield Replay.decode(record)
+        pos += size
+
+
+def read_archive(path):
+    """读入整个归档文件，返回 Replay 列表；文件不存在时返回空列表。"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    return list(iter_archive(data))
@@ -0,0 +1,199 @@
+# room_manager.py
+import re
+import secrets
+import threading
+import time
+from collections import deque
+
+from game_logic import Game
+
+DEFAULT_ROOM_ID = 'lobby'
+MAX_ROOM_ID_LENGTH = 32
+# 每个房间在内存里保留的最近几局回放
+REPLAYS_PER_ROOM = 20
+# 座位令牌的有效期（秒）：有掉线玩家还没凭令牌回来的房间，无连接后至少保留这么久，之后随房间一起回收
+SEAT_TOKEN_TTL = 900
+_ROOM_ID_PATTERN = re.compile(r'[^0-9A-Za-z_\-一-鿿]')
+
+
+def normalize_room_id(raw_room_id):
+    """把客户端传来的房间号规整为安全、有限长度的字符串。"""
+    room_id = _ROOM_ID_PATTERN.sub('', str(raw_room_id or '').strip())[:MAX_ROOM_ID_LENGTH]
+    return room_id or DEFAULT_ROOM_ID
+
+
+class Room:
+    """一张独立的牌桌：自己的 Game、房主、机器人计数，以及串行化所有变更的锁。"""
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.game = Game()
+        self.host_sid = None
+        self.bot_count = 0
+        # 与座位绑定、整局存活的AI实例（sid -> BotPlayer），每局开始时清空
+        self.bots = {}
+        # 同一房间内的事件必须串行执行；可重入是因为广播过程中可能再次修改状态
+        self.lock = threading.RLock()
+        self.connections = set()
+        # 协商使用 wire 二进制编码的连接，其余连接收 JSON
+        self.binary_connections = set()
+        # 座位令牌 -> 玩家 sid：断线后凭令牌在新连接上收回座位
+        self.seat_tokens = {}
+        # 最近一次编码的快照 (版本键, 字节)，状态未变时写快照直接复用
+        self.snapshot_cache = None
+        # 最近结束的几局回放 (局号, replay.Replay)，局号在房间内递增
+        self.replays = deque(maxlen=REPLAYS_PER_ROOM)
+        self.games_finished = 0
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def assign_host_if_needed(self, preferred_sid=None):
+        """确保房主始终是一个在线的人类玩家。"""
+        players = self.game.players
+
+        # 仅在当前没有有效房主时，才使用本次事件关联的人类玩家作为候选
+        if self.host_sid is None and preferred_sid and preferred_sid in players and not players[preferred_sid].get('is_bot', False):
+            self.host_sid = preferred_sid
+            return
+
+        # 如果当前房主仍是在线人类，则保持不变
+        if self.host_sid in players and not players[self.host_sid].get('is_bot', False):
+            return
+
+        # 否则按入场顺序寻找第一个人类玩家作为房主
+        for sid in self.game.player_order:
+            player = players.get(sid)
+            if player and not player.get('is_bot', False):
+                self.host_sid = sid
+                return
+
+        # 没有人类玩家时，房主置空
+        self.host_sid = None
+
+    def issue_seat_token(self, sid):
+        token = secrets.token_urlsafe(16)
+        self.seat_tokens[token] = sid
+        return token
+
+    def forget_seat(self, sid):
+        for token in [t for t, owner in self.seat_tokens.items() if owner == sid]:
+            del self.seat_tokens[token]
+
+    def reclaim_seat(self, token, new_sid):
+        """
+        凭令牌把掉线玩家的座位转给新连接，成功时返回玩家名，否则返回 None。
+        座位主人仍在线（例如同一玩家开了两个页面）时不允许收回。
+        """
+        old_sid = self.seat_tokens.get(token)
+        player = self.game.players.get(old_sid)
+        if player is None or not player['offline'] or not self.game.rebind_player(old_sid, new_sid):
+            return None
+        self.game.set_offline(new_sid, False)
+        self.seat_tokens[token] = new_sid
+        if self.host_sid == old_sid:
+            self.host_sid = new_sid
+        # 托管期间为该座位创建的AI实例不再需要
+        self.bots.pop(old_sid, None)
+        return player['name']
+
+    def add_replay(self, replay):
+        """保存一局的回放，返回它的局号。"""
+        self.games_finished += 1
+        self.replays.append((self.games_finished, replay))
+        return self.games_finished
+
+    def recent_replays(self):
+        """最近几局的 (局号, 回放) 列表。HTTP 接口不拿房间锁读取，复制一份再遍历，不受同时追加的影响。"""
+        return list(self.replays)
+
+    def find_replay(self, number):
+        return next((replay for n, replay in self.recent_replays() if n == number), None)
+
+    def has_unclaimed_seats(self):
+        """是否有掉线玩家的座位还等着凭令牌收回。"""
+        players = self.game.players
+        return any(players.get(sid, {}).get('offline') for sid in self.seat_tokens.values())
+
+    def is_idle(self, now, idle_seconds, seat_token_ttl=0):
+        if self.connections:
+            return False
+        if self.has_unclaimed_seats():
+            idle_seconds = max(idle_seconds, seat_token_ttl)
+        return now - self.last_active >= idle_seconds
+
+
+class RoomManager:
+    """创建、查找并回收多个互相独立的房间。"""
+
+    def __init__(self, idle_seconds=120, seat_token_ttl=SEAT_TOKEN_TTL):
+        self.idle_seconds = idle_seconds
+        self.seat_token_ttl = seat_token_ttl
+        self._rooms = {}
+        self._sid_rooms = {}
+        # 只保护房间表本身；房间内部状态由各自的 Room.lock 保护
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def rooms(self):
+        with self._lock:
+            return list(self._rooms.values())
+
+    def get(self, room_id):
+        return self._rooms.get(room_id)
+
+    def get_or_create(self, room_id):
+        room_id = normalize_room_id(room_id)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                room = self._rooms[room_id] = Room(room_id)
+            return room
+
+    def bind(self, sid, room_id):
+        """把一个连接绑定到房间（不存在则创建），返回该房间。"""
+        room_id = normalize_room_id(room_id)
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                room = self._rooms[room_id] = Room(room_id)
+            self._sid_rooms[sid] = room_id
+            room.connections.add(sid)
+            room.touch()
+            return room
+
+    def unbind(self, sid):
+        """解除连接与房间的绑定，返回原房间（可能为 None）。"""
+        with self._lock:
+            room = self._rooms.get(self._sid_rooms.pop(sid, None))
+            if room is not None:
+                room.connections.discard(sid)
+                room.binary_connections.discard(sid)
+                room.touch()
+            return room
+
+    def room_of(self, sid):
+        room_id = self._sid_rooms.get(sid)
+        return self._rooms.get(room_id) if room_id is not None else None
+
+    def restore(self, restored_rooms):
+        """加入从快照恢复的房间（同名房间不覆盖已有的）。"""
+        with self._lock:
+            for room in restored_rooms:
+                self._rooms.setdefault(room.room_id, room)
+
+    def collect_garbage(self, now=None):
+        """
+        回收已无任何连接且空闲超时的房间，返回被回收的房间列表。
+        有座位等着凭令牌收回的房间按 seat_token_ttl 计时；机器人每次落子都会刷新活跃时间，进行中的牌局不会被回收。
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [room for room in self._rooms.values()
+                       if room.is_idle(now, self.idle_seconds, self.seat_token_ttl)]
+            for room in expired:
+                del self._rooms[room.room_id]
+        return expired
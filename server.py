@@ -0,0 +1,141 @@
+# server.py
+"""
+生产环境入口：用协作式异步 worker（eventlet 或 gevent）运行 Socket.IO 服务，不启用调试器和自动重载。
+
+异步模式按 命令行 > 环境变量 NETPDK_ASYNC_MODE > 自动检测 的顺序确定；自动检测依次尝试 eventlet、gevent，
+都未安装时退回 threading（Werkzeug 服务器，仅适合小规模局域网使用）。
+gevent 模式需要同时安装 gevent-websocket 才能使用 WebSocket 传输，否则只能长轮询。
+--workers N（N>1）时本进程只做路由，另起 N 个 worker 进程与本地消息中转，见 cluster.py。
+进行中的对局会写入状态快照（默认 netpdk-snapshot.bin），重启后自动恢复，玩家凭座位令牌重连收回座位。
+--replay-archive 指定文件时，每局结束后把回放追加写入该归档（见 replay.py）。
+
+用法：
+    pip install -r requirements-prod.txt              # requirements.txt 加上 eventlet
+    python server.py
+    python server.py --async-mode gevent --host 0.0.0.0 --port 8000
+    NETPDK_ASYNC_MODE=eventlet NETPDK_PORT=8000 python server.py
+    python server.py --workers 4 --port 5000          # worker 使用 5001~5004，中转使用 5005
+"""
+import argparse
+import importlib.util
+import os
+import signal
+
+ASYNC_MODES = ('eventlet', 'gevent', 'threading')
+
+
+def detect_async_mode():
+    for mode in ('eventlet', 'gevent'):
+        if importlib.util.find_spec(mode) is not None:
+            return mode
+    return 'threading'
+
+
+def _monkey_patch(mode):
+    """把标准库的线程、套接字、time.sleep 换成协作式实现；必须在导入 app 之前执行。"""
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+
+# 协作式模式下检查是否收到退出信号的间隔（秒）
+SHUTDOWN_POLL = 0.2
+
+
+def _exit_on_signal(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _install_shutdown(netpdk, mode, save):
+    """
+    SIGTERM 与 Ctrl+C 一样正常退出，以便写下最后一次快照。
+    threading 下信号处理函数在主线程里抛出 KeyboardInterrupt 即可；协作式 worker 下它运行在事件循环中，
+    在那里抛出的异常停不下服务器，所以只记下收到了信号，由后台任务写快照、断开全部连接，再让服务器循环退出。
+    """
+    if mode == 'threading':
+        signal.signal(signal.SIGTERM, _exit_on_signal)
+        return
+    stopping = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: stopping.append(signum))
+    if mode == 'eventlet':
+        import eventlet.hubs
+        import greenlet
+        main = greenlet.getcurrent()
+
+    def watch():
+        while not stopping:
+            netpdk.socketio.sleep(SHUTDOWN_POLL)
+        save()
+        # 服务器退出前会等待所有请求处理完，长连接（WebSocket/长轮询）必须先断开；
+        # 不等待发送队列清空（eio.disconnect() 会等，已不再轮询的长轮询客户端会让它一直等下去）
+        eio = netpdk.socketio.server.eio
+        for client in list(eio.sockets.values()):
+            client.close(wait=False)
+        eio.sockets = {}
+        if mode == 'eventlet':
+            # eventlet 的服务器循环跑在主协程里：由事件循环把 KeyboardInterrupt 抛进去，与 Ctrl+C 同一条退出路径
+            eventlet.hubs.get_hub().schedule_call_global(0, main.throw, KeyboardInterrupt)
+        else:
+            netpdk.socketio.wsgi_server.stop()
+
+    netpdk.socketio.start_background_task(watch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NetPDK 生产环境服务器')
+    parser.add_argument('--host', default=os.environ.get('NETPDK_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('NETPDK_PORT', 5000)))
+    parser.add_argument('--async-mode', choices=('auto',) + ASYNC_MODES, default=os.environ.get('NETPDK_ASYNC_MODE', 'auto'))
+    parser.add_argument('--access-log', action='store_true', help='输出每个 HTTP 请求的访问日志')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('NETPDK_WORKERS', 1)),
+                        help='worker 进程数；大于 1 时按房间号分片，本进程只做路由')
+    parser.add_argument('--message-queue', default=os.environ.get('NETPDK_MESSAGE_QUEUE'),
+                        help='多 worker 时使用的外部消息队列（如 redis://），默认自动启动本地中转')
+    parser.add_argument('--snapshot', default=os.environ.get('NETPDK_SNAPSHOT', 'netpdk-snapshot.bin'),
+                        help='状态快照文件：启动时从中恢复对局，运行中定期写入，退出时再写一次；传空字符串关闭')
+    parser.add_argument('--replay-archive', default=os.environ.get('NETPDK_REPLAY_ARCHIVE', ''),
+                        help='回放归档文件：每局结束后追加写入（见 replay.py），默认不写')
+    args = parser.parse_args()
+
+    mode = detect_async_mode() if args.async_mode == 'auto' else args.async_mode
+    if args.workers > 1:
+        import cluster
+        cluster.run_cluster(args.host, args.port, args.workers, mode, args.message_queue, args.access_log, args.snapshot,
+                            args.replay_archive)
+        return
+    _monkey_patch(mode)
+    os.environ['NETPDK_ASYNC_MODE'] = mode
+
+    import app as netpdk
+    print(f'NetPDK 服务器启动: http://{args.host}:{args.port}（异步模式 {netpdk.socketio.async_mode}）')
+    if args.snapshot:
+        restored = netpdk.start_snapshots(args.snapshot)
+        print(f'从快照 {args.snapshot} 恢复了 {restored} 个房间')
+    if args.replay_archive:
+        netpdk.start_replay_archive(args.replay_archive)
+    saved = []
+
+    def save():
+        # 退出时只写一次快照：协作式模式下由退出任务先写，之后的 finally 不再重复
+        if args.snapshot and not saved:
+            saved.append(True)
+            netpdk.stop_snapshots()
+            print(f'已写入 {netpdk.save_snapshot(args.snapshot)} 个房间的状态快照', flush=True)
+
+    _install_shutdown(netpdk, mode, save)
+    options = {'allow_unsafe_werkzeug': True} if mode == 'threading' else {}
+    try:
+        netpdk.socketio.run(netpdk.app, host=args.host, port=args.port, debug=False, use_reloader=False,
+                            log_output=args.access_log, **options)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        save()
+
+
+if __name__ == '__main__':
+    main()
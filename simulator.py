@@ -0,0 +1,143 @@
+# simulator.py
+"""
+无界面的机器人自对弈模拟器：不依赖 Flask / Socket.IO，也没有人为的思考等待。
+
+按种子发牌，把 N 局机器人对局分片到进程池中并行执行，统计每秒局数、平均决策耗时、
+各座位/各版本机器人的胜率以及不合法决策触发保底动作（FALLBACK）的次数。
+
+用法：
+    python simulator.py --games 10000 --seats heuristic,heuristic,heuristic --workers 4
+"""
+import argparse
+import json
+import os
+import time
+import traceback
+from collections import Counter
+from multiprocessing import Pool
+
+import mcts_bot  # noqa: F401  导入即注册 'mcts' 机器人
+from ai_logic import BOT_TYPES, apply_bot_move, decide_bot_move
+from game_logic import RULE_PRESETS, Game
+
+PRESETS = RULE_PRESETS
+
+MAX_TURNS = 5000
+
+
+def play_game(seed, seats, settings, persistent_bots=True):
+    """用给定种子完整地打一局，返回本局统计。persistent_bots 为 False 时每回合新建AI（旧行为，用于对比）。"""
+    game = Game()
+    game.update_room_settings(settings)
+    for i, bot_type in enumerate(seats):
+        game.add_player(f'seat{i}', f'{bot_type}#{i}', is_bot=True)
+    game.start_game(seed=seed)
+
+    result = {'seed': seed, 'winner': None, 'turns': 0, 'decisions': 0, 'decision_time': 0.0,
+              'fallbacks': 0, 'error': None}
+    seat_of = {sid: i for i, sid in enumerate(game.player_order)}
+    bots = {} if persistent_bots else None
+    while result['turns'] < MAX_TURNS:
+        sid = game.current_turn_sid
+        bot_class = BOT_TYPES[seats[seat_of[sid]]]
+        started = time.perf_counter()
+        try:
+            move = decide_bot_move(game, sid, bot_class, bots)
+        except Exception:
+            result['error'] = traceback.format_exc(limit=3)
+            return result
+        result['decision_time'] += time.perf_counter() - started
+        result['decisions'] += 1
+
+        status, _, _ = apply_bot_move(game, sid, move)
+        result['turns'] += 1
+        if status == 'FALLBACK':
+            result['fallbacks'] += 1
+        elif status == 'WIN':
+            result['winner'] = seat_of[sid]
+            return result
+    result['error'] = f'超过 {MAX_TURNS} 回合仍未结束'
+    return result
+
+
+def _play_shard(args):
+    seeds, seats, settings, persistent_bots = args
+    return [play_game(seed, seats, settings, persistent_bots) for seed in seeds]
+
+
+def simulate(num_games, seats, settings, workers=1, base_seed=0, shard_size=50, persistent_bots=True):
+    """并行模拟 num_games 局，返回汇总统计（可直接序列化为 JSON）。"""
+    seeds = list(range(base_seed, base_seed + num_games))
+    shards = [(seeds[i:i + shard_size], seats, settings, persistent_bots) for i in range(0, len(seeds), shard_size)]
+
+    started = time.perf_counter()
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = [r for shard in pool.imap_unordered(_play_shard, shards) for r in shard]
+    else:
+        results = [r for shard in map(_play_shard, shards) for r in shard]
+    elapsed = time.perf_counter() - started
+
+    finished = [r for r in results if r['winner'] is not None]
+    seat_wins = Counter(r['winner'] for r in finished)
+    type_wins = Counter(seats[r['winner']] for r in finished)
+    type_seats = Counter(seats)
+    decisions = sum(r['decisions'] for r in results)
+    errors = [r for r in results if r['error']]
+    return {
+        'games': len(results),
+        'finished': len(finished),
+        'elapsed_s': elapsed,
+        'games_per_s': len(results) / elapsed if elapsed else 0.0,
+        'avg_turns': sum(r['turns'] for r in results) / max(1, len(results)),
+        'avg_decision_ms': sum(r['decision_time'] for r in results) / max(1, decisions) * 1000,
+        'fallbacks': sum(r['fallbacks'] for r in results),
+        'errors': len(errors),
+        'first_error': errors[0]['error'] if errors else None,
+        'seat_win_rate': {f'seat{i}({t})': seat_wins[i] / max(1, len(finished)) for i, t in enumerate(seats)},
+        # 按版本统计时除以该版本占据的座位数，便于不同座位数的版本间比较
+        'bot_win_rate_per_seat': {t: type_wins[t] / max(1, len(finished)) / n for t, n in type_seats.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无界面机器人自对弈模拟器')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seats', default='heuristic,heuristic,heuristic',
+                        help=f'逗号分隔的各座位机器人版本，可选: {", ".join(BOT_TYPES)}')
+    parser.add_argument('--decks', type=int, default=1)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='full')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0, help='第一局的种子，之后逐局递增')
+    parser.add_argument('--mcts-budget', type=float, default=None, help='蒙特卡洛AI每步的思考时间（秒）')
+    parser.add_argument('--fresh-bots', action='store_true', help='每回合新建AI实例（旧行为，用于对比决策耗时）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出统计结果')
+    args = parser.parse_args()
+
+    seats = [s.strip() for s in args.seats.split(',') if s.strip()]
+    unknown = [s for s in seats if s not in BOT_TYPES]
+    if unknown or len(seats) < 2:
+        parser.error(f'座位配置无效: {args.seats}')
+    settings = {'num_decks': args.decks, **PRESETS[args.preset]}
+    if args.mcts_budget is not None:
+        # 工作进程由 fork 创建，会继承这里修改后的类属性
+        mcts_bot.MonteCarloBot.time_budget = args.mcts_budget
+
+    stats = simulate(args.games, seats, settings, workers=args.workers, base_seed=args.seed,
+                     persistent_bots=not args.fresh_bots)
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return
+    print(f"对局: {stats['games']}（完成 {stats['finished']}，出错 {stats['errors']}）  "
+          f"{stats['games_per_s']:.1f} 局/秒  平均 {stats['avg_turns']:.1f} 回合")
+    print(f"平均决策耗时: {stats['avg_decision_ms']:.3f} ms  保底动作次数: {stats['fallbacks']}")
+    for seat, rate in stats['seat_win_rate'].items():
+        print(f"  {seat}: 胜率 {rate:.1%}")
+    for bot_type, rate in stats['bot_win_rate_per_seat'].items():
+        print(f"  版本 {bot_type}: 每座位胜率 {rate:.1%}")
+    if stats['first_error']:
+        print(f"首个错误:\n{stats['first_error']}")
+
+
+if __name__ == '__main__':
+    main()
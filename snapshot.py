@@ -0,0 +1,244 @@
+# snapshot.py
+"""
+对局状态的紧凑二进制快照，用于进程重启后恢复进行中的牌局。
+
+文件布局（小端）：
+    b'NPDK' | 版本 u8 | 房间数 u32 | 每个房间：长度 u32 + 房间块
+房间块：房间号、机器人计数、房主、座位令牌，后接对局块。
+对局块：规则（副牌数 + 开关位）、开局标志、状态版本号、玩家（sid、昵称、标志、手牌）、座次、
+当前/上一手玩家、桌面上的牌、各点数总张数与已出张数、事件日志。
+牌按牌 ID 存一个字节，手牌存为每个牌 ID 的张数（54 字节），玩家在块内按下标引用，字符串为 u16 长度 + UTF-8。
+
+上一手的牌型在恢复时由识别器重新算出；增量基线与AI实例不保存，恢复后客户端先收到完整快照，AI按需重建。
+"""
+import os
+import struct
+from array import array
+from itertools import accumulate
+
+from cards import NUM_CARD_IDS, NUM_RANKS, Hand
+from game_logic import UNKNOWN_PLAY, Game, get_classifier
+from room_manager import Room
+
+MAGIC = b'NPDK'
+SNAPSHOT_VERSION = 1
+# 规则开关在标志字节中的位序；修改时必须提升 SNAPSHOT_VERSION
+SETTING_FLAGS = ('include_jokers', 'allow_airplane_wings', 'allow_four_with_two', 'allow_rocket')
+NO_PLAYER = 0xFF
+
+_HEADER = struct.Struct('<4sBI')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_GAME_HEAD = struct.Struct('<BBBI')          # 副牌数, 规则开关位, 开局标志, 状态版本号
+_RANK_COUNTS = struct.Struct(f'<{2 * NUM_RANKS}H')
+
+PLAYER_IS_BOT = 1
+PLAYER_OFFLINE = 2
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# --- 编码 ---
+
+def write_str(out, text):
+    """追加一个字符串（u16 长度 + UTF-8），其他格式（如回放记录）复用同样的写法。"""
+    data = text.encode('utf-8')
+    out += _U16.pack(len(data))
+    out += data
+
+
+def _cards(out, cards):
+    out += _U16.pack(len(cards))
+    out += bytes(cards)
+
+
+def encode_game(game, out=None, events=None):
+    """把 Game 追加编码到 bytearray（不传时新建），返回该 bytearray。events 可替换要写入的事件日志（如只保留末尾几条）。"""
+    out = bytearray() if out is None else out
+    settings = game.room_settings
+    flags = sum(1 << i for i, key in enumerate(SETTING_FLAGS) if settings.get(key, True))
+    out += _GAME_HEAD.pack(int(settings.get('num_decks', 1)), flags, int(game.game_started), game.state_version)
+
+    index = {sid: i for i, sid in enumerate(game.players)}
+    out += _U8.pack(len(index))
+    for sid, player in game.players.items():
+        write_str(out, sid)
+        write_str(out, player['name'])
+        out += _U8.pack((PLAYER_IS_BOT if player['is_bot'] else 0) | (PLAYER_OFFLINE if player['offline'] else 0))
+        out += bytes(player['hand'].card_counts())
+    out += _U8.pack(len(game.player_order))
+    out += bytes(index[sid] for sid in game.player_order)
+    out += bytes((index.get(game.current_turn_sid, NO_PLAYER), index.get(game.last_player_sid, NO_PLAYER)))
+    _cards(out, game.last_played_cards)
+    out += _RANK_COUNTS.pack(*game.total_rank_counts, *game.seen_rank_counts)
+
+    # 事件日志按列存放：类型、玩家下标、牌数各一列，所有牌连成一段
+    events = game.events if events is None else events
+    out += _U32.pack(len(events))
+    out += bytes(event_type for event_type, _, _ in events)
+    out += bytes(index.get(sid, NO_PLAYER) for _, sid, _ in events)
+    out += array('H', [len(cards) for _, _, cards in events]).tobytes()
+    out += bytes(c for _, _, cards in events for c in cards)
+    return out
+
+
+def encode_room(room):
+    """编码一个房间；状态版本与房主未变时复用上次的结果。调用方需持有 room.lock。"""
+    key = (room.game.state_version, room.host_sid, len(room.seat_tokens))
+    if room.snapshot_cache is not None and room.snapshot_cache[0] == key:
+        return room.snapshot_cache[1]
+    game = room.game
+    index = {sid: i for i, sid in enumerate(game.players)}
+    out = bytearray()
+    write_str(out, room.room_id)
+    out += _U32.pack(room.bot_count)
+    out += _U8.pack(index.get(room.host_sid, NO_PLAYER))
+    tokens = [(token, index[sid]) for token, sid in room.seat_tokens.items() if sid in index]
+    out += _U8.pack(len(tokens))
+    for token, player_index in tokens:
+        write_str(out, token)
+        out += _U8.pack(player_index)
+    encode_game(game, out)
+    blob = bytes(out)
+    room.snapshot_cache = (key, blob)
+    return blob
+
+
+def pack_rooms(blobs):
+    parts = [_HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(blobs))]
+    for blob in blobs:
+        parts.append(_U32.pack(len(blob)))
+        parts.append(blob)
+    return b''.join(parts)
+
+
+def write_snapshot(path, blobs):
+    """写入快照文件：先写临时文件再原子替换，写到一半崩溃也不会留下残缺的快照。返回字节数。"""
+    data = pack_rooms(blobs)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+# --- 解码 ---
+
+class Reader:
+    """按顺序读取块内字段的游标；与 write_str 配对的字符串由 str() 读出。"""
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def u8(self):
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def raw(self, n):
+        value = self.data[self.pos:self.pos + n]
+        if len(value) != n:
+            raise SnapshotError('快照数据被截断')
+        self.pos += n
+        return value
+
+    def str(self):
+        (n,) = self.unpack(_U16)
+        return bytes(self.raw(n)).decode('utf-8')
+
+    def cards(self):
+        (n,) = self.unpack(_U16)
+        return list(self.raw(n))
+
+
+def decode_game(reader):
+    num_decks, flags, started, state_version = reader.unpack(_GAME_HEAD)
+    game = Game()
+    game.room_settings.update({'num_decks': num_decks},
+                              **{key: bool(flags >> i & 1) for i, key in enumerate(SETTING_FLAGS)})
+    game.classifier = get_classifier(game.room_settings)
+    game.game_started = bool(started)
+    game.state_version = state_version
+
+    sids = []
+    for _ in range(reader.u8()):
+        sid, name, player_flags = reader.str(), reader.str(), reader.u8()
+        game.players[sid] = {'name': name, 'hand': Hand.from_card_counts(reader.raw(NUM_CARD_IDS)),
+                             'is_bot': bool(player_flags & PLAYER_IS_BOT), 'offline': bool(player_flags & PLAYER_OFFLINE)}
+        sids.append(sid)
+    player_of = sids + [None] * (NO_PLAYER + 1 - len(sids))
+    game.player_order = [sids[i] for i in reader.raw(reader.u8())]
+    game.current_turn_sid = player_of[reader.u8()]
+    game.last_player_sid = player_of[reader.u8()]
+    game.last_played_cards = reader.cards()
+    game.last_play_info = game.classifier.classify(game.last_played_cards) if game.last_played_cards else UNKNOWN_PLAY
+    counts = reader.unpack(_RANK_COUNTS)
+    game.total_rank_counts, game.seen_rank_counts = list(counts[:NUM_RANKS]), list(counts[NUM_RANKS:])
+
+    (num_events,) = reader.unpack(_U32)
+    types = reader.raw(num_events)
+    players = reader.raw(num_events)
+    lengths = array('H')
+    lengths.frombytes(reader.raw(2 * num_events))
+    cards = bytes(reader.raw(sum(lengths)))
+    ends = list(accumulate(lengths))
+    game.events = [(event_type, player_of[player_index], tuple(cards[end - n:end]))
+                   for event_type, player_index, n, end in zip(types, players, lengths, ends)]
+    return game, sids
+
+
+def decode_game_bytes(data):
+    """解码一段单独的对局块（encode_game 的输出，如回放的关键帧），返回 Game。"""
+    return decode_game(Reader(memoryview(data)))[0]
+
+
+def decode_room(data):
+    reader = Reader(memoryview(data))
+    room = Room(reader.str())
+    (room.bot_count,) = reader.unpack(_U32)
+    host_index = reader.u8()
+    tokens = [(reader.str(), reader.u8()) for _ in range(reader.u8())]
+    room.game, sids = decode_game(reader)
+    room.host_sid = sids[host_index] if host_index != NO_PLAYER else None
+    room.seat_tokens = {token: sids[i] for token, i in tokens}
+    return room
+
+
+def unpack_rooms(data):
+    if len(data) < _HEADER.size:
+        raise SnapshotError('快照文件过短')
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError('不是 NetPDK 快照文件')
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f'快照版本 {version} 与当前版本 {SNAPSHOT_VERSION} 不兼容')
+    view, pos, rooms = memoryview(data), _HEADER.size, []
+    try:
+        for _ in range(count):
+            (size,) = _U32.unpack_from(view, pos)
+            pos += _U32.size
+            rooms.append(decode_room(view[pos:pos + size]))
+            pos += size
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise SnapshotError(f'快照数据损坏: {exc}') from exc
+    return rooms
+
+
+def read_snapshot(path):
+    """读取快照文件并恢复全部房间；文件不存在时返回空列表。"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    return unpack_rooms(data)
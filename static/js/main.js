@@ -1,5 +1,10 @@
 document.addEventListener('DOMContentLoaded', () => {
-    const socket = io();
+    const roomId = new URLSearchParams(window.location.search).get('room') || 'lobby';
+    // 座位令牌按房间保存；断线重连（包括刷新页面、服务器重启）时凭它收回对局中的座位
+    const seatKey = `netpdk-seat-${roomId}`;
+    // 事件编码在连接时协商：默认请求 wire 二进制（见 wire.js），加 ?wire=json 或解码器未载入时用 JSON
+    const wireFormat = (typeof NetPDKWire !== 'undefined' && new URLSearchParams(window.location.search).get('wire') !== 'json') ? 'binary' : 'json';
+    const socket = io({ query: { room: roomId }, auth: (cb) => cb({ seat_token: localStorage.getItem(seatKey), wire: wireFormat }) });
 
     const lobbyView = document.getElementById('lobby-view');
     const gameView = document.getElementById('game-view');
@@ -18,14 +23,25 @@ document.addEventListener('DOMContentLoaded', () => {
     const opponentsArea = document.getElementById('opponents-area');
     const lastPlayInfo = document.getElementById('last-play-info');
     const lastPlayedCardsDiv = document.getElementById('last-played-cards');
+    const recentPlaysP = document.getElementById('recent-plays');
     const myName = document.getElementById('my-name');
     const myHandDiv = document.getElementById('my-hand');
     const playBtn = document.getElementById('play-btn');
     const passBtn = document.getElementById('pass-btn');
     const clearBtn = document.getElementById('clear-btn');
     const sortBtn = document.getElementById('sort-btn');
+    const hintBtn = document.getElementById('hint-btn');
+    const selectionInfo = document.getElementById('selection-info');
+    const lastReplay = document.getElementById('last-replay');
+    // 服务端导出的规则表，随页面下发，用于本地预检选中的牌
+    const rulesTable = JSON.parse(document.getElementById('rules-table').textContent);
 
-    let mySid = null, selectedCardIndexes = [], currentHand = [];
+    // 手牌按键管理：同一张牌（多副牌）按出现次序编号成唯一的键，如 '♠3#0'、'♠3#1'；选择也按键保存
+    let mySid = null, selectedKeys = new Set(), handKeys = [];
+    let gameState = null, stateVersion = -1, pendingState = null;
+    // 服务端单独发来的私有状态（自己的 sid 与手牌）；公开状态对房间内所有人相同，按版本号与它合并
+    let privateState = null;
+    let hints = [], hintIndex = 0, hintVersion = -1;
     const CARD_ORDER = { '3':3,'4':4,'5':5,'6':6,'7':7,'8':8,'9':9,'10':10,'J':11,'Q':12,'K':13,'A':14,'2':15,'小王':16,'大王':17 };
     const SUIT_ORDER = { '♣':1, '♦':2, '♥':3, '♠':4 };
 
@@ -33,24 +49,92 @@ document.addEventListener('DOMContentLoaded', () => {
     const currentUrl = new URL(window.location.href);
     const isLocalLoopback = ['127.0.0.1', 'localhost', '::1'].includes(currentUrl.hostname);
     const shareUrl = (isLocalLoopback && lanIp)
-        ? `${currentUrl.protocol}//${lanIp}${currentUrl.port ? `:${currentUrl.port}` : ''}${currentUrl.pathname}`
-        : currentUrl.href;
-    roomUrl.textContent = `分享地址：${shareUrl}`;
+        ? `${currentUrl.protocol}//${lanIp}${currentUrl.port ? `:${currentUrl.port}` : ''}${currentUrl.pathname}?room=${encodeURIComponent(roomId)}`
+        : `${currentUrl.origin}${currentUrl.pathname}?room=${encodeURIComponent(roomId)}`;
+    roomUrl.textContent = `房间 ${roomId} · 分享地址：${shareUrl}`;
     roomQr.src = `https://api.qrserver.com/v1/create-qr-code/?size=180x180&data=${encodeURIComponent(shareUrl)}`;
 
     joinBtn.onclick = () => { const n=nameInput.value.trim(); if(n){socket.emit('join_game',{name:n}); joinBtn.disabled=true; nameInput.disabled=true;} };
     startBtn.onclick = () => socket.emit('start_game');
     addBotBtn.onclick = () => socket.emit('add_bot');
     applySettingsBtn.onclick = () => socket.emit('update_room_settings', {num_decks:Number(deckCountSelect.value), preset:rulePresetSelect.value});
-    playBtn.onclick = () => selectedCardIndexes.length>0 ? socket.emit('play_cards',{cards:selectedCardIndexes.map(i => currentHand[i])}) : alert('请先选择要出的牌！');
+    playBtn.onclick = () => selectedKeys.size>0 ? socket.emit('play_cards',{cards:handKeys.filter(k => selectedKeys.has(k)).map(cardOfKey)}) : alert('请先选择要出的牌！');
     passBtn.onclick = () => socket.emit('pass_turn');
-    clearBtn.onclick = () => { myHandDiv.querySelectorAll('.card.selected').forEach(d=>d.classList.remove('selected')); selectedCardIndexes=[]; };
-    sortBtn.onclick = () => { currentHand = sortCards(currentHand); renderCards(myHandDiv, currentHand); };
-    myHandDiv.onclick = (e) => { const c=e.target.closest('.card'); if(!c) return; const idx=Number(c.dataset.handIndex); c.classList.toggle('selected'); selectedCardIndexes = selectedCardIndexes.includes(idx) ? selectedCardIndexes.filter(i => i !== idx) : [...selectedCardIndexes, idx]; };
+    clearBtn.onclick = () => { selectedKeys.clear(); paintSelection(); checkSelection(); };
+    hintBtn.onclick = () => { if (hints.length && hintVersion === stateVersion) { showNextHint(); } else { hintVersion = stateVersion; socket.emit('request_hint'); } };
+    sortBtn.onclick = () => { handKeys = sortKeys(handKeys); renderHand(); };
+    myHandDiv.onclick = (e) => { const c=e.target.closest('.card'); if(!c) return; const key=c.dataset.key; if (!selectedKeys.delete(key)) selectedKeys.add(key); c.classList.toggle('selected', selectedKeys.has(key)); checkSelection(); };
 
     socket.on('error', (data) => alert('错误: ' + data.message));
-    socket.on('game_update', (state) => {
+    socket.on('seat_token', (data) => localStorage.setItem(seatKey, data.token));
+    socket.on('hint', (data) => { hints = data.plays; hintIndex = 0; if (!hints.length) { gameMessage.textContent = '没有能压过上家的牌，只能 pass。'; return; } showNextHint(); });
+    function showNextHint(){
+        // 依次循环提示；同一张牌可能有多张（多副牌），按未被占用的键匹配
+        const play = hints[hintIndex++ % hints.length];
+        selectedKeys = new Set();
+        play.forEach(card => { const key = handKeys.find(k => cardOfKey(k) === card && !selectedKeys.has(k)); if (key) selectedKeys.add(key); });
+        paintSelection();
+        checkSelection();
+    }
+    function checkSelection(){
+        // 本地预检当前选择：标出牌型，不合法或没轮到自己时禁用出牌按钮；服务端仍会再校验一次
+        const state = gameState, cards = handKeys.filter(k => selectedKeys.has(k)).map(cardOfKey);
+        const isMyTurn = Boolean(state) && state.current_turn_sid === mySid;
+        if (!cards.length) { setText(selectionInfo, ''); selectionInfo.classList.remove('invalid'); playBtn.disabled = true; return; }
+        const isLead = !state.last_played_cards.length || state.current_turn_sid === state.last_player_sid;
+        const result = NetPDKRules.check(cards, isLead ? [] : state.last_played_cards, rulesTable, state.room_settings || {});
+        setText(selectionInfo, result.ok ? `${result.label}（${cards.length} 张）` : (result.label ? `${result.label}：${result.reason}` : result.reason));
+        selectionInfo.classList.toggle('invalid', !result.ok);
+        playBtn.disabled = !isMyTurn || !result.ok;
+    }
+    const isBinary = (data) => data instanceof ArrayBuffer || ArrayBuffer.isView(data);
+    // 私有状态先于同版本的公开状态到达；旁观者只在连接时收到一次（手牌为空）
+    function withPrivate(state){
+        state.my_sid = privateState ? privateState.my_sid : null;
+        state.my_hand = privateState && privateState.state_version === state.state_version ? privateState.my_hand : [];
+        return state;
+    }
+    socket.on('private_state', (data) => {
+        privateState = isBinary(data) ? NetPDKWire.decodePrivate(data) : data;
+        if (gameState && gameState.state_version === privateState.state_version) applyState(withPrivate(gameState));
+    });
+    socket.on('game_update', (data) => { const state = withPrivate(isBinary(data) ? NetPDKWire.decodeState(data) : data); gameState = state; stateVersion = state.state_version; applyState(state); });
+    socket.on('game_delta', (data) => {
+        // 版本不连续（漏收或乱序）时丢弃增量，向服务端要一份完整快照
+        if (!gameState) { socket.emit('request_resync'); return; }
+        const delta = isBinary(data) ? NetPDKWire.decodeDelta(data, gameState.players) : data;
+        if (delta.state_version !== stateVersion + 1) { socket.emit('request_resync'); return; }
+        delta.ops.forEach(op => applyOp(gameState, op));
+        gameState.message = delta.message;
+        stateVersion = gameState.state_version = delta.state_version;
+        applyState(gameState);
+    });
+    // 与服务端 RECENT_PLAYS_IN_STATE 保持一致
+    const RECENT_PLAYS_LIMIT = 5;
+    function pushRecentPlay(state, sid, cards){
+        state.recent_plays = (state.recent_plays || []).concat([{sid, cards}]).slice(-RECENT_PLAYS_LIMIT);
+    }
+    function applyOp(state, op){
+        if (op.op === 'pass') { pushRecentPlay(state, op.sid, []); }
+        else if (op.op === 'play') {
+            pushRecentPlay(state, op.sid, op.cards);
+            state.last_played_cards = op.cards; state.last_player_sid = op.sid;
+            const p = state.players.find(a => a.sid === op.sid); if (p) p.card_count -= op.cards.length;
+            if (op.sid === state.my_sid) { const hand = state.my_hand.slice(); op.cards.forEach(c => { const i = hand.indexOf(c); if (i >= 0) hand.splice(i, 1); }); state.my_hand = hand; }
+        } else if (op.op === 'turn') { state.current_turn_sid = op.sid; }
+        else if (op.op === 'clear') { state.last_played_cards = []; }
+    }
+    // 同一帧内到达的多次更新只渲染最后一次
+    function applyState(state){
+        if (pendingState === null) requestAnimationFrame(flushState);
+        pendingState = state;
+    }
+    function flushState(){
+        const state = pendingState;
+        pendingState = null;
         mySid = state.my_sid;
+        const joined = state.players.some(p => p.sid === mySid);
+        joinBtn.disabled = nameInput.disabled = joined;
         const isHost = state.host_sid === mySid;
         startBtn.disabled = !isHost;
         applySettingsBtn.disabled = !isHost;
@@ -60,23 +144,57 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         if (state.game_started) { lobbyView.style.display='none'; gameView.style.display='flex'; renderGame(state); }
         else { lobbyView.style.display='block'; gameView.style.display='none'; renderLobby(state.players); }
-    });
-    socket.on('game_over', (data) => { alert(`游戏结束！获胜者是: ${data.winner_name}`); lobbyView.style.display='block'; gameView.style.display='none'; });
+    }
+    socket.on('game_over', (data) => { alert(`游戏结束！获胜者是: ${data.winner_name}`); lobbyView.style.display='block'; gameView.style.display='none';
+        // 服务端把刚结束的一局存为回放，大厅里给出回放页面的链接
+        if (data.replay) lastReplay.innerHTML = `<a href="/replay?room=${encodeURIComponent(roomId)}&game=${data.replay}" target="_blank">查看上一局回放</a>`; });
 
-    function renderLobby(players){ lobbyPlayersList.innerHTML=''; players.forEach(p=>{const li=document.createElement('li');li.textContent=`${p.name}${p.is_bot?' (Bot)':''}`; lobbyPlayersList.appendChild(li);}); }
-    function renderGame(state){ selectedCardIndexes=[]; const myData=state.players.find(p=>p.sid===mySid); myName.textContent=myData?`${myData.name} (你)`:'我的手牌'; currentHand=sortCards(state.my_hand.slice()); updateHandLayout(currentHand.length); renderCards(myHandDiv,currentHand);
-        lastPlayInfo.textContent=state.last_played_cards.length?`${state.players.find(p=>p.sid===state.last_player_sid)?.name||''} 打出:`:'等待出牌...'; renderCards(lastPlayedCardsDiv,state.last_played_cards);
-        opponentsArea.innerHTML=''; state.player_order.forEach(sid=>{if(sid===mySid)return; const p=state.players.find(a=>a.sid===sid); if(!p)return; const o=document.createElement('div'); o.className='opponent'; if(p.sid===state.current_turn_sid)o.classList.add('active-turn'); o.innerHTML=`<h4>${p.name}${p.is_bot?' (Bot)':''}</h4><p>剩余: ${p.card_count} 张</p>`; opponentsArea.appendChild(o);});
-        const isMyTurn=state.current_turn_sid===mySid; playBtn.disabled=!isMyTurn; clearBtn.disabled=!isMyTurn; passBtn.disabled=!isMyTurn||!state.last_played_cards.length; document.querySelector('#my-area').classList.toggle('active-turn',isMyTurn);
-        gameMessage.textContent=state.message || (isMyTurn?'轮到你出牌了！':'等待其他玩家出牌...'); turnHint.textContent = isMyTurn ? '提示：先整理再出牌。' : '观察牌势，控制大牌节奏。';
+    function renderLobby(players){ lobbyPlayersList.innerHTML=''; players.forEach(p=>{const li=document.createElement('li');li.textContent=`${p.name}${p.is_bot?' (Bot)':''}${p.offline?' (掉线)':''}`; lobbyPlayersList.appendChild(li);}); }
+    function renderGame(state){ const myData=state.players.find(p=>p.sid===mySid); setText(myName, myData?`${myData.name} (你)`:'旁观中'); syncHand(state.my_hand); renderHand();
+        setText(lastPlayInfo, state.last_played_cards.length?`${state.players.find(p=>p.sid===state.last_player_sid)?.name||''} 打出:`:'等待出牌...'); reconcile(lastPlayedCardsDiv, keyCards(state.last_played_cards), createCardNode);
+        setText(recentPlaysP, (state.recent_plays||[]).map(r=>`${state.players.find(p=>p.sid===r.sid)?.name||''}: ${r.cards.length?r.cards.join(' '):'不要'}`).join('  ·  '));
+        const opponents = state.player_order.filter(sid => sid !== mySid && state.players.some(p => p.sid === sid));
+        reconcile(opponentsArea, opponents, createOpponentNode, (o, sid) => { const p=state.players.find(a=>a.sid===sid); o.classList.toggle('active-turn', sid===state.current_turn_sid); setText(o.firstChild, `${p.name}${p.is_bot?' (Bot)':''}${p.offline?' (掉线托管)':''}`); setText(o.lastChild, `剩余: ${p.card_count} 张`); });
+        const isMyTurn=state.current_turn_sid===mySid; checkSelection(); clearBtn.disabled=!isMyTurn; hintBtn.disabled=!isMyTurn; passBtn.disabled=!isMyTurn||!state.last_played_cards.length; document.querySelector('#my-area').classList.toggle('active-turn',isMyTurn);
+        setText(gameMessage, state.message || (isMyTurn?'轮到你出牌了！':'等待其他玩家出牌...')); setText(turnHint, isMyTurn ? '提示：先整理再出牌。' : '观察牌势，控制大牌节奏。');
+    }
+    function setText(el, text){ if (el.textContent !== text) el.textContent = text; }
+    function keyCards(cards){ const seen = {}; return cards.map(c => `${c}#${seen[c] = (seen[c] ?? -1) + 1}`); }
+    function cardOfKey(key){ return key.slice(0, key.lastIndexOf('#')); }
+    function syncHand(cards){
+        // 手牌里出现新牌（新开一局、重新同步）时整手重排并清空选择；只有牌离开时保持玩家当前的排列与选择
+        const want = {}, have = {};
+        cards.forEach(c => { want[c] = (want[c] || 0) + 1; });
+        handKeys.forEach(k => { const c = cardOfKey(k); have[c] = (have[c] || 0) + 1; });
+        if (Object.keys(want).some(c => want[c] > (have[c] || 0))) { handKeys = sortKeys(keyCards(cards)); selectedKeys.clear(); return; }
+        // 同一张牌有多张时优先去掉被选中的那几张（正是刚打出去的）
+        const drop = {}, removed = new Set();
+        Object.keys(have).forEach(c => { drop[c] = have[c] - (want[c] || 0); });
+        handKeys.filter(k => selectedKeys.has(k)).concat(handKeys.filter(k => !selectedKeys.has(k))).forEach(k => { const c = cardOfKey(k); if (drop[c] > 0) { drop[c]--; removed.add(k); } });
+        if (!removed.size) return;
+        handKeys = handKeys.filter(k => !removed.has(k));
+        removed.forEach(k => selectedKeys.delete(k));
     }
-    function sortCards(cards){ return cards.sort((a,b)=>cardValue(a)-cardValue(b)||suitValue(a)-suitValue(b)); }
+    function renderHand(){ updateHandLayout(handKeys.length); reconcile(myHandDiv, handKeys, createCardNode, (d, key) => d.classList.toggle('selected', selectedKeys.has(key))); }
+    function paintSelection(){ for (const d of myHandDiv.children) d.classList.toggle('selected', selectedKeys.has(d.dataset.key)); }
+    function sortKeys(keys){ return keys.slice().sort((a,b)=>{ const x=cardOfKey(a), y=cardOfKey(b); return cardValue(x)-cardValue(y)||suitValue(x)-suitValue(y)||(a<b?-1:a>b?1:0); }); }
     function cardValue(card){ return (card==='小王'||card==='大王') ? CARD_ORDER[card] : CARD_ORDER[card.slice(1)]; }
     function suitValue(card){ return (card==='小王'||card==='大王') ? 99 : (SUIT_ORDER[card[0]]||0); }
     function updateHandLayout(cardCount){
         const isNarrow = window.matchMedia('(max-width: 900px)').matches;
         myHandDiv.classList.toggle('is-scroll-layout', isNarrow && cardCount > 9);
     }
-    window.addEventListener('resize', () => updateHandLayout(currentHand.length));
-    function renderCards(container, cards){ container.innerHTML=''; cards.forEach((cardStr, index)=>{ const d=document.createElement('div'); d.className='card'; d.dataset.card=cardStr; if(container===myHandDiv){ d.dataset.handIndex=String(index); } if(cardStr==='小王'||cardStr==='大王'){d.classList.add('joker'); const color=cardStr==='大王'?'red':'black'; d.innerHTML=`<div class="joker-text" style="color:${color}">${cardStr.split('').join('<br>')}</div>`;} else {const suit=cardStr[0], rank=cardStr.slice(1), color=(suit==='♥'||suit==='♦')?'red':'black'; d.innerHTML=`<div class="rank" style="color:${color}">${rank}</div><div class="suit" style="color:${color}">${suit}</div><div class="rank bottom" style="color:${color}">${rank}</div><div class="suit bottom" style="color:${color}">${suit}</div>`;} container.appendChild(d); }); }
+    window.addEventListener('resize', () => updateHandLayout(handKeys.length));
+    // 按键增量更新子节点：复用已有节点，只创建新出现的、删除消失的，再按 keys 的顺序就地调整位置
+    function reconcile(container, keys, create, update){
+        const wanted = new Set(keys), existing = new Map();
+        for (const node of Array.from(container.children)) { if (wanted.has(node.dataset.key)) existing.set(node.dataset.key, node); else node.remove(); }
+        keys.forEach((key, i) => {
+            const node = existing.get(key) || create(key);
+            if (update) update(node, key);
+            if (container.children[i] !== node) container.insertBefore(node, container.children[i] || null);
+        });
+    }
+    function createOpponentNode(sid){ const o=document.createElement('div'); o.className='opponent'; o.dataset.key=sid; o.appendChild(document.createElement('h4')); o.appendChild(document.createElement('p')); return o; }
+    function createCardNode(key){ const cardStr=cardOfKey(key), d=document.createElement('div'); d.className='card'; d.dataset.key=key; d.dataset.card=cardStr; if(cardStr==='小王'||cardStr==='大王'){d.classList.add('joker'); const color=cardStr==='大王'?'red':'black'; d.innerHTML=`<div class="joker-text" style="color:${color}">${cardStr.split('').join('<br>')}</div>`;} else {const suit=cardStr[0], rank=cardStr.slice(1), color=(suit==='♥'||suit==='♦')?'red':'black'; d.innerHTML=`<div class="rank" style="color:${color}">${rank}</div><div class="suit" style="color:${color}">${suit}</div><div class="rank bottom" style="color:${color}">${rank}</div><div class="suit bottom" style="color:${color}">${suit}</div>`;} return d; }
 });
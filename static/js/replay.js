@@ -0,0 +1,93 @@
+// replay.js：对局回放页面（/replay?room=<房间号>&game=<局号>）。
+// 每一步的状态向 /replays/<局号>?move=k 请求，服务端从最近的关键帧恢复，拖动进度条时不必从头重放；
+// 取到的步在本地缓存，播放时预取下一步。
+document.addEventListener('DOMContentLoaded', () => {
+    const params = new URLSearchParams(window.location.search);
+    const roomId = params.get('room') || 'lobby';
+    const title = document.getElementById('replay-title');
+    const gameSelect = document.getElementById('replay-game');
+    const slider = document.getElementById('replay-slider');
+    const moveLabel = document.getElementById('replay-move');
+    const playBtn = document.getElementById('replay-play');
+    const lastPlayInfo = document.getElementById('last-play-info');
+    const lastPlayedCardsDiv = document.getElementById('last-played-cards');
+    const recentPlaysP = document.getElementById('recent-plays');
+    const seatsDiv = document.getElementById('replay-seats');
+    const PLAY_INTERVAL_MS = 800;
+
+    let game = null, totalMoves = 0, current = 0, cache = new Map(), timer = null, token = 0;
+
+    function url(path, query){ return `${path}?${new URLSearchParams({ room: roomId, ...query })}`; }
+    function fetchMove(move){
+        if (!cache.has(move)) cache.set(move, fetch(url(`/replays/${game}`, { move })).then(r => { if (!r.ok) throw new Error(r.status); return r.json(); }));
+        return cache.get(move);
+    }
+    async function show(move){
+        move = Math.max(0, Math.min(totalMoves, move));
+        const mine = ++token;
+        const state = await fetchMove(move);
+        // 连续拖动时只画最后一次请求的结果
+        if (mine !== token) return;
+        current = move;
+        slider.value = String(move);
+        render(state);
+        if (timer && move < totalMoves) fetchMove(move + 1);
+    }
+    function nameOf(state, sid){ return state.players.find(p => p.sid === sid)?.name || ''; }
+    function render(state){
+        moveLabel.textContent = `第 ${state.move} / ${state.total_moves} 步` + (state.winner_sid ? `，${nameOf(state, state.winner_sid)} 获胜` : '');
+        lastPlayInfo.textContent = state.last_played_cards.length ? `${nameOf(state, state.last_player_sid)} 打出:` : '等待出牌...';
+        lastPlayedCardsDiv.replaceChildren(...state.last_played_cards.map(createCardNode));
+        recentPlaysP.textContent = (state.recent_plays || []).map(r => `${nameOf(state, r.sid)}: ${r.cards.length ? r.cards.join(' ') : '不要'}`).join('  ·  ');
+        seatsDiv.replaceChildren(...state.player_order.map(sid => {
+            const seat = document.createElement('div'), head = document.createElement('h4'), hand = document.createElement('div');
+            seat.className = 'opponent' + (sid === state.current_turn_sid && !state.winner_sid ? ' active-turn' : '');
+            head.textContent = `${nameOf(state, sid)}（${state.hands[sid].length} 张）`;
+            hand.className = 'replay-hand';
+            hand.replaceChildren(...state.hands[sid].map(createCardNode));
+            seat.append(head, hand);
+            return seat;
+        }));
+    }
+    function createCardNode(cardStr){ const d=document.createElement('div'); d.className='card'; if(cardStr==='小王'||cardStr==='大王'){d.classList.add('joker'); const color=cardStr==='大王'?'red':'black'; d.innerHTML=`<div class="joker-text" style="color:${color}">${cardStr.split('').join('<br>')}</div>`;} else {const suit=cardStr[0], rank=cardStr.slice(1), color=(suit==='♥'||suit==='♦')?'red':'black'; d.innerHTML=`<div class="rank" style="color:${color}">${rank}</div><div class="suit" style="color:${color}">${suit}</div>`;} return d; }
+
+    function stop(){ clearInterval(timer); timer = null; playBtn.textContent = '播 放'; }
+    function play(){
+        if (current >= totalMoves) show(0);
+        playBtn.textContent = '暂 停';
+        timer = setInterval(() => { if (current >= totalMoves) stop(); else show(current + 1); }, PLAY_INTERVAL_MS);
+    }
+    async function load(number, move = 0){
+        stop();
+        game = number; cache = new Map();
+        // 不带 move 时服务端返回终局，顺便得到总步数
+        const last = await fetch(url(`/replays/${number}`, {})).then(r => r.json());
+        totalMoves = last.total_moves;
+        cache.set(totalMoves, Promise.resolve(last));
+        slider.max = String(totalMoves);
+        history.replaceState(null, '', url('/replay', { game: number }));
+        await show(move);
+    }
+
+    slider.addEventListener('input', () => { stop(); show(Number(slider.value)); });
+    document.getElementById('replay-first').onclick = () => { stop(); show(0); };
+    document.getElementById('replay-prev').onclick = () => { stop(); show(current - 1); };
+    document.getElementById('replay-next').onclick = () => { stop(); show(current + 1); };
+    document.getElementById('replay-last').onclick = () => { stop(); show(totalMoves); };
+    playBtn.onclick = () => (timer ? stop() : play());
+    gameSelect.onchange = () => load(Number(gameSelect.value));
+
+    fetch(url('/replays', {})).then(r => r.ok ? r.json() : { games: [] }).then(({ games }) => {
+        title.textContent = `房间 ${roomId} 的对局回放`;
+        gameSelect.replaceChildren(...games.slice().reverse().map(g => {
+            const option = document.createElement('option');
+            option.value = String(g.game);
+            option.textContent = `第 ${g.game} 局：${g.players.join('、')}（${g.winner} 胜，${g.moves} 步）`;
+            return option;
+        }));
+        if (!games.length) { moveLabel.textContent = '这个房间还没有结束的对局。'; return; }
+        const wanted = Number(params.get('game')) || games[games.length - 1].game;
+        gameSelect.value = String(wanted);
+        load(wanted, Number(params.get('move')) || 0);
+    });
+});
@@ -0,0 +1,85 @@
+// rules.js：客户端出牌预检。判定逻辑与 game_logic.HandClassifier / compare_plays 一一对应，
+// 其中的规则参数全部来自服务端导出的规则表（game_logic.export_rules_table），服务端仍是最终裁决。
+const NetPDKRules = (() => {
+    // 牌面字符串 -> 15 个点数的张数；含有无法识别的牌时返回 null
+    function signature(cards, table) {
+        const sig = new Array(table.num_ranks).fill(0);
+        for (const card of cards) {
+            const rank = table.card_ranks[card];
+            if (rank === undefined) return null;
+            sig[rank]++;
+        }
+        return sig;
+    }
+
+    function classifySignature(sig, table, rules) {
+        const T = table.hand_types;
+        const counts = new Map();
+        sig.forEach((c, rank) => { if (c) counts.set(rank + table.min_value, c); });
+        const n = sig.reduce((a, b) => a + b, 0);
+        const play = (type, value = 0, seq = 0) => ({ type, value, length: n, seq });
+        if (!counts.size) return play(T.UNKNOWN);
+        const values = [...counts.keys()], widths = [...counts.values()];
+        const valueWith = c => values.find(v => counts.get(v) === c);
+
+        if (rules.allow_rocket && n === 2 && table.rocket_ranks.every(r => sig[r] === 1)) return play(T.ROCKET, table.rocket_value);
+        if (counts.size === 1 && (table.same_rank_types[n] !== undefined || n >= table.min_bomb_size)) return play(table.same_rank_types[n] ?? T.BOMB, values[0]);
+        if (counts.size === 2 && table.three_with_types[n] !== undefined && widths.includes(3)) return play(table.three_with_types[n], valueWith(3));
+        if (rules.allow_four_with_two && widths.includes(4)) {
+            const kickers = widths.filter(c => c !== 4).sort((a, b) => a - b);
+            const matches = table.four_with_two_kickers.some(k => k.length === kickers.length && k.every((c, i) => c === kickers[i]));
+            if (matches && n === 4 + kickers.reduce((a, b) => a + b, 0)) return play(T.FOUR_WITH_TWO, valueWith(4));
+        }
+        // 2 与大小王不能进连牌，也不能做飞机的翼
+        if (values[values.length - 1] - table.min_value >= table.chain_rank_limit) return play(T.UNKNOWN);
+
+        const consecutive = values[values.length - 1] - values[0] === values.length - 1;
+        const width = widths[0];
+        if (consecutive && widths.every(c => c === width) && table.chain_types[width] !== undefined && values.length >= table.min_chain_length[width]) {
+            return play(table.chain_types[width], values[values.length - 1], values.length);
+        }
+        if (rules.allow_airplane_wings) {
+            const threes = values.filter(v => counts.get(v) === 3);
+            if (threes.length >= table.min_chain_length[3] && threes[threes.length - 1] - threes[0] === threes.length - 1) {
+                for (const [wing, type] of Object.entries(table.wing_types)) {
+                    if (n === threes.length * (3 + Number(wing)) && (Number(wing) === 1 || widths.every(c => c === 2 || c === 3))) {
+                        return play(type, threes[threes.length - 1], threes.length);
+                    }
+                }
+            }
+        }
+        return play(T.UNKNOWN);
+    }
+
+    // 与 compare_plays 相同：返回 null 表示可以压过，否则为失败提示
+    function beats(current, last, table) {
+        const T = table.hand_types;
+        if (current.type === T.ROCKET) return null;
+        if (last.type === T.ROCKET) return table.errors.rocket;
+        if (current.type === T.BOMB && last.type !== T.BOMB) return null;
+        if (current.type === T.BOMB && last.type === T.BOMB && current.length !== last.length) return current.length > last.length ? null : table.errors.too_small;
+        if (current.type === last.type && current.length === last.length && current.seq === last.seq) {
+            return current.value > last.value ? null : table.errors.too_small;
+        }
+        return table.errors.mismatch;
+    }
+
+    // 预检一次出牌：settings 为房间的 room_settings，lastCards 为空表示自己领出。返回 {play, label, ok, reason}
+    function check(cards, lastCards, table, settings) {
+        const rules = {};
+        table.rule_keys.forEach(k => { rules[k] = settings[k] === undefined ? true : Boolean(settings[k]); });
+        const sig = signature(cards, table);
+        const play = sig ? classifySignature(sig, table, rules) : { type: table.hand_types.UNKNOWN, value: 0, length: cards.length, seq: 0 };
+        const label = table.labels[play.type] || '';
+        if (play.type === table.hand_types.UNKNOWN) return { play, label, ok: false, reason: table.errors.invalid };
+        if (!lastCards || !lastCards.length) return { play, label, ok: true, reason: null };
+        const lastSig = signature(lastCards, table);
+        const last = lastSig ? classifySignature(lastSig, table, rules) : { type: table.hand_types.UNKNOWN, value: 0, length: 0, seq: 0 };
+        const reason = beats(play, last, table);
+        return { play, label, ok: reason === null, reason };
+    }
+
+    return { signature, classifySignature, beats, check };
+})();
+
+if (typeof module !== 'undefined') module.exports = NetPDKRules;
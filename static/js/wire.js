@@ -0,0 +1,134 @@
+// wire.js：二进制事件的解码器，与服务端 wire.py 的编码一一对应。
+// 帧是 MessagePack；牌、规则用扩展类型，公开状态、私有状态与增量是固定字段顺序的数组，解码后与 JSON 事件的结构完全相同。
+const NetPDKWire = (() => {
+    const EXT_CARDS = 1, EXT_CARD_COUNTS = 2, EXT_SETTINGS = 3;
+    const OPS = ['play', 'pass', 'turn', 'clear'];
+    // 与 snapshot.SETTING_FLAGS / PLAYER_IS_BOT / PLAYER_OFFLINE 保持一致
+    const SETTING_FLAGS = ['include_jokers', 'allow_airplane_wings', 'allow_four_with_two', 'allow_rocket'];
+    const PLAYER_IS_BOT = 1, PLAYER_OFFLINE = 2;
+    // 牌 ID -> 牌面字符串，顺序同 cards.CARD_NAMES
+    const CARD_NAMES = ['3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A', '2']
+        .flatMap(rank => ['♠', '♥', '♣', '♦'].map(suit => suit + rank)).concat(['小王', '大王']);
+    const utf8 = new TextDecoder();
+
+    function ext(code, bytes) {
+        if (code === EXT_CARDS) { const cards = new Array(bytes.length); for (let i = 0; i < bytes.length; i++) cards[i] = CARD_NAMES[bytes[i]]; return cards; }
+        if (code === EXT_CARD_COUNTS) { const cards = []; for (let id = 0; id < bytes.length; id++) for (let i = 0; i < bytes[id]; i++) cards.push(CARD_NAMES[id]); return cards; }
+        if (code === EXT_SETTINGS) {
+            const settings = { num_decks: bytes[0] };
+            SETTING_FLAGS.forEach((key, i) => { settings[key] = Boolean(bytes[1] >> i & 1); });
+            return settings;
+        }
+        return { type: code, data: bytes };
+    }
+
+    // MessagePack 解码；当前缓冲区与读取位置放在闭包变量里，避免每次解码都新建一组函数
+    let bytes = null, view = null, pos = 0;
+    function take(n) { if (pos + n > bytes.length) throw new Error('数据被截断'); pos += n; return bytes.subarray(pos - n, pos); }
+    function uint(n) { let v = 0; for (let end = pos + n; pos < end; pos++) v = v * 256 + bytes[pos]; if (pos > bytes.length) throw new Error('数据被截断'); return v; }
+    function str(n) {
+        // 短字符串逐字节解码（TextDecoder 对小输入的调用开销比解码本身大）
+        if (n > 64) return utf8.decode(take(n));
+        const end = pos + n;
+        if (end > bytes.length) throw new Error('数据被截断');
+        let out = '';
+        while (pos < end) {
+            const b = bytes[pos++];
+            let c;
+            if (b < 0x80) c = b;
+            else if (b < 0xe0) c = (b & 0x1f) << 6 | bytes[pos++] & 0x3f;
+            else if (b < 0xf0) c = (b & 0x0f) << 12 | (bytes[pos++] & 0x3f) << 6 | bytes[pos++] & 0x3f;
+            else c = (b & 0x07) << 18 | (bytes[pos++] & 0x3f) << 12 | (bytes[pos++] & 0x3f) << 6 | bytes[pos++] & 0x3f;
+            out += String.fromCodePoint(c);
+        }
+        return out;
+    }
+    function array(n) { const a = new Array(n); for (let i = 0; i < n; i++) a[i] = read(); return a; }
+    function map(n) { const m = {}; for (let i = 0; i < n; i++) { const k = read(); m[k] = read(); } return m; }
+    function read() {
+        if (pos >= bytes.length) throw new Error('数据被截断');
+        const b = bytes[pos++];
+        if (b < 0x80) return b;
+        if (b >= 0xe0) return b - 0x100;
+        if (b <= 0x8f) return map(b & 0x0f);
+        if (b <= 0x9f) return array(b & 0x0f);
+        if (b <= 0xbf) return str(b & 0x1f);
+        switch (b) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: case 0xc5: case 0xc6: return take(uint(1 << (b - 0xc4))).slice();
+            case 0xc7: case 0xc8: case 0xc9: { const n = uint(1 << (b - 0xc7)); const code = uint(1); return ext(code, take(n)); }
+            case 0xca: take(4); return view.getFloat32(pos - 4);
+            case 0xcb: take(8); return view.getFloat64(pos - 8);
+            case 0xcc: case 0xcd: case 0xce: case 0xcf: return uint(1 << (b - 0xcc));
+            case 0xd0: take(1); return view.getInt8(pos - 1);
+            case 0xd1: take(2); return view.getInt16(pos - 2);
+            case 0xd2: take(4); return view.getInt32(pos - 4);
+            case 0xd3: take(8); return Number(view.getBigInt64(pos - 8));
+            case 0xd4: case 0xd5: case 0xd6: case 0xd7: case 0xd8: { const code = uint(1); return ext(code, take(1 << (b - 0xd4))); }
+            case 0xd9: case 0xda: case 0xdb: return str(uint(1 << (b - 0xd9)));
+            case 0xdc: case 0xdd: return array(uint(b === 0xdc ? 2 : 4));
+            case 0xde: case 0xdf: return map(uint(b === 0xde ? 2 : 4));
+        }
+        throw new Error(`不支持的类型字节 0x${b.toString(16)}`);
+    }
+    function unpack(buffer) {
+        bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        pos = 0;
+        try {
+            const value = read();
+            if (pos !== bytes.length) throw new Error('数据末尾有多余字节');
+            return value;
+        } finally {
+            bytes = view = null;
+        }
+    }
+
+    // 公开状态 -> 与 game_update 的 JSON 相同的对象
+    function decodeState(buffer) {
+        const [stateVersion, gameStarted, host, roomId, message, settings, players, order, turn, last, lastCards, recent] = unpack(buffer);
+        const sids = players.map(p => p[0]);
+        const sidOf = i => (i === null ? null : sids[i]);
+        return {
+            game_started: gameStarted,
+            players: players.map(([sid, name, count, flags]) => ({ name, sid, card_count: count, is_bot: Boolean(flags & PLAYER_IS_BOT), offline: Boolean(flags & PLAYER_OFFLINE) })),
+            player_order: order.map(sidOf),
+            current_turn_sid: sidOf(turn),
+            last_played_cards: lastCards,
+            last_player_sid: sidOf(last),
+            room_settings: settings,
+            state_version: stateVersion,
+            recent_plays: recent.map(([i, cards]) => ({ sid: sidOf(i), cards })),
+            host_sid: sidOf(host),
+            room_id: roomId,
+            message,
+        };
+    }
+
+    // 私有状态 -> 与 private_state 的 JSON 相同的对象
+    function decodePrivate(buffer) {
+        const [stateVersion, mySid, myHand] = unpack(buffer);
+        return { state_version: stateVersion, my_sid: mySid, my_hand: myHand };
+    }
+
+    // 增量 -> 与 game_delta 的 JSON 相同的对象；玩家下标按当前持有的公开状态的玩家列表解析
+    function decodeDelta(buffer, players) {
+        const [stateVersion, message, ...ops] = unpack(buffer);
+        return {
+            state_version: stateVersion,
+            message,
+            ops: ops.map(([code, i, cards]) => {
+                const op = { op: OPS[code] };
+                if (i !== undefined) op.sid = players[i] ? players[i].sid : null;
+                if (cards !== undefined) op.cards = cards;
+                return op;
+            }),
+        };
+    }
+
+    return { CARD_NAMES, unpack, decodeState, decodePrivate, decodeDelta };
+})();
+
+if (typeof module !== 'undefined') module.exports = NetPDKWire;
@@ -0,0 +1,42 @@
+"""校验脚本共用的小工具：随机开局、只用同点数牌推进对局与空闲端口。
+
+校验脚本以 python tools/check_xxx.py 运行，本目录在 sys.path 上，直接 from _common import ... 即可。
+"""
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import MIN_VALUE, NUM_RANKS  # noqa: E402
+from game_logic import RULE_PRESETS, SAME_RANK_TYPES, Game  # noqa: E402
+
+
+def random_game(rng, names=None):
+    """2~6 人、1~6 副牌、随机规则预设、约一半是机器人的未开局对局；sid 为 sid0、sid1……，昵称从 names 里随机取。"""
+    game = Game()
+    game.update_room_settings({'num_decks': rng.randint(1, 6), **RULE_PRESETS[rng.choice(sorted(RULE_PRESETS))]})
+    for p in range(rng.randint(2, 6)):
+        game.add_player(f'sid{p}', rng.choice(names) if names else f'玩家{p}', is_bot=rng.random() < 0.5)
+    return game
+
+
+def same_rank_move(rng, game, sid):
+    """领出时随机点数的若干张，跟牌时能压过上一手的同点数牌；多副牌时枚举全部合法出牌太慢，只用同点数牌推进。"""
+    hand = game.players[sid]['hand']
+    counts = hand.rank_counts
+    last = game.last_play_info
+    if not game.last_played_cards or game.last_player_sid == sid:
+        rank = rng.choice([r for r in range(NUM_RANKS) if counts[r]])
+        return hand.peek_rank(rank, rng.randint(1, min(counts[rank], 4)))
+    if last.hand_type in SAME_RANK_TYPES.values():
+        ranks = [r for r in range(last.value - MIN_VALUE + 1, NUM_RANKS) if counts[r] >= last.length]
+        if ranks:
+            return hand.peek_rank(rng.choice(ranks), last.length)
+    return []
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -0,0 +1,172 @@
+"""等价校验：向量化批量环境 BatchEnv 与标量 Game 的牌型识别、出牌校验与局面推进必须完全一致。
+
+两部分：
+1. 牌型识别：随机点数签名（多副牌、各规则组合）逐行比较 classify_batch 与 HandClassifier。
+2. 对局推进：按种子开若干局标量 Game，用 BatchEnv.from_games 复制成批量环境，之后每步给两边同样的出牌
+   （大多为合法出牌，也混入随机选牌、过牌与手里没有的牌），比较是否被接受以及每步之后的完整局面。
+
+用法：
+    python tools/check_batch_env.py --signatures 200000 --games 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_env import BatchEnv, classify_batch  # noqa: E402
+from cards import NUM_RANKS, RANK_CARD_IDS, rank_counts  # noqa: E402
+from game_logic import CLASSIFIER_RULE_KEYS, Game, get_classifier  # noqa: E402
+from simulator import PRESETS  # noqa: E402
+
+RULE_COMBINATIONS = [(rocket, four_with_two, wings)
+                     for rocket in (False, True) for four_with_two in (False, True) for wings in (False, True)]
+
+
+def random_signature(rng):
+    sig = [0] * NUM_RANKS
+    roll = rng.random()
+    if roll < 0.05:
+        # 多副牌的同点数大炸弹
+        sig[rng.randrange(NUM_RANKS)] = rng.randint(4, 24)
+    elif roll < 0.5:
+        for _ in range(rng.randint(1, 16)):
+            sig[rng.randrange(NUM_RANKS)] += 1
+    else:
+        # 连续点数 + 随机张数，覆盖顺子、连对、飞机及带翼
+        start = rng.randrange(NUM_RANKS)
+        for rank in range(start, min(NUM_RANKS, start + rng.randint(1, 7))):
+            sig[rank] += rng.randint(1, 4)
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            sig[rng.randrange(NUM_RANKS)] += rng.choice((1, 2))
+    return sig
+
+
+def check_signatures(count, seed):
+    rng = random.Random(seed)
+    sigs = np.array([random_signature(rng) for _ in range(count)], dtype=np.int16)
+    rules = np.array([rng.choice(RULE_COMBINATIONS) for _ in range(count)], dtype=bool)
+    hand_type, value, length, seq = classify_batch(sigs, rules)
+    mismatches = 0
+    for i in range(count):
+        classifier = get_classifier(dict(zip(CLASSIFIER_RULE_KEYS, rules[i].tolist())))
+        expected = classifier.classify_signature(tuple(sigs[i].tolist()))
+        actual = (int(hand_type[i]), int(value[i]), int(length[i]), int(seq[i]))
+        if actual != (expected.hand_type, expected.value, expected.length, expected.sequence_length):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"牌型不一致: 签名={sigs[i].tolist()} 规则={rules[i].tolist()}\n  标量: {expected}\n  批量: {actual}")
+    return mismatches
+
+
+def _random_move(rng, game, sid):
+    """返回 (牌 ID 列表, 点数签名)；空列表表示过牌。"""
+    hand = game.players[sid]['hand']
+    roll = rng.random()
+    if roll < 0.7:
+        legal = game.get_legal_moves(sid)
+        cards = list(rng.choice(legal)[0]) if legal else []
+    elif roll < 0.8:
+        cards = []
+    elif roll < 0.95:
+        cards = rng.sample(list(hand), min(len(hand), rng.randint(1, 6)))
+    else:
+        # 某个点数比手里多一张：标量一侧是手里没有的牌
+        rank = rng.randrange(NUM_RANKS)
+        cards = hand.peek_rank(rank, hand.rank_counts[rank]) + [RANK_CARD_IDS[rank][0]]
+    return cards, rank_counts(cards)
+
+
+def _assert_same(env, games, step):
+    for i, game in enumerate(games):
+        order = game.player_order
+        expected = {
+            'hands': [game.players[sid]['hand'].rank_counts for sid in order],
+            'turn': order.index(game.current_turn_sid),
+            'last_player': order.index(game.last_player_sid),
+            'last_sig': rank_counts(game.last_played_cards),
+            'last_play': tuple(vars(game.last_play_info).values()),
+            'done': not game.game_started,
+        }
+        actual = {
+            'hands': env.hands[i].tolist(),
+            'turn': int(env.turn[i]),
+            'last_player': int(env.last_player[i]),
+            'last_sig': env.last_sig[i].tolist(),
+            'last_play': (int(env.last_type[i]), int(env.last_value[i]), int(env.last_length[i]), int(env.last_seq[i])),
+            'done': bool(env.done[i]),
+        }
+        for key in expected:
+            if expected[key] != actual[key]:
+                raise AssertionError(f"第 {step} 步第 {i} 局 {key} 不一致: 标量 {expected[key]} 批量 {actual[key]}")
+
+
+def check_games(num_games, players, decks, preset, seed):
+    rng = random.Random(seed)
+    games = []
+    for g in range(num_games):
+        game = Game()
+        game.update_room_settings({'num_decks': decks, **PRESETS[preset]})
+        for p in range(players):
+            game.add_player(f'p{p}', f'p{p}', is_bot=True)
+        game.start_game(seed=seed * 100_003 + g)
+        games.append(game)
+    env = BatchEnv.from_games(games)
+    _assert_same(env, games, 0)
+
+    steps = 0
+    while not env.done.all():
+        steps += 1
+        moves = np.zeros((num_games, NUM_RANKS), dtype=np.int16)
+        expected_ok, expected_won = [], []
+        for i, game in enumerate(games):
+            if not game.game_started:
+                expected_ok.append(False)
+                expected_won.append(False)
+                continue
+            sid = game.current_turn_sid
+            cards, sig = _random_move(rng, game, sid)
+            moves[i] = sig
+            if cards:
+                status, _ = game.play_turn(sid, cards)
+            else:
+                status = 'OK' if game.pass_turn(sid)[0] else None
+            expected_ok.append(status is not None)
+            expected_won.append(status == 'WIN')
+        ok, won = env.step(moves)
+        if ok.tolist() != expected_ok or won.tolist() != expected_won:
+            raise AssertionError(f"第 {steps} 步接受结果不一致（{players} 人 {decks} 副 {preset}）")
+        _assert_same(env, games, steps)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signatures', type=int, default=200_000, help='随机点数签名个数')
+    parser.add_argument('--games', type=int, default=200, help='每种配置的并行局数')
+    parser.add_argument('--seed', type=int, default=20240101)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    mismatches = check_signatures(args.signatures, args.seed)
+    print(f"牌型识别：{args.signatures} 个随机签名，不一致 {mismatches} 处（{time.perf_counter() - started:.1f}s）")
+
+    failures = 0
+    for players, decks, preset in [(2, 1, 'full'), (3, 1, 'full'), (3, 1, 'classic'), (4, 2, 'full'),
+                                   (3, 2, 'strict'), (4, 3, 'full')]:
+        started = time.perf_counter()
+        try:
+            steps = check_games(args.games, players, decks, preset, args.seed + players * 10 + decks)
+            print(f"对局推进：{players} 人 {decks} 副 {preset}，{args.games} 局 {steps} 步一致（{time.perf_counter() - started:.1f}s）")
+        except AssertionError as exc:
+            failures += 1
+            print(f"对局推进：{exc}")
+    sys.exit(1 if mismatches or failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+// 客户端规则一致性校验的 node 一侧：读取 check_client_rules.py 生成的用例文件（含服务端导出的规则表），
+// 用 static/js/rules.js 逐条预检，把结果以 JSON 数组写到标准输出，由 Python 一侧比较。
+//
+// 用法（通常由 tools/check_client_rules.py 调用）：
+//     node tools/check_client_rules.js fixtures.json
+'use strict';
+const fs = require('fs');
+const path = require('path');
+const NetPDKRules = require(path.join(__dirname, '..', 'static', 'js', 'rules.js'));
+
+const { table, cases } = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const results = cases.map(c => {
+    const r = NetPDKRules.check(c.cards, c.last || [], table, c.settings);
+    return { type: r.play.type, value: r.play.value, length: r.play.length, seq: r.play.seq, ok: r.ok, reason: r.reason, label: r.label };
+});
+process.stdout.write(JSON.stringify(results));
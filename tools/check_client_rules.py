@@ -0,0 +1,171 @@
+"""一致性校验：客户端预检（static/js/rules.js + 导出的规则表）与服务端识别/比较的结果必须完全一致。
+
+按种子生成同一组用例（手工边界用例 + 随机牌组，覆盖全部规则开关组合、领出与跟牌），
+服务端一侧直接用 HandClassifier 与 compare_plays 计算，客户端一侧交给 node 运行 rules.js，
+逐条比较牌型、点数、张数、连牌长度、能否出牌与失败提示。需要 node。
+
+用法：
+    python tools/check_client_rules.py --cases 50000
+    python tools/check_client_rules.py --cases 2000 --save fixtures.json   # 保存用例与期望结果
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import CARD_IDS, CARD_NAMES, CARD_RANK, RANK_CARD_IDS  # noqa: E402
+from game_logic import (CLASSIFIER_RULE_KEYS, HAND_TYPE_LABELS, PLAY_ERRORS, HandType,  # noqa: E402
+                        compare_plays, enumerate_legal_plays, export_rules_table, get_classifier)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULE_COMBINATIONS = [dict(zip(CLASSIFIER_RULE_KEYS, (rocket, four_with_two, wings)))
+                     for rocket in (False, True) for four_with_two in (False, True) for wings in (False, True)]
+
+# 手工边界用例：(牌, 上家的牌)
+EDGE_CASES = [
+    ('小王 大王', None), ('小王 大王', '♠2 ♥2 ♣2 ♦2'), ('♠3 ♥3 ♣3 ♦3', '小王 大王'), ('♠3 ♥3 ♣3 ♦3', '♠A ♥A ♣A'),
+    ('♠3 ♥3 ♣3 ♦3 ♠4 ♥5', None), ('♠3 ♥3 ♣3 ♦3 ♠4 ♥4', None), ('♠3 ♥3 ♣3 ♦3 ♠4 ♥4 ♠5 ♥5', None),
+    ('♠3 ♥3 ♣3 ♦3 ♠4 ♥4 ♣4 ♦4', None), ('♠3 ♥3 ♣3 ♦3 ♠2 小王', None),
+    ('♠10 ♠J ♠Q ♠K ♠A', None), ('♠J ♠Q ♠K ♠A ♠2', None), ('♠3 ♠4 ♠5 ♠6', None),
+    ('♠3 ♥3 ♠4 ♥4 ♠5 ♥5', '♠6 ♥6 ♠7 ♥7 ♠8 ♥8'), ('♠3 ♥3 ♠4 ♥4', None),
+    ('♠3 ♥3 ♣3 ♠4 ♥4 ♣4', None), ('♠3 ♥3 ♣3 ♠4 ♥4 ♣4 ♠9 ♠10', None), ('♠3 ♥3 ♣3 ♠4 ♥4 ♣4 ♠9 ♥9 ♠10 ♥10', None),
+    ('♠3 ♥3 ♣3 ♠4 ♥4 ♣4 ♠2 ♥2', None), ('♠3 ♥3 ♣3 ♠4 ♥4 ♣4 ♠9 ♥9 ♣9 ♦9', None), ('♠K ♥K ♣K ♠A ♥A ♣A ♠2 ♥2 ♣2', None),
+    ('♠5 ♥5 ♣5 ♠6', '♠4 ♥4 ♣4 ♠9'), ('♠5 ♥5 ♣5 ♠6', '♠4 ♥4 ♣4 ♠9 ♥9'), ('♠5 ♥5 ♣5 ♠6 ♥6', '♠7 ♥7 ♣7 ♠3 ♥3'),
+    ('♠5 ♠6 ♠7 ♠8 ♠9', '♠4 ♠5 ♠6 ♠7 ♠8 ♠9'), ('♠2', '小王'), ('大王', '小王'), ('♠3', None), ('', None),
+    # 多副牌：5 张以上的同点数炸弹按张数、再按点数比较
+    ('♠3 ♠3 ♥3 ♣3 ♦3', '♠2 ♥2 ♣2 ♦2'), ('♠2 ♥2 ♣2 ♦2', '♠3 ♠3 ♥3 ♣3 ♦3'), ('♠4 ♠4 ♥4 ♣4 ♦4', '♠3 ♠3 ♥3 ♣3 ♦3'),
+    ('♠4 ♠4 ♥4 ♣4 ♦4', '♠5 ♠5 ♥5 ♣5 ♦5'), ('小王 小王 小王 小王 小王', '小王 大王'), ('小王 小王 大王 大王', None),
+    ('♠3 ♠3 ♥3 ♣3 ♦3 ♠4', None), ('♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9 ♠9', '♠A ♠A ♠A ♠A ♠A ♠A ♠A ♠A ♠A ♠A ♠A'),
+]
+
+
+def _names(text):
+    return text.split() if text else []
+
+
+def _cards_for(signature, rng):
+    cards = []
+    for rank, n in enumerate(signature):
+        cards.extend(CARD_NAMES[rng.choice(RANK_CARD_IDS[rank])] for _ in range(n))
+    rng.shuffle(cards)
+    return cards
+
+
+def _random_signature(rng, settings):
+    sig = [0] * len(RANK_CARD_IDS)
+    roll = rng.random()
+    if roll < 0.08:
+        # 多副牌的同点数大炸弹（最多 6 副牌 24 张）
+        sig[rng.randrange(len(sig))] = rng.randint(4, 24)
+        return sig
+    if roll < 0.5:
+        # 从随机手牌（两副牌中抽 20 张）的合法出牌里取一手，保证各种牌型都有足够的用例
+        hand = [0] * len(RANK_CARD_IDS)
+        for c in rng.sample(range(108), 20):
+            hand[CARD_RANK[c % 54]] += 1
+        plays = enumerate_legal_plays(hand, get_classifier(settings))
+        return list(rng.choice(plays).signature)
+    if roll < 0.7:
+        for _ in range(rng.randint(1, 12)):
+            sig[rng.randrange(len(sig))] += 1
+    else:
+        start = rng.randrange(len(sig))
+        for rank in range(start, min(len(sig), start + rng.randint(1, 6))):
+            sig[rank] += rng.randint(1, 4)
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            sig[rng.randrange(len(sig))] += rng.choice((1, 2))
+    return sig
+
+
+def _shifted(signature, rng):
+    """把普通点数整体平移，得到同一牌型、不同点数的上家出牌（移出范围时返回 None）。"""
+    delta = rng.choice((-3, -2, -1, 1, 2, 3))
+    shifted = [0] * len(signature)
+    for rank, n in enumerate(signature):
+        target = rank + delta if rank < 13 else rank
+        if n and not 0 <= target < 13 and rank < 13:
+            return None
+        if n:
+            shifted[target] += n
+    return shifted
+
+
+def make_cases(count, seed):
+    rng = random.Random(seed)
+    cases = [{'settings': settings, 'cards': _names(cards), 'last': _names(last) if last else None}
+             for cards, last in EDGE_CASES for settings in RULE_COMBINATIONS]
+    while len(cases) < count:
+        settings = rng.choice(RULE_COMBINATIONS)
+        signature = _random_signature(rng, settings)
+        roll, last = rng.random(), None
+        if roll < 0.35:
+            last = _shifted(signature, rng)
+        elif roll < 0.65:
+            last = _random_signature(rng, settings)
+        cases.append({'settings': settings, 'cards': _cards_for(signature, rng),
+                      'last': _cards_for(last, rng) if last else None})
+    return cases
+
+
+def server_result(case):
+    """与 Game._validate_play 相同的判定：不合法牌型 -> 领出可出 -> 跟牌按 compare_plays。"""
+    classifier = get_classifier(case['settings'])
+    play = classifier.classify([CARD_IDS[c] for c in case['cards']])
+    ok, reason = True, None
+    if play.hand_type == HandType.UNKNOWN:
+        ok, reason = False, PLAY_ERRORS['invalid']
+    elif case['last']:
+        ok, message = compare_plays(play, classifier.classify([CARD_IDS[c] for c in case['last']]))
+        reason = None if ok else message
+    return {'type': play.hand_type, 'value': play.value, 'length': play.length, 'seq': play.sequence_length,
+            'ok': ok, 'reason': reason, 'label': HAND_TYPE_LABELS.get(play.hand_type, '')}
+
+
+def client_results(table, cases):
+    node = shutil.which('node')
+    if node is None:
+        sys.exit('需要 node 才能运行客户端一侧')
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump({'table': table, 'cases': cases}, f, ensure_ascii=False)
+        path = f.name
+    try:
+        output = subprocess.run([node, os.path.join(ROOT, 'tools', 'check_client_rules.js'), path],
+                                check=True, capture_output=True, text=True).stdout
+    finally:
+        os.unlink(path)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=50_000, help='用例总数（含边界用例）')
+    parser.add_argument('--seed', type=int, default=20240101)
+    parser.add_argument('--save', help='把用例与服务端期望结果写到该文件')
+    args = parser.parse_args()
+
+    # 规则表先经过一次 JSON 往返，与页面中嵌入的形式相同
+    table = json.loads(json.dumps(export_rules_table(), ensure_ascii=False))
+    cases = make_cases(args.cases, args.seed)
+    expected = [server_result(case) for case in cases]
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'table': table, 'cases': [dict(case, expect=e) for case, e in zip(cases, expected)]},
+                      f, ensure_ascii=False)
+    actual = client_results(table, cases)
+
+    mismatches = [(case, e, a) for case, e, a in zip(cases, expected, actual) if e != a]
+    for case, e, a in mismatches[:5]:
+        print(f"不一致: 牌={' '.join(case['cards'])} 上家={' '.join(case['last'] or [])} 规则={case['settings']}\n"
+              f"  服务端: {e}\n  客户端: {a}")
+    print(f"{len(cases)} 条用例，不一致 {len(mismatches)} 处")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""交叉校验：HandSolver 的最少手数必须与暴力搜索一致（多副牌手牌，覆盖全部规则开关组合）。
+
+暴力搜索不做任何牌型假设：每一步枚举包含当前最小点数的全部子签名，凡是识别器认可的牌型都算一手，
+记忆化后求最少手数。随机手牌一半从 N 副牌中均匀抽取，一半集中在少数几个点数上（多出 5 张以上的同点数牌、
+可以拆去做带牌的三张/炸弹）。
+同时检查求解器给出的拆分确实由合法牌型组成、张数加起来等于手牌。
+
+用法：
+    python tools/check_hand_solver.py --hands 300 --decks 1,2,4,6 --cards 14
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import NUM_RANKS, STANDARD_DECK, rank_counts  # noqa: E402
+from game_logic import CLASSIFIER_RULE_KEYS, HandType, get_classifier  # noqa: E402
+from hand_solver import HandSolver  # noqa: E402
+
+RULE_COMBINATIONS = [
+    dict(zip(CLASSIFIER_RULE_KEYS, (rocket, four_with_two, wings)))
+    for rocket in (False, True) for four_with_two in (False, True) for wings in (False, True)
+]
+
+
+def brute_force(classifier):
+    """返回 counts -> 最少手数 的记忆化暴力搜索。"""
+    @lru_cache(maxsize=None)
+    def min_hands(counts):
+        if not any(counts):
+            return 0
+        lowest = next(r for r, n in enumerate(counts) if n)
+        ranges = [range(1, n + 1) if r == lowest else range(n + 1) for r, n in enumerate(counts)]
+        return 1 + min(min_hands(tuple(n - k for n, k in zip(counts, play)))
+                       for play in itertools.product(*ranges)
+                       if classifier.classify_signature(play).hand_type != HandType.UNKNOWN)
+    return min_hands
+
+
+def random_hand(rng, num_decks, num_cards):
+    if rng.random() < 0.5:
+        return tuple(rank_counts(rng.sample(list(STANDARD_DECK) * num_decks, num_cards)))
+    counts = [0] * NUM_RANKS
+    for rank in rng.sample(range(NUM_RANKS), rng.randint(2, 5)):
+        counts[rank] = rng.randint(1, num_decks * (1 if rank >= 13 else 4))
+    while sum(counts) > num_cards:
+        rank = rng.choice([r for r, n in enumerate(counts) if n])
+        counts[rank] -= 1
+    return tuple(counts)
+
+
+def check(settings, deck_counts, num_hands, num_cards, rng):
+    classifier = get_classifier(settings)
+    solver, expected = HandSolver(classifier), brute_force(classifier)
+    mismatches = 0
+    for _ in range(num_hands):
+        counts = random_hand(rng, rng.choice(deck_counts), num_cards)
+        result = solver.solve(counts)
+        valid = (tuple(map(sum, zip(*result.plays))) == counts if result.plays else not any(counts)) and \
+            all(classifier.classify_signature(p).hand_type != HandType.UNKNOWN for p in result.plays)
+        best = expected(counts)
+        if result.hands != best or len(result.plays) != result.hands or not valid:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f'  {counts}: 求解器 {result.hands} 手{"" if valid else "（拆分不合法）"}，暴力搜索 {best} 手')
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hands', type=int, default=300, help='每种规则组合校验的手牌数')
+    parser.add_argument('--decks', default='1,2,4,6', help='逗号分隔的副牌数，每手随机取一种')
+    parser.add_argument('--cards', type=int, default=14, help='每手最多的张数（暴力搜索随张数指数增长）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    deck_counts = [int(x) for x in args.decks.split(',')]
+    failed = 0
+    for settings in RULE_COMBINATIONS:
+        mismatches = check(settings, deck_counts, args.hands, args.cards, rng)
+        label = ' '.join(f'{k}={int(v)}' for k, v in settings.items())
+        print(f'{label}: {args.hands} 手，不一致 {mismatches}')
+        failed += mismatches
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
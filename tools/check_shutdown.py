@@ -0,0 +1,96 @@
+"""退出校验：server.py 收到 SIGTERM 后必须在几秒内正常退出，并写下最后一次状态快照。
+
+对每种异步模式启动一个 server.py（带快照文件），用长轮询握手连上几个 Socket.IO 客户端并保持连接，
+然后发送 SIGTERM，检查进程在时限内以 0 退出、快照文件已写入。未安装的异步模式跳过。
+
+用法：
+    python tools/check_shutdown.py --modes eventlet,gevent,threading --timeout 5
+"""
+import argparse
+import importlib.util
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from _common import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _poll(url, data=None):
+    request = urllib.request.Request(url, data=data.encode() if data is not None else None,
+                                     headers={'Content-Type': 'text/plain;charset=UTF-8'})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.read().decode('utf-8')
+
+
+def _connect(base_url, room):
+    """长轮询握手并连上默认命名空间，之后不再轮询（模拟还挂着的客户端）。"""
+    url = f'{base_url}/socket.io/?EIO=4&transport=polling&room={room}'
+    sid = json.loads(_poll(url)[1:])['sid']
+    _poll(f'{url}&sid={sid}', data='40')
+
+
+def check_mode(mode, clients, timeout):
+    """返回 (是否通过, 说明)。"""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot.bin')
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'), '--async-mode', mode,
+                                   '--host', '127.0.0.1', '--port', str(port), '--snapshot', path],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            for _ in range(100):
+                try:
+                    _poll(f'{base_url}/')
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            else:
+                return False, '服务器未能启动'
+            for i in range(clients):
+                _connect(base_url, f'shutdown{i}')
+            started = time.perf_counter()
+            server.send_signal(signal.SIGTERM)
+            try:
+                code = server.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False, f'SIGTERM 后 {timeout}s 内未退出'
+            elapsed = time.perf_counter() - started
+            if code != 0:
+                return False, f'退出码 {code}'
+            if not os.path.exists(path):
+                return False, '没有写下退出时的快照'
+            return True, f'{elapsed:.2f}s 内退出，快照已写入'
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='eventlet,gevent,threading')
+    parser.add_argument('--clients', type=int, default=3, help='发送 SIGTERM 时仍保持连接的客户端数')
+    parser.add_argument('--timeout', type=float, default=5, help='允许的退出时长（秒）')
+    args = parser.parse_args()
+
+    failed = False
+    for mode in args.modes.split(','):
+        if mode != 'threading' and importlib.util.find_spec(mode) is None:
+            print(f'{mode:>9}: 未安装，跳过')
+            continue
+        ok, detail = check_mode(mode, args.clients, args.timeout)
+        print(f"{mode:>9}: {'通过' if ok else '失败'}，{detail}")
+        failed = failed or not ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
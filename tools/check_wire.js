@@ -0,0 +1,18 @@
+// 二进制编码一致性校验的 node 一侧：读取 check_wire.py 生成的用例文件（base64 的 wire 载荷），
+// 用 static/js/wire.js 解码，把解码结果以 JSON 数组写到标准输出，由 Python 一侧与 JSON 事件比较。
+//
+// 用法（通常由 tools/check_wire.py 调用）：
+//     node tools/check_wire.js payloads.json
+'use strict';
+const fs = require('fs');
+const path = require('path');
+const NetPDKWire = require(path.join(__dirname, '..', 'static', 'js', 'wire.js'));
+
+const cases = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const results = cases.map(c => {
+    const data = Buffer.from(c.payload, 'base64');
+    if (c.kind === 'state') return NetPDKWire.decodeState(data);
+    if (c.kind === 'private') return NetPDKWire.decodePrivate(data);
+    return NetPDKWire.decodeDelta(data, c.players);
+});
+process.stdout.write(JSON.stringify(results));
@@ -0,0 +1,108 @@
+"""一致性校验：wire 二进制编码经 static/js/wire.js 解码后，必须与 JSON 事件的内容完全相同。
+
+按种子开若干局（2~6 人、1~6 副牌、各规则预设），每步随机出牌/过牌并穿插掉线、重连，
+记录公开状态、每个玩家（以及一个未入座的旁观连接）的私有状态和每次的增量，服务端一侧取 JSON 事件的内容，
+客户端一侧交给 node 解码二进制载荷，逐条比较。需要 node。
+
+用法：
+    python tools/check_wire.py --games 60
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _common import random_game, same_rank_move  # noqa: E402
+import wire  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAMES = ['甲', 'Alice', '专家AI🤖️ 1号', '一个名字非常非常非常长的玩家（超过三十一个字节）', '', 'x' * 300]
+SPECTATOR = 'watcher'
+
+
+def _json(obj):
+    return json.loads(json.dumps(obj, ensure_ascii=False))
+
+
+def _record_state(cases, game, viewers, host_sid, room_id, message):
+    state = game.get_public_state()
+    state.update(host_sid=host_sid, room_id=room_id, message=message)
+    cases.append({'kind': 'state', 'payload': wire.encode_public_state(game, host_sid, room_id, message), 'expect': _json(state)})
+    for sid in viewers:
+        cases.append({'kind': 'private', 'payload': wire.encode_private_state(game, sid),
+                      'expect': _json(game.get_private_state(sid))})
+
+
+def play_game(rng, game_index):
+    room_id = f'房间{game_index}'
+    game = random_game(rng, NAMES)
+    host_sid = 'sid0'
+    cases = []
+    _record_state(cases, game, ['sid0'], host_sid, room_id, '')
+    game.start_game(seed=game_index)
+
+    step = 0
+    while game.game_started:
+        step += 1
+        sid = game.current_turn_sid
+        roll = rng.random()
+        if roll < 0.05:
+            game.set_offline(rng.choice(game.player_order), rng.random() < 0.5)
+        elif roll < 0.8 or not game.pass_turn(sid)[0]:
+            game.play_turn(sid, same_rank_move(rng, game, sid))
+        message = f'第 {step} 步'
+        snapshot_players = _json(game.get_public_state()['players'])
+        delta = game.get_state_delta()
+        if delta is not None:
+            cases.append({'kind': 'delta', 'payload': wire.encode_delta(game, message), 'players': snapshot_players,
+                          'expect': _json({**delta, 'message': message})})
+        if step % 7 == 0 or not game.game_started:
+            _record_state(cases, game, game.player_order + [SPECTATOR], host_sid, room_id, message)
+    return cases
+
+
+def client_results(cases):
+    node = shutil.which('node')
+    if node is None:
+        sys.exit('需要 node 才能运行客户端一侧')
+    payloads = [{'kind': c['kind'], 'payload': base64.b64encode(c['payload']).decode(), 'players': c.get('players')}
+                for c in cases]
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(payloads, f, ensure_ascii=False)
+        path = f.name
+    try:
+        output = subprocess.run([node, os.path.join(ROOT, 'tools', 'check_wire.js'), path],
+                                check=True, capture_output=True, text=True).stdout
+    finally:
+        os.unlink(path)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=20240101)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [case for g in range(args.games) for case in play_game(rng, g)]
+    actual = client_results(cases)
+
+    mismatches = [(c, a) for c, a in zip(cases, actual) if c['expect'] != a]
+    for case, a in mismatches[:5]:
+        print(f"不一致（{case['kind']}）:\n  JSON:   {case['expect']}\n  二进制: {a}")
+    kinds = {kind: sum(1 for c in cases if c['kind'] == kind) for kind in ('state', 'private', 'delta')}
+    print(f"{args.games} 局：公开状态 {kinds['state']} 条、私有状态 {kinds['private']} 条、增量 {kinds['delta']} 条，"
+          f"不一致 {len(mismatches)} 处")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""差分模糊测试：预编译识别器 HandClassifier 与原始 _get_play_info 实现的结果必须完全一致。
+
+参考实现是识别器引入之前 Game._get_play_info 的逐次计算版本（保留在本文件中），之后只补上了多副牌的 5 张以上炸弹。
+随机牌组一半从多副牌中均匀抽取，一半按“连续点数 + 随机张数”构造，以覆盖顺子、连对、飞机等牌型。
+
+用法：
+    python tools/fuzz_classifier.py --iterations 2000000 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import CARD_NAMES, CARD_VALUE, CARD_VALUES, RANK_CARD_IDS, SMALL_JOKER, BIG_JOKER  # noqa: E402
+from game_logic import CLASSIFIER_RULE_KEYS, HandType, PlayInfo, get_classifier  # noqa: E402
+
+RULE_COMBINATIONS = [
+    dict(zip(CLASSIFIER_RULE_KEYS, (rocket, four_with_two, wings)))
+    for rocket in (False, True) for four_with_two in (False, True) for wings in (False, True)
+]
+
+
+def reference_play_info(cards, room_settings):
+    """识别器引入之前的 Game._get_play_info（逐次构建 Counter 并读取房间规则）。"""
+    if not cards:
+        return PlayInfo(HandType.UNKNOWN, 0, 0, 0)
+    n = len(cards)
+    counts = Counter(CARD_VALUE[c] for c in cards)
+    values = sorted(counts.keys())
+
+    if room_settings.get('allow_rocket', True) and n == 2 and set(cards) == {SMALL_JOKER, BIG_JOKER}:
+        return PlayInfo(HandType.ROCKET, 99, n, 0)
+
+    if len(counts) == 1:
+        if n == 1:
+            return PlayInfo(HandType.SINGLE, values[0], n, 0)
+        if n == 2:
+            return PlayInfo(HandType.PAIR, values[0], n, 0)
+        if n == 3:
+            return PlayInfo(HandType.THREE_OF_A_KIND, values[0], n, 0)
+        if n >= 4:
+            return PlayInfo(HandType.BOMB, values[0], n, 0)
+
+    if len(counts) == 2:
+        if n == 4 and 3 in counts.values():
+            return PlayInfo(HandType.THREE_WITH_ONE, [v for v, c in counts.items() if c == 3][0], n, 0)
+        if n == 5 and 3 in counts.values():
+            return PlayInfo(HandType.THREE_WITH_TWO, [v for v, c in counts.items() if c == 3][0], n, 0)
+
+    if room_settings.get('allow_four_with_two', True) and n in (6, 8) and 4 in counts.values():
+        kicker_counts = sorted(c for c in counts.values() if c != 4)
+        if kicker_counts in ([1, 1], [2], [2, 2]):
+            return PlayInfo(HandType.FOUR_WITH_TWO, [v for v, c in counts.items() if c == 4][0], n, 0)
+
+    if CARD_VALUES['2'] in values or CARD_VALUES['小王'] in values or CARD_VALUES['大王'] in values:
+        return PlayInfo(HandType.UNKNOWN, 0, n, 0)
+
+    is_consecutive = values[-1] - values[0] == len(values) - 1
+    if is_consecutive:
+        if n >= 5 and len(counts) == n:
+            return PlayInfo(HandType.STRAIGHT, values[-1], n, len(values))
+        if n >= 6 and n % 2 == 0 and all(c == 2 for c in counts.values()):
+            return PlayInfo(HandType.CONSECUTIVE_PAIRS, values[-1], n, len(values))
+        if n >= 6 and n % 3 == 0 and all(c == 3 for c in counts.values()):
+            return PlayInfo(HandType.AIRPLANE, values[-1], n, len(values))
+
+    if room_settings.get('allow_airplane_wings', True):
+        threes = sorted([v for v, c in counts.items() if c == 3])
+        if len(threes) >= 2 and threes[-1] - threes[0] == len(threes) - 1:
+            if len(cards) == len(threes) * 4:
+                return PlayInfo(HandType.AIRPLANE_WITH_SINGLES, threes[-1], n, len(threes))
+            if len(cards) == len(threes) * 5 and all(c in (2, 3) for c in counts.values()):
+                return PlayInfo(HandType.AIRPLANE_WITH_PAIRS, threes[-1], n, len(threes))
+
+    return PlayInfo(HandType.UNKNOWN, 0, n, 0)
+
+
+def random_cards(rng, deck):
+    roll = rng.random()
+    if roll < 0.05:
+        # 多副牌的同点数大炸弹
+        rank = rng.randrange(15)
+        return [rng.choice(RANK_CARD_IDS[rank]) for _ in range(rng.randint(4, 24))]
+    if roll < 0.5:
+        return rng.sample(deck, rng.randint(1, 16))
+    start = rng.randrange(15)
+    cards = []
+    for rank in range(start, min(15, start + rng.randint(1, 7))):
+        cards.extend(rng.choice(RANK_CARD_IDS[rank]) for _ in range(rng.randint(1, 4)))
+    # 随机带上几张副牌
+    cards.extend(rng.choice(deck) for _ in range(rng.choice((0, 0, 1, 2, 3))))
+    return cards
+
+
+def fuzz(seed, iterations):
+    rng = random.Random(seed)
+    deck = list(range(54)) * 6
+    for _ in range(iterations):
+        settings = rng.choice(RULE_COMBINATIONS)
+        cards = random_cards(rng, deck)
+        expected = reference_play_info(cards, settings)
+        actual = get_classifier(settings).classify(cards)
+        if expected != actual:
+            return [CARD_NAMES[c] for c in cards], settings, expected, actual
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1_000_000, help='随机牌组总数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--seed', type=int, default=20240101)
+    args = parser.parse_args()
+
+    per_worker = -(-args.iterations // args.workers)
+    started = time.perf_counter()
+    with Pool(args.workers) as pool:
+        results = pool.starmap(fuzz, [(args.seed + i, per_worker) for i in range(args.workers)])
+    elapsed = time.perf_counter() - started
+
+    failures = [r for r in results if r is not None]
+    for cards, settings, expected, actual in failures:
+        print(f"不一致: {cards} 规则={settings}\n  参考实现: {expected}\n  识别器:   {actual}")
+    print(f"{per_worker * args.workers} 组随机牌，{elapsed:.1f}s，不一致 {len(failures)} 处")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+# wire.py
+"""
+Socket.IO 事件的紧凑二进制编码（可选，客户端连接时协商，默认仍用 JSON）。
+
+帧格式是 MessagePack 的子集（nil/bool/整数/字符串/数组/ext），不依赖第三方库，
+客户端的解码器见 static/js/wire.js。在此之上：
+- 牌用扩展类型表示：EXT_CARDS 每张牌一个字节的牌 ID；EXT_CARD_COUNTS 为每个牌 ID 的张数（54 字节），
+  两者取较短的一种（多副牌的大手牌用计数向量）；
+- 房间规则用 EXT_SETTINGS：副牌数 + 开关位（位序同 snapshot.SETTING_FLAGS）；
+- 公开状态、私有状态与增量都是按固定字段顺序排列的数组，不带键名；玩家只在 players 中出现一次，
+  其余位置（座次、当前/上一手玩家、房主、出牌记录、增量操作）用玩家下标引用。
+
+    公开状态: [版本号, 已开局, 房主, 房间号, 消息, 规则, 玩家, 座次, 当前玩家, 上一手玩家, 桌面的牌, 最近出牌]
+        玩家: [sid, 昵称, 剩余张数, 标志位]，最近出牌: [玩家, 牌]
+    私有状态: [版本号, 我的 sid, 我的手牌]
+    增量: [版本号, 消息, 操作...]，操作: [OP_PLAY, 玩家, 牌] | [OP_PASS, 玩家] | [OP_TURN, 玩家] | [OP_CLEAR]
+
+公开状态与增量对房间内所有连接相同，每次变化只编码一次；私有状态逐个发给入座的玩家。
+
+增量中的玩家下标以上一份公开状态的玩家列表为准：玩家增减、换座都会让增量失效而改发完整状态。
+"""
+import struct
+
+from cards import NUM_CARD_IDS, Hand
+from game_logic import RECENT_PLAYS_IN_STATE
+from snapshot import PLAYER_IS_BOT, PLAYER_OFFLINE, SETTING_FLAGS
+
+WIRE_JSON = 'json'
+WIRE_BINARY = 'binary'
+WIRE_FORMATS = (WIRE_JSON, WIRE_BINARY)
+
+EXT_CARDS = 1
+EXT_CARD_COUNTS = 2
+EXT_SETTINGS = 3
+
+OP_PLAY, OP_PASS, OP_TURN, OP_CLEAR = range(4)
+OP_CODES = {'play': OP_PLAY, 'pass': OP_PASS, 'turn': OP_TURN, 'clear': OP_CLEAR}
+
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_U64 = struct.Struct('>Q')
+_I64 = struct.Struct('>q')
+
+
+class Ext:
+    """MessagePack 扩展类型：类型码 + 原始字节。"""
+    __slots__ = ('code', 'data')
+
+    def __init__(self, code, data):
+        self.code = code
+        self.data = data
+
+
+# --- MessagePack 子集 ---
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj <= 0xff:
+            out += b'\xcc' + bytes((obj,))
+        elif 0 <= obj <= 0xffff:
+            out += b'\xcd' + _U16.pack(obj)
+        elif 0 <= obj <= 0xffffffff:
+            out += b'\xce' + _U32.pack(obj)
+        elif obj > 0:
+            out += b'\xcf' + _U64.pack(obj)
+        else:
+            out += b'\xd3' + _I64.pack(obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        n = len(data)
+        if n < 32:
+            out.append(0xa0 | n)
+        elif n <= 0xff:
+            out += b'\xd9' + bytes((n,))
+        elif n <= 0xffff:
+            out += b'\xda' + _U16.pack(n)
+        else:
+            out += b'\xdb' + _U32.pack(n)
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xffff:
+            out += b'\xdc' + _U16.pack(n)
+        else:
+            out += b'\xdd' + _U32.pack(n)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, Ext):
+        n = len(obj.data)
+        if n <= 0xff:
+            out += b'\xc7' + bytes((n, obj.code))
+        else:
+            out += b'\xc8' + _U16.pack(n) + bytes((obj.code,))
+        out += obj.data
+    else:
+        raise TypeError(f'无法编码的类型: {type(obj).__name__}')
+
+
+def packb(obj):
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+# --- 游戏状态 ---
+
+def cards_ext(cards):
+    """一组牌 ID：张数较多时改用每个牌 ID 的计数向量。"""
+    if len(cards) <= NUM_CARD_IDS:
+        return Ext(EXT_CARDS, bytes(cards))
+    counts = bytearray(NUM_CARD_IDS)
+    for c in cards:
+        counts[c] += 1
+    return Ext(EXT_CARD_COUNTS, bytes(counts))
+
+
+def hand_ext(hand):
+    if len(hand) > NUM_CARD_IDS:
+        return Ext(EXT_CARD_COUNTS, bytes(hand.card_counts()))
+    return Ext(EXT_CARDS, bytes(hand))
+
+
+def settings_ext(settings):
+    flags = sum(1 << i for i, key in enumerate(SETTING_FLAGS) if settings.get(key, True))
+    return Ext(EXT_SETTINGS, bytes((int(settings.get('num_decks', 1)), flags)))
+
+
+def encode_public_state(game, host_sid=None, room_id='', message=''):
+    """所有人相同的公开状态（与 get_public_state 加上房主/房间号/消息等价）。"""
+    index = {sid: i for i, sid in enumerate(game.players)}
+    players = [[sid, p['name'], len(p['hand']),
+                (PLAYER_IS_BOT if p['is_bot'] else 0) | (PLAYER_OFFLINE if p['offline'] else 0)]
+               for sid, p in game.players.items()]
+    recent = [[index.get(play['sid']), cards_ext(play['cards'])]
+              for play in game.get_recent_plays(RECENT_PLAYS_IN_STATE, encode_cards=False)]
+    return packb([
+        game.state_version, game.game_started, index.get(host_sid), room_id, message,
+        settings_ext(game.room_settings), players, [index[sid] for sid in game.player_order],
+        index.get(game.current_turn_sid), index.get(game.last_player_sid),
+        cards_ext(game.last_played_cards), recent,
+    ])
+
+
+def encode_private_state(game, for_sid):
+    """只发给 for_sid 本人的私有状态（与 get_private_state 等价）。"""
+    hand = game.players[for_sid]['hand'] if for_sid in game.players else Hand()
+    return packb([game.state_version, for_sid, hand_ext(hand)])
+
+
+def encode_delta(game, message=''):
+    """最近一次变化的增量；无法用增量描述时返回 None。所有玩家收到的是同一份字节。"""
+    if game.last_delta is None:
+        return None
+    index = {sid: i for i, sid in enumerate(game.players)}
+    ops = []
+    for op in game.last_delta:
+        code = OP_CODES[op['op']]
+        if code == OP_CLEAR:
+            ops.append([code])
+        elif code == OP_PLAY:
+            ops.append([code, index[op['sid']], cards_ext(op['cards'])])
+        else:
+            ops.append([code, index[op['sid']]])
+    return packb([game.state_version, message, *ops])